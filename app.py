@@ -1,20 +1,27 @@
 import streamlit as st
-import pandas as pd
 import os
-from dotenv import load_dotenv
-import google.auth
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 import io
-from openai import OpenAI
-from typing import Dict, List
-import sqlite3
+import difflib
+import html
+import logging
+from typing import Dict, List, Tuple
 from datetime import datetime
-import json
-from google.oauth2 import service_account
-import pickle
+import time
+
+from destinos import config, db, google_auth, pipeline, revisions, search, sheets_queue, transfer
+from destinos.changes import diff_fields
+from destinos.db import DB_PATH
+from destinos.fields import CONTENT_FIELDS, SECTIONS
+from destinos.config import (
+    GENERATION_CONCURRENCY, GENERATION_GROUP_SIZE, GENERATION_TIMEOUT, SHEETS_FLUSH_DEBOUNCE, SHEETS_FLUSH_MAX_DELAY
+)
+from destinos.generation import FIELD_INSTRUCTIONS, ContentStream, request_content
+from destinos.jobs import DONE as JOB_DONE, PENDING as JOB_PENDING, RUNNING as JOB_RUNNING, Job, JobQueue
+from destinos.sheets_meta import SheetMetadata
+from destinos.sheets_queue import SheetsWriteQueue
+from destinos.sheets_sync import SheetsSync, frame_to_values
+from destinos.store import DestinationStore, location_key
+from destinos.telemetry import telemetry
 
 # Configuración de la página (debe ser la primera llamada a Streamlit)
 st.set_page_config(
@@ -24,17 +31,20 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Cargar variables de entorno
-load_dotenv()
+# Las variables de entorno (.env) se cargan en destinos.config.
+# OpenAI y Google se configuran recién cuando se usan, así la página se dibuja
+# sin esperar a ninguno de los dos.
+api_key = config.openai_api_key()
 
-# Configurar OpenAI
-api_key = os.getenv('OPENAI_API_KEY')
-if not api_key:
-    st.error("No se encontró la clave API de OpenAI. Por favor, verifica tu archivo .env")
-    st.stop()
+# Mensajes de diagnóstico con niveles (LOG_LEVEL=DEBUG para verlos); desactivados por defecto
+config.configure_logging()
+logger = logging.getLogger('destinos.app')
 
-# Crear el cliente de OpenAI una sola vez
-client = OpenAI(api_key=api_key)
+# Cliente de OpenAI, uno por proceso. El planificador reparte el presupuesto por
+# minuto entre todas las sesiones y la cola, y se encarga de los reintentos.
+@st.cache_resource(show_spinner=False)
+def get_openai_client():
+    return config.build_openai_client()
 
 # Configuración de Google Sheets
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive.file']
@@ -43,6 +53,13 @@ SHEET_NAME = 'Destinos'  # Nombre consistente de la hoja
 CREDENTIALS_FILE = 'credentials.json'
 TOKEN_FILE = 'token.pickle'
 
+# Segundos entre consultas de avance mientras hay trabajos en segundo plano
+JOB_POLL_SECONDS = float(os.getenv('JOB_POLL_SECONDS', '2'))
+
+# Caché de respuestas de OpenAI y mediciones de telemetría en destinos.db
+response_cache = config.build_response_cache(DB_PATH)
+telemetry.bind(DB_PATH)
+
 # Título y descripción
 st.title("✈️ JetSMART Content Manager")
 st.markdown("""
@@ -50,140 +67,71 @@ st.markdown("""
     Puedes visualizar, editar y generar nuevo contenido automáticamente.
 """)
 
-# Función para autenticación con Google Sheets
-def get_google_sheets_service():
-    """Inicializar y retornar el servicio de Google Sheets"""
-    creds = None
-    
-    # Cargar credenciales existentes si están disponibles
-    if os.path.exists(TOKEN_FILE):
-        with open(TOKEN_FILE, 'rb') as token:
-            try:
-                creds = pickle.load(token)
-            except Exception as e:
-                st.error(f"Error al cargar el token: {str(e)}")
-                os.remove(TOKEN_FILE)  # Eliminar token inválido
-    
-    # Si no hay credenciales válidas, solicitar autorización
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            try:
-                creds.refresh(Request())
-            except Exception as e:
-                st.error(f"Error al refrescar el token: {str(e)}")
-                creds = None
-        else:
-            try:
-                flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_FILE, SCOPES)
-                creds = flow.run_local_server(port=0, success_message="Autenticación exitosa!")
-                # Guardar las credenciales para la próxima ejecución
-                with open(TOKEN_FILE, 'wb') as token:
-                    pickle.dump(creds, token)
-            except Exception as e:
-                st.error(f"Error en el flujo de autorización: {str(e)}")
-                return None
-    
+# Credenciales y servicio de Google Sheets, compartidos entre ejecuciones del script.
+# Las funciones en caché lanzan excepciones para que un fallo no quede guardado.
+@st.cache_resource(show_spinner=False)
+def _cached_google_credentials():
+    return google_auth.load_credentials(CREDENTIALS_FILE, TOKEN_FILE, SCOPES)
+
+@st.cache_resource(show_spinner=False)
+def _cached_sheets_service():
+    return google_auth.build_sheets_service(_cached_google_credentials())
+
+def get_google_credentials():
+    """Obtiene las credenciales de Google Sheets"""
     try:
-        # Construir el servicio
-        service = build('sheets', 'v4', credentials=creds)
-        return service
+        return _cached_google_credentials()
     except Exception as e:
-        st.error(f"Error al construir el servicio: {str(e)}")
+        st.error(f"Error al obtener credenciales de Google: {str(e)}")
         return None
 
-# Inicializar el servicio de Google Sheets
-sheet_service = get_google_sheets_service()
-
-# Función para cargar datos desde Google Sheets
-def load_sheet_data():
+# Función para autenticación con Google Sheets
+def get_google_sheets_service(show_error: bool = True):
+    """Retornar el servicio de Google Sheets (se construye una sola vez por proceso, al primer uso)"""
     try:
-        service = get_google_sheets_service()
-        if not service:
-            st.error("No se pudo obtener el servicio de Google Sheets")
-            return None
-            
-        # Obtener los valores de la hoja
-        result = service.spreadsheets().values().get(
-            spreadsheetId=SHEET_ID,
-            range=f"'{SHEET_NAME}'"  # Usar el nombre consistente de la hoja
-        ).execute()
-        
-        values = result.get('values', [])
-        
-        if not values:
-            st.warning("No se encontraron datos en la hoja de Google Sheets.")
-            return pd.DataFrame()
-            
-        # Convertir a DataFrame
-        df = pd.DataFrame(values[1:], columns=values[0])
-        
-        # Reemplazar valores vacíos con cadenas vacías
-        df = df.fillna('')
-        
-        return df
+        return _cached_sheets_service()
     except Exception as e:
-        st.error(f"Error al cargar datos de Google Sheets: {str(e)}")
+        if show_error:
+            st.error(f"Error al construir el servicio: {str(e)}")
         return None
 
+# La caché de metadatos y la cola usan como clave el ID configurado (SHEET_ID), que no
+# cambia; si se crea una hoja nueva, SheetMetadata guarda su ID en la base y lo sigue usando.
+@st.cache_resource(show_spinner=False)
+def _cached_sheet_metadata(spreadsheet_id):
+    return SheetMetadata(get_google_sheets_service(), spreadsheet_id, SHEET_NAME, db_path=DB_PATH)
+
+def get_sheet_metadata() -> SheetMetadata:
+    """Metadatos de la hoja actual, compartidos por todas las sesiones del proceso"""
+    return _cached_sheet_metadata(SHEET_ID)
+
+def current_sheet_id():
+    """ID de la hoja en uso: la configurada o la creada en su reemplazo"""
+    return get_sheet_metadata().spreadsheet_id
+
 def verify_or_create_sheet():
-    """Verificar si la hoja existe y crearla si no existe"""
-    global SHEET_ID
+    """Verificar si la hoja existe y crearla si no existe
+
+    Solo la primera llamada consulta la API; las siguientes usan los metadatos en
+    caché hasta que una escritura falle porque la hoja o el rango ya no existen.
+    """
     try:
-        # Intentar obtener información de la hoja
-        sheet_metadata = sheet_service.spreadsheets().get(spreadsheetId=SHEET_ID).execute()
-        st.write("Debug - Hoja existente encontrada")
-        
-        # Verificar que la hoja 'Destinos' existe
-        sheet_exists = False
-        for sheet in sheet_metadata.get('sheets', []):
-            if sheet['properties']['title'] == 'Destinos':
-                sheet_exists = True
-                break
-        
-        if not sheet_exists:
-            # Crear la hoja 'Destinos' si no existe
-            body = {
-                'requests': [{
-                    'addSheet': {
-                        'properties': {
-                            'title': 'Destinos'
-                        }
-                    }
-                }]
-            }
-            sheet_service.spreadsheets().batchUpdate(
-                spreadsheetId=SHEET_ID,
-                body=body
-            ).execute()
-            st.write("Debug - Hoja 'Destinos' creada")
-        
-        return True
+        info = get_sheet_metadata().ensure()
     except Exception as e:
-        st.write("Debug - La hoja no existe o hay un error, creando una nueva...")
-        try:
-            # Crear una nueva hoja de cálculo
-            spreadsheet = {
-                'properties': {
-                    'title': 'Destinos JetSMART'
-                },
-                'sheets': [{
-                    'properties': {
-                        'title': 'Destinos'
-                    }
-                }]
-            }
-            spreadsheet = sheet_service.spreadsheets().create(body=spreadsheet).execute()
-            SHEET_ID = spreadsheet['spreadsheetId']
-            st.success(f"Nueva hoja creada con ID: {SHEET_ID}")
-            return True
-        except Exception as create_error:
-            st.error(f"Error al crear la hoja: {str(create_error)}")
-            return False
+        st.error(f"Error al verificar la hoja: {str(e)}")
+        return False
+    
+    # Avisar una sola vez por sesión que se creó una hoja nueva
+    if info.created and st.session_state.get('sheet_created_notice') != info.spreadsheet_id:
+        st.session_state.sheet_created_notice = info.spreadsheet_id
+        st.success(f"Nueva hoja creada con ID: {info.spreadsheet_id}")
+    return True
 
 def save_sheet_data(df):
     try:
-        st.write("Debug - Iniciando guardado en Google Sheets")
+        logger.debug("Iniciando guardado en Google Sheets")
         
+        sheet_service = get_google_sheets_service()
         if not sheet_service:
             st.error("Error: No se ha configurado el servicio de Google Sheets")
             return False
@@ -194,76 +142,22 @@ def save_sheet_data(df):
                 st.error("Error: No se pudo verificar o crear la hoja")
                 return False
             
-            # Asegurarse de que tenemos todas las columnas necesarias
-            required_columns = [
-                'LOCATION', 'NAV_BAR', 'NAV_ACERCA DE', 'NAV_QUE_HACER_EN', 'NAV_CUANDO_IR_A',
-                'NAV_LOS_IMPERDIBLES_DE', 'CARD_CONOCE_LA_CIUDAD_DE', 'TITLE_CONOCE_LA_CIUDAD_DE',
-                'IMG_CONOCE_LA_CIUDAD_DE', 'DESCRIP_CONOCE_LA_CIUDAD_DE', 'CARD_ACERCA_DEL_AEROPUERTO',
-                'IMG_ACERCA_DEL_AEROPUERTO', 'SUBTITLE_ACERCA_DEL_AEROPUERTO', 'DESCRIP_ACERCA_DEL_AEROPUERTO',
-                'CARD_QUE_HACER_EN', 'TITLE_QUE_HACER_EN', 'IMG_QUE_HACER_EN', 'SUBTITLE_QUE_HACER_EN',
-                'DESCRIP_QUE_HACER_EN', 'CARD_CUANDO_IR_A', 'TITLE_CUANDO_IR_A', 'SUBTITLE_CUANDO_IR_A',
-                'IMG_1_CUANDO_IR_A', 'DESCRIP_CUANDO_IR_A', 'IMG_2_CUANDO_IR_A',
-                'CARD_CONOCE_LOS_IMPERDIBLES_DE', 'TITLE_CONOCE_LOS_IMPERDIBLES_DE',
-                'IMG_CONOCE_LOS_IMPERDIBLES_DE', 'DESCRIP_CONOCE_LOS_IMPERDIBLES_DE',
-                'SUBCARD_1_TITLE_CONOCE_LOS_IMPERDIBLES_DE', 'SUBCARD_1_IMG_CONOCE_LOS_IMPERDIBLES_DE',
-                'SUBCARD_1_DESCRIP__CONOCE_LOS_IMPERDIBLES_DE', 'SUBCARD_2_TITLE_CONOCE_LOS_IMPERDIBLES_DE',
-                'SUBCARD_2_IMG_CONOCE_LOS_IMPERDIBLES_DE', 'SUBCARD_2_DESCRIP__CONOCE_LOS_IMPERDIBLES_DE',
-                'SUBCARD_3_TITLE_CONOCE_LOS_IMPERDIBLES_DE', 'SUBCARD_3_IMG_CONOCE_LOS_IMPERDIBLES_DE',
-                'SUBCARD_3_DESCRIP__CONOCE_LOS_IMPERDIBLES_DE', 'SUBCARD_4_TITLE_CONOCE_LOS_IMPERDIBLES_DE',
-                'SUBCARD_4_IMG_CONOCE_LOS_IMPERDIBLES_DE', 'SUBCARD_4_DESCRIP__CONOCE_LOS_IMPERDIBLES_DE',
-                'CARD_DATOS_IMPORTANTES', 'IMG_DATOS_IMPORTANTES', 'DESCRIP_DATOS_IMPORTANTES'
-            ]
-            
-            # Asegurarse de que el DataFrame tiene todas las columnas necesarias
-            for col in required_columns:
-                if col not in df.columns:
-                    df[col] = ''
+            # Filas como texto en el orden de CONTENT_FIELDS (None/NaN como cadena vacía), sin iterar fila por fila
+            rows = frame_to_values(df, CONTENT_FIELDS)
+            logger.debug("Preparados %d registros para enviar", len(rows))
             
-            # Reordenar las columnas según el orden requerido
-            df = df[required_columns]
+            # Limpiar y reescribir la hoja en bloques; también reinicia el estado de la
+            # sincronización incremental (con la cola detenida mientras tanto)
+            with get_sheets_queue().lock:
+                result = get_sheets_sync().write_all(rows)
             
-            # Convertir el DataFrame a una lista de listas para Google Sheets
-            values = [required_columns]  # Primero los encabezados
-            
-            # Convertir los valores del DataFrame a strings y reemplazar None/NaN por cadenas vacías
-            for _, row in df.iterrows():
-                row_values = []
-                for col in required_columns:
-                    val = row[col]
-                    if pd.isna(val) or val is None:
-                        val = ''
-                    row_values.append(str(val))
-                values.append(row_values)
-            
-            st.write(f"Debug - Preparados {len(values)} registros para enviar")
-            
-            # Limpiar la hoja existente
-            sheet_service.spreadsheets().values().clear(
-                spreadsheetId=SHEET_ID,
-                range='Destinos!A:ZZ'  # Limpia todas las columnas
-            ).execute()
-            
-            st.write("Debug - Hoja limpiada exitosamente")
-            
-            # Escribir los nuevos datos
-            body = {
-                'values': values,
-                'majorDimension': 'ROWS'
-            }
-            
-            result = sheet_service.spreadsheets().values().update(
-                spreadsheetId=SHEET_ID,
-                range='Destinos!A1',  # Comienza desde A1
-                valueInputOption='RAW',
-                body=body
-            ).execute()
-            
-            st.write(f"Debug - Datos guardados exitosamente: {result.get('updatedCells')} celdas actualizadas")
-            st.write(f"Debug - Rango actualizado: {result.get('updatedRange')}")
-            st.success(f"✅ Datos guardados en Google Sheets. ID de la hoja: {SHEET_ID}")
+            logger.debug("Datos guardados: %d celdas actualizadas en %d bloques", result.cells, result.ranges)
+            st.success(f"✅ Datos guardados en Google Sheets. ID de la hoja: {current_sheet_id()}")
             return True
             
         except Exception as e:
+            # Si la hoja o el rango ya no existen, volver a consultar los metadatos la próxima vez
+            get_sheet_metadata().invalidate_on(e)
             st.error(f"Error específico al guardar en Google Sheets: {str(e)}")
             return False
             
@@ -271,300 +165,119 @@ def save_sheet_data(df):
         st.error(f"Error general al guardar en Google Sheets: {str(e)}")
         return False
 
-# Función para generar contenido con IA
-def generate_content(location: str) -> Dict[str, str]:
+@st.cache_resource(show_spinner=False)
+def _cached_sheets_queue(spreadsheet_id):
+    # Una sola cola (y un solo hilo escritor sobre sheets_outbox) por proceso
+    metadata = _cached_sheet_metadata(spreadsheet_id)
+    queue = SheetsWriteQueue(
+        SheetsSync(get_google_sheets_service(), metadata.spreadsheet_id, SHEET_NAME, metadata=metadata),
+        DB_PATH,
+        debounce=SHEETS_FLUSH_DEBOUNCE,
+        max_delay=SHEETS_FLUSH_MAX_DELAY
+    )
+    queue.start()
+    return queue
+
+def get_sheets_queue() -> SheetsWriteQueue:
+    """Cola de envío a Sheets del proceso; al crearla retoma lo que quedó pendiente"""
+    return _cached_sheets_queue(SHEET_ID)
+
+def get_sheets_sync():
+    """Sincronizador incremental asociado a la hoja actual (compartido con la cola)"""
+    return get_sheets_queue().sync
+
+def queue_sheet_changes(locations):
+    """Anotar destinos para enviarlos a Google Sheets en segundo plano"""
     try:
-        st.write("Debug - Iniciando generación de contenido para:", location)
+        if not get_google_sheets_service():
+            st.warning("⚠️ Google Sheets no está configurado; los cambios quedan en la base de datos local")
+            sheets_queue.enqueue(locations, DB_PATH)
+            return False
         
-        # Inicializar el diccionario con valores por defecto
-        content_dict = {
-            'LOCATION': location,
-            'NAV_BAR': '',
-            'NAV_ACERCA DE': location,
-            'NAV_QUE_HACER_EN': location,
-            'NAV_CUANDO_IR_A': location,
-            'NAV_LOS_IMPERDIBLES_DE': location,
-            'CARD_CONOCE_LA_CIUDAD_DE': '',
-            'TITLE_CONOCE_LA_CIUDAD_DE': location,
-            'IMG_CONOCE_LA_CIUDAD_DE': 'URL_IMG',
-            'DESCRIP_CONOCE_LA_CIUDAD_DE': '',
-            'CARD_ACERCA_DEL_AEROPUERTO': '',
-            'IMG_ACERCA_DEL_AEROPUERTO': 'URL_IMG',
-            'SUBTITLE_ACERCA_DEL_AEROPUERTO': '',
-            'DESCRIP_ACERCA_DEL_AEROPUERTO': '',
-            'CARD_QUE_HACER_EN': '',
-            'TITLE_QUE_HACER_EN': location,
-            'IMG_QUE_HACER_EN': 'URL_IMG',
-            'SUBTITLE_QUE_HACER_EN': '',
-            'DESCRIP_QUE_HACER_EN': '',
-            'CARD_CUANDO_IR_A': '',
-            'TITLE_CUANDO_IR_A': location,
-            'SUBTITLE_CUANDO_IR_A': '',
-            'IMG_1_CUANDO_IR_A': 'URL_IMG',
-            'DESCRIP_CUANDO_IR_A': '',
-            'IMG_2_CUANDO_IR_A': 'URL_IMG',
-            'CARD_CONOCE_LOS_IMPERDIBLES_DE': '',
-            'TITLE_CONOCE_LOS_IMPERDIBLES_DE': location,
-            'IMG_CONOCE_LOS_IMPERDIBLES_DE': 'URL_IMG',
-            'DESCRIP_CONOCE_LOS_IMPERDIBLES_DE': '',
-            'SUBCARD_1_TITLE_CONOCE_LOS_IMPERDIBLES_DE': '',
-            'SUBCARD_1_IMG_CONOCE_LOS_IMPERDIBLES_DE': 'URL_IMG',
-            'SUBCARD_1_DESCRIP__CONOCE_LOS_IMPERDIBLES_DE': '',
-            'SUBCARD_2_TITLE_CONOCE_LOS_IMPERDIBLES_DE': '',
-            'SUBCARD_2_IMG_CONOCE_LOS_IMPERDIBLES_DE': 'URL_IMG',
-            'SUBCARD_2_DESCRIP__CONOCE_LOS_IMPERDIBLES_DE': '',
-            'SUBCARD_3_TITLE_CONOCE_LOS_IMPERDIBLES_DE': '',
-            'SUBCARD_3_IMG_CONOCE_LOS_IMPERDIBLES_DE': 'URL_IMG',
-            'SUBCARD_3_DESCRIP__CONOCE_LOS_IMPERDIBLES_DE': '',
-            'SUBCARD_4_TITLE_CONOCE_LOS_IMPERDIBLES_DE': '',
-            'SUBCARD_4_IMG_CONOCE_LOS_IMPERDIBLES_DE': 'URL_IMG',
-            'SUBCARD_4_DESCRIP__CONOCE_LOS_IMPERDIBLES_DE': '',
-            'CARD_DATOS_IMPORTANTES': '',
-            'IMG_DATOS_IMPORTANTES': 'URL_IMG',
-            'DESCRIP_DATOS_IMPORTANTES': ''
-        }
+        if not verify_or_create_sheet():
+            st.error("Error: No se pudo verificar o crear la hoja")
+            sheets_queue.enqueue(locations, DB_PATH)
+            return False
         
-        # Generar el prompt para OpenAI
-        prompt = f"""
-        Actúa como un redactor profesional especializado en turismo y SEO para aerolíneas low-cost como JetSMART. Tu tarea es generar contenido completo, útil y atractivo para {location} que será publicado en la sección de guía de destinos del sitio web.
-
-        🔍 Tu contenido debe seguir la estructura exacta de un Excel, tal como en el ejemplo de Antofagasta. Cada celda debe contener el tipo de información que corresponde, sin agregar campos nuevos ni alterar los existentes.
-
-        📚 ESTRUCTURA QUE DEBES COMPLETAR:
-
-        DESCRIP_CONOCE_LA_CIUDAD_DE:
-        [Introduce el destino destacando su identidad, estilo de viaje (aventura, descanso, cultura), lo más representativo y actual: paisajes, ambiente, vida local o eventos.]
-
-        SUBTITLE_ACERCA_DEL_AEROPUERTO:
-        [Nombre del aeropuerto]
-
-        DESCRIP_ACERCA_DEL_AEROPUERTO:
-        [Explica dónde está ubicado, cómo se conecta con la ciudad, cuánto demora el trayecto, y qué medios existen (transporte público, transfer, aplicaciones de transporte).]
-
-        SUBTITLE_QUE_HACER_EN:
-        [Subtítulo atractivo para la sección]
-
-        DESCRIP_QUE_HACER_EN:
-        [Recomienda actividades variadas: cultura, gastronomía, vida urbana, naturaleza. Puedes incluir panoramas clásicos y otros más actuales o únicos del lugar.]
-
-        SUBTITLE_CUANDO_IR_A:
-        [Resumen de temporada ideal]
-
-        DESCRIP_CUANDO_IR_A:
-        [Describe la mejor época para visitar según clima, actividades, festivales, precios o experiencias especiales. Incluye ventajas de temporada alta y baja.]
-
-        DESCRIP_CONOCE_LOS_IMPERDIBLES_DE:
-        [Haz un resumen general de los panoramas más llamativos, sin repetir literalmente los 4 que vendrán, pero puedes anticiparlos sutilmente.]
-
-        SUBCARD_1_TITLE_CONOCE_LOS_IMPERDIBLES_DE:
-        [Nombre del primer panorama imperdible]
-
-        SUBCARD_1_DESCRIP__CONOCE_LOS_IMPERDIBLES_DE:
-        [¿Qué es? ¿Qué se hace? ¿Por qué es imperdible? ¿Es gratuito o de pago? Precio estimado si aplica. Tips útiles.]
-
-        SUBCARD_2_TITLE_CONOCE_LOS_IMPERDIBLES_DE:
-        [Nombre del segundo panorama imperdible]
-
-        SUBCARD_2_DESCRIP__CONOCE_LOS_IMPERDIBLES_DE:
-        [Descripción detallada siguiendo el mismo formato]
-
-        SUBCARD_3_TITLE_CONOCE_LOS_IMPERDIBLES_DE:
-        [Nombre del tercer panorama imperdible]
-
-        SUBCARD_3_DESCRIP__CONOCE_LOS_IMPERDIBLES_DE:
-        [Descripción detallada siguiendo el mismo formato]
-
-        SUBCARD_4_TITLE_CONOCE_LOS_IMPERDIBLES_DE:
-        [Nombre del cuarto panorama imperdible]
-
-        SUBCARD_4_DESCRIP__CONOCE_LOS_IMPERDIBLES_DE:
-        [Descripción detallada siguiendo el mismo formato]
-
-        DESCRIP_DATOS_IMPORTANTES:
-        [Consejos prácticos para el viaje incluyendo transporte, clima, seguridad, costumbres locales y tips para turistas.]
+        get_sheets_queue().enqueue(locations)
+        return True
+    except Exception as e:
+        st.error(f"Error al encolar cambios para Google Sheets: {str(e)}")
+        return False
 
-        💡 IMPORTANTE: Para cada panorama imperdible, asegúrate de proporcionar un título claro y descriptivo en el campo SUBCARD_X_TITLE_CONOCE_LOS_IMPERDIBLES_DE.
+def show_sheets_status():
+    """Mostrar los envíos pendientes a Google Sheets y la duración del último"""
+    if not get_google_sheets_service(show_error=False):
+        st.caption("Google Sheets no está conectado; los cambios quedan en la base de datos local")
+        return
+    status = get_sheets_queue().status()
+    text = f"Google Sheets: {status['depth']} destinos pendientes"
+    if status['last_flush_latency'] is not None:
+        sent_at = datetime.fromtimestamp(status['last_flush_at']).strftime('%H:%M:%S')
+        text += f" · último envío {sent_at} ({status['last_flush_latency']:.2f}s)"
+    st.caption(text)
+    if status['last_error']:
+        st.warning(f"⚠️ Último envío a Google Sheets falló: {status['last_error']}")
 
-        Responde SOLO con el contenido solicitado para cada campo, manteniendo el formato exacto de los nombres de los campos.
-        """
-        
-        # Llamar a OpenAI para generar el contenido
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "Eres un experto en contenido turístico para JetSMART. Genera contenido atractivo y útil para viajeros."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=2000
-        )
-        
-        # Procesar la respuesta y actualizar el diccionario
-        content = response.choices[0].message.content
-        lines = content.split('\n')
-        
-        current_field = None
-        current_value = []
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Buscar campos en la línea
-            field_found = False
-            for field in content_dict.keys():
-                if line.startswith(field + ':'):
-                    # Si teníamos un campo anterior, guardamos su valor
-                    if current_field and current_value:
-                        content_dict[current_field] = ' '.join(current_value)
-                    
-                    # Comenzamos con el nuevo campo
-                    current_field = field
-                    current_value = [line.split(':', 1)[1].strip()]
-                    field_found = True
-                    break
-                    
-            # Si no encontramos un nuevo campo, agregamos la línea al valor actual
-            if not field_found and current_field:
-                current_value.append(line)
-        
-        # No olvidar guardar el último campo
-        if current_field and current_value:
-            content_dict[current_field] = ' '.join(current_value)
-        
-        return content_dict
+# Función para generar contenido con IA
+def generate_content(location: str) -> Dict[str, str]:
+    try:
+        logger.debug("Iniciando generación de contenido para %s", location)
+        return request_content(get_openai_client(), location, timeout=GENERATION_TIMEOUT, cache=response_cache)
     except Exception as e:
         st.error(f"Error al generar contenido: {str(e)}")
         return None
 
+# Alto de los campos DESCRIP por sección del editor
+DESCRIP_HEIGHTS = {'Conoce la ciudad': 200, **{f'Imperdible {i}': 100 for i in range(1, 5)}}
+
 # Función para mostrar y editar contenido
-def show_edit_content(location_data: pd.Series):
-    edited_data = {}
-    
-    # Sección de navegación
-    st.subheader("Navegación")
-    nav_fields = ['NAV_BAR', 'NAV_ACERCA DE', 'NAV_QUE_HACER_EN', 'NAV_CUANDO_IR_A', 'NAV_LOS_IMPERDIBLES_DE']
-    for field in nav_fields:
-        value = location_data[field] if pd.notna(location_data[field]) else ''
-        edited_data[field] = st.text_input(field, value=value)
-    
-    # Sección "Conoce la ciudad"
-    st.subheader("Conoce la ciudad")
-    city_fields = [
-        'CARD_CONOCE_LA_CIUDAD_DE',
-        'TITLE_CONOCE_LA_CIUDAD_DE',
-        'IMG_CONOCE_LA_CIUDAD_DE',
-        'DESCRIP_CONOCE_LA_CIUDAD_DE'
-    ]
-    for field in city_fields:
-        value = location_data[field] if pd.notna(location_data[field]) else ''
-        if 'DESCRIP' in field:
-            edited_data[field] = st.text_area(field, value=value, height=200)
-        else:
-            edited_data[field] = st.text_input(field, value=value)
+def show_edit_content(location_data: Dict[str, str]) -> Tuple[Dict[str, str], bool]:
+    """Editor por secciones: solo se dibuja la sección activa; retorna (campos modificados, guardar)
+
+    Cada sección es un formulario, así escribir en un campo no vuelve a ejecutar la página.
+    Sus dos botones registran lo escrito en st.session_state.pending_edits[location]:
+    "Aplicar" para seguir con otra sección y "Guardar" para además guardar todo.
+    """
+    location = location_data['LOCATION']
+    edits = st.session_state.setdefault('pending_edits', {}).setdefault(location, {})
     
-    # Sección "Acerca del Aeropuerto"
-    st.subheader("Acerca del Aeropuerto")
-    airport_fields = [
-        'CARD_ACERCA_DEL_AEROPUERTO',
-        'IMG_ACERCA_DEL_AEROPUERTO',
-        'SUBTITLE_ACERCA_DEL_AEROPUERTO',
-        'DESCRIP_ACERCA_DEL_AEROPUERTO'
-    ]
-    for field in airport_fields:
-        value = location_data[field] if pd.notna(location_data[field]) else ''
-        if 'DESCRIP' in field:
-            edited_data[field] = st.text_area(field, value=value, height=150)
-        else:
-            edited_data[field] = st.text_input(field, value=value)
-    
-    # Sección "Qué hacer en"
-    st.subheader("Qué hacer en")
-    todo_fields = [
-        'CARD_QUE_HACER_EN',
-        'TITLE_QUE_HACER_EN',
-        'IMG_QUE_HACER_EN',
-        'SUBTITLE_QUE_HACER_EN',
-        'DESCRIP_QUE_HACER_EN'
-    ]
-    for field in todo_fields:
-        value = location_data[field] if pd.notna(location_data[field]) else ''
-        if 'DESCRIP' in field:
-            edited_data[field] = st.text_area(field, value=value, height=150)
-        else:
-            edited_data[field] = st.text_input(field, value=value)
-    
-    # Sección "Cuándo ir a"
-    st.subheader("Cuándo ir a")
-    when_fields = [
-        'CARD_CUANDO_IR_A',
-        'TITLE_CUANDO_IR_A',
-        'SUBTITLE_CUANDO_IR_A',
-        'IMG_1_CUANDO_IR_A',
-        'DESCRIP_CUANDO_IR_A',
-        'IMG_2_CUANDO_IR_A'
-    ]
-    for field in when_fields:
-        value = location_data[field] if pd.notna(location_data[field]) else ''
-        if 'DESCRIP' in field:
-            edited_data[field] = st.text_area(field, value=value, height=150)
-        else:
-            edited_data[field] = st.text_input(field, value=value)
-    
-    # Sección "Conoce los imperdibles"
-    st.subheader("Conoce los imperdibles")
-    # Campos principales
-    main_imperdibles_fields = [
-        'CARD_CONOCE_LOS_IMPERDIBLES_DE',
-        'TITLE_CONOCE_LOS_IMPERDIBLES_DE',
-        'IMG_CONOCE_LOS_IMPERDIBLES_DE',
-        'DESCRIP_CONOCE_LOS_IMPERDIBLES_DE'
-    ]
-    for field in main_imperdibles_fields:
-        value = location_data[field] if pd.notna(location_data[field]) else ''
-        if 'DESCRIP' in field:
-            edited_data[field] = st.text_area(field, value=value, height=150)
-        else:
-            edited_data[field] = st.text_input(field, value=value)
+    section = st.radio("Sección", list(SECTIONS), horizontal=True, key=f"section:{location}")
+    st.subheader(section)
     
-    # Subcards de imperdibles
-    for i in range(1, 5):
-        st.markdown(f"##### Imperdible {i}")
-        subcard_fields = [
-            f'SUBCARD_{i}_TITLE_CONOCE_LOS_IMPERDIBLES_DE',
-            f'SUBCARD_{i}_IMG_CONOCE_LOS_IMPERDIBLES_DE',
-            f'SUBCARD_{i}_DESCRIP__CONOCE_LOS_IMPERDIBLES_DE'
-        ]
-        for field in subcard_fields:
-            value = location_data[field] if pd.notna(location_data[field]) else ''
+    with st.form(key=f"form:{location}:{section}"):
+        originals = {}
+        values = {}
+        for field in SECTIONS[section]:
+            originals[field] = location_data.get(field, '')
+            value = edits.get(field, originals[field])
             if 'DESCRIP' in field:
-                edited_data[field] = st.text_area(field, value=value, height=100)
+                values[field] = st.text_area(field, value=value, height=DESCRIP_HEIGHTS.get(section, 150),
+                                             key=f"{location}:{field}")
             else:
-                edited_data[field] = st.text_input(field, value=value)
-    
-    # Sección "Datos importantes"
-    st.subheader("Datos importantes")
-    data_fields = [
-        'CARD_DATOS_IMPORTANTES',
-        'IMG_DATOS_IMPORTANTES',
-        'DESCRIP_DATOS_IMPORTANTES'
-    ]
-    for field in data_fields:
-        value = location_data[field] if pd.notna(location_data[field]) else ''
-        if 'DESCRIP' in field:
-            edited_data[field] = st.text_area(field, value=value, height=150)
-        else:
-            edited_data[field] = st.text_input(field, value=value)
+                values[field] = st.text_input(field, value=value, key=f"{location}:{field}")
+        
+        apply_col, save_col = st.columns(2)
+        with apply_col:
+            applied = st.form_submit_button("Aplicar cambios de la sección")
+        with save_col:
+            save = st.form_submit_button("💾 Guardar Cambios", type="primary")
+        if applied or save:
+            # Guardar solo la diferencia con el contenido cargado
+            for field, value in values.items():
+                if value != originals[field]:
+                    edits[field] = value
+                else:
+                    edits.pop(field, None)
     
-    return edited_data
+    if edits and not save:
+        st.caption(f"✏️ {len(edits)} campos modificados sin guardar: {', '.join(edits)}")
+    return edits, save
 
 # Función para probar la generación de contenido
 def test_content_generation(location: str):
     with st.spinner(f"Generando contenido para {location}..."):
-        st.info(f"Debug - Iniciando generación de contenido para: {location}")
-        st.info("Debug - API Key configurada: Sí" if api_key else "No")
-        st.info("Debug - Enviando prompt a OpenAI...")
+        logger.debug("Prueba de generación para %s (API key configurada: %s)", location, "sí" if api_key else "no")
         
         content = generate_content(location)
         if content:
@@ -574,34 +287,136 @@ def test_content_generation(location: str):
             st.error(f"❌ Error al generar contenido para {location}")
             return None
 
+def append_location_row(content: Dict[str, str]):
+    """Agregar el contenido generado al almacén de destinos de la sesión"""
+    st.session_state.store.upsert(content)
+
+# Función para generar varios destinos en paralelo
+def generate_batch(locations: List[str], force: bool = False, bulk: bool = False) -> int:
+    """Generar contenido en paralelo y guardar cada destino a medida que termina
+
+    Con ``bulk`` se piden varios destinos por llamada; los que fallen se generan de a uno.
+    """
+    locations = list(dict.fromkeys(locations))
+    # Cada destino se guarda en SQLite (y queda en la cola de Sheets) apenas termina
+    results = pipeline.generate_and_save(
+        get_openai_client(), locations, DB_PATH,
+        concurrency=GENERATION_CONCURRENCY,
+        timeout=GENERATION_TIMEOUT,
+        cache=response_cache,
+        force=force,
+        bulk=bulk,
+        group_size=GENERATION_GROUP_SIZE
+    )
+    progress = st.progress(0.0, text=f"Generando contenido para {len(locations)} destinos...")
+    saved = 0
+    
+    for done, result in enumerate(results, start=1):
+        progress.progress(done / len(locations), text=f"{done}/{len(locations)} - {result.location}")
+        if not result.ok:
+            st.error(f"❌ Error al generar contenido para {result.location}: {result.error}")
+            continue
+        
+        append_location_row(result.content)
+        st.success(f"✅ Contenido generado y guardado para {result.location} en {result.elapsed:.1f}s")
+        saved += 1
+    
+    progress.empty()
+    return saved
+
+def store_generated_content(location: str, content: Dict[str, str]) -> bool:
+    """Agregar el destino generado a la tabla en pantalla y guardarlo en la base de datos"""
+    append_location_row(content)
+    
+    # Guardar automáticamente en la base de datos
+    if save_to_db(location, content):
+        st.success(f"✨ Contenido guardado exitosamente para {location}")
+        return True
+    st.error(f"Error al guardar el contenido para {location}")
+    return False
+
+# Función para generar un destino mostrando cada campo a medida que llega
+def generate_streaming(location: str, force: bool = False) -> bool:
+    """Generar un destino con streaming y mostrar los campos progresivamente"""
+    st.markdown(f"#### ✍️ Generando {location}")
+    placeholders = {field: st.empty() for field in FIELD_INSTRUCTIONS}
+    try:
+        stream = ContentStream(get_openai_client(), location, timeout=GENERATION_TIMEOUT,
+                               cache=response_cache, force=force)
+        for field, value in stream:
+            if field in placeholders:
+                placeholders[field].markdown(f"**{field}**\n\n{value}")
+    except Exception as e:
+        st.error(f"❌ Error al generar contenido para {location}: {str(e)}")
+        return False
+    
+    if stream.missing:
+        st.warning(f"⚠️ El modelo no entregó estos campos para {location}: {', '.join(stream.missing)}")
+    if stream.time_to_first_field is not None:
+        st.caption(f"Primer campo en {stream.time_to_first_field:.1f}s" + (" (caché)" if stream.from_cache else ""))
+    return store_generated_content(location, stream.content)
+
+def run_generation_job(job: Job) -> Dict[str, str]:
+    """Generar y guardar un destino de la cola (se ejecuta en un hilo en segundo plano)"""
+    content = request_content(get_openai_client(), job.location, timeout=GENERATION_TIMEOUT,
+                              cache=response_cache, force=job.params.get('force', False))
+    pipeline.save_generated(job.location, content, DB_PATH)
+    return content
+
+@st.cache_resource(show_spinner=False)
+def get_job_queue() -> JobQueue:
+    """Cola de generación del proceso; al crearla retoma los trabajos pendientes"""
+    queue = JobQueue(run_generation_job, DB_PATH, workers=GENERATION_CONCURRENCY)
+    queue.start()
+    return queue
+
+def show_job_progress():
+    """Mostrar el avance de la cola e incorporar a la sesión los destinos ya generados"""
+    queue = get_job_queue()
+    
+    # Los destinos terminados ya están en SQLite y en la cola de Sheets; aquí se agregan al almacén.
+    # Solo los lotes de esta sesión: los mensajes de otras sesiones no se muestran aquí
+    batches = st.session_state.get('job_batches', [])
+    since = st.session_state.setdefault('jobs_seen_at', time.time())
+    for job in queue.finished_since(since, batches):
+        if job.status == JOB_DONE:
+            st.session_state.store.upsert(job.result)
+            st.success(f"✨ Contenido generado y guardado para {job.location}")
+        else:
+            st.error(f"❌ Error al generar contenido para {job.location}: {job.error}")
+        since = max(since, job.finished_at)
+    st.session_state.jobs_seen_at = since
+    
+    active = active_job_counts()
+    if active:
+        total = sum(sum(counts.values()) for counts in active)
+        pending = sum(counts[JOB_PENDING] + counts[JOB_RUNNING] for counts in active)
+        st.progress((total - pending) / total if total else 0.0,
+                    text=f"Generando en segundo plano: {total - pending}/{total}")
+
+def active_job_counts() -> List[Dict[str, int]]:
+    """Trabajos por estado de cada lote de esta sesión que aún no termina (los de otras sesiones no cuentan)"""
+    queue = get_job_queue()
+    active = []
+    for batch_id in st.session_state.get('job_batches', []):
+        counts = queue.progress(batch_id)
+        if counts[JOB_PENDING] or counts[JOB_RUNNING]:
+            active.append(counts)
+    return active
+
+def session_jobs_active() -> bool:
+    """Si algún lote de esta sesión tiene trabajos sin terminar"""
+    return bool(active_job_counts())
+
 def init_db():
-    """Inicializar la base de datos SQLite"""
+    """Inicializar la base de datos SQLite (una vez por proceso; migra el esquema JSON antiguo)"""
     try:
-        conn = sqlite3.connect('destinos.db')
-        cursor = conn.cursor()
-        
-        # Crear tabla si no existe
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS destinos (
-                location TEXT PRIMARY KEY,
-                content TEXT NOT NULL,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Verificar que la tabla existe y tiene la estructura correcta
-        cursor.execute("PRAGMA table_info(destinos)")
-        columns = cursor.fetchall()
-        required_columns = {'location', 'content', 'last_updated'}
-        existing_columns = {col[1] for col in columns}
-        
-        if not required_columns.issubset(existing_columns):
-            st.error("Error: La tabla no tiene la estructura correcta")
-            return False
-        
-        conn.commit()
-        conn.close()
-        st.write("Debug - Base de datos inicializada correctamente")
+        # Crear la tabla normalizada o migrar los registros JSON existentes
+        migrated, failed = db.init_db(DB_PATH)
+        if migrated:
+            st.info(f"ℹ️ {migrated} destinos migrados al nuevo esquema de la base de datos")
+        if failed:
+            st.warning(f"⚠️ {failed} registros con JSON inválido; la tabla original se conservó como destinos_json_legacy")
         return True
     except Exception as e:
         st.error(f"Error al inicializar la base de datos: {str(e)}")
@@ -609,88 +424,31 @@ def init_db():
 
 def save_to_db(location, content):
     try:
-        st.write("Debug - Iniciando guardado en base de datos local")
-        
-        # Asegurarse de que la base de datos está inicializada
-        if not init_db():
-            st.error("Error al inicializar la base de datos")
-            return False
-            
-        # Guardar en la base de datos SQLite
-        conn = sqlite3.connect('destinos.db')
-        cursor = conn.cursor()
-        
-        # Verificar si el registro existe
-        cursor.execute('SELECT * FROM destinos WHERE location = ?', (location,))
-        exists = cursor.fetchone()
-        
-        if exists:
-            st.write(f"Debug - Actualizando registro existente para {location}")
-        else:
-            st.write(f"Debug - Creando nuevo registro para {location}")
+        logger.debug("Iniciando guardado en base de datos local")
         
-        # Convertir el diccionario a JSON para almacenamiento
-        try:
-            content_json = json.dumps(content, ensure_ascii=False)
-        except Exception as json_error:
-            st.error(f"Error al convertir contenido a JSON: {str(json_error)}")
-            return False
+        # Usar el nombre con que el destino ya existe (sin distinguir mayúsculas ni tildes)
+        if 'store' in st.session_state:
+            location = st.session_state.store.canonical(location)
         
-        # Insertar o actualizar en la base de datos
+        # Guardar en la base de datos SQLite
         try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO destinos (location, content, last_updated)
-                VALUES (?, ?, CURRENT_TIMESTAMP)
-            ''', (location, content_json))
+            if logger.isEnabledFor(logging.DEBUG):
+                action = "Actualizando" if db.destination_exists(location, DB_PATH) else "Creando"
+                logger.debug("%s registro para %s", action, location)
             
-            conn.commit()
-            st.write(f"Debug - Contenido guardado en SQLite para {location}")
-            
-            # Verificar que el registro se guardó correctamente
-            cursor.execute('SELECT * FROM destinos WHERE location = ?', (location,))
-            saved_record = cursor.fetchone()
-            if not saved_record:
-                st.error("Error: El registro no se guardó correctamente")
-                return False
-                
+            # Insertar o actualizar solo los campos presentes en el contenido
+            db.save_destination(location, content, DB_PATH)
+            logger.debug("Contenido guardado en SQLite para %s", location)
         except Exception as db_error:
             st.error(f"Error al guardar en la base de datos: {str(db_error)}")
             return False
-        finally:
-            conn.close()
         
-        # Luego guardamos en Google Sheets
-        try:
-            # Cargar todos los datos de la base de datos
-            conn = sqlite3.connect('destinos.db')
-            cursor = conn.cursor()
-            cursor.execute('SELECT location, content FROM destinos')
-            rows = cursor.fetchall()
-            conn.close()
-            
-            # Convertir los datos a DataFrame
-            all_data = []
-            for row in rows:
-                location_data = row[0]
-                content_data = json.loads(row[1])
-                all_data.append(content_data)
-            
-            df = pd.DataFrame(all_data)
-            st.write("Debug - DataFrame creado con todos los registros")
-            st.write(f"Debug - Columnas en el DataFrame: {df.columns.tolist()}")
-            
-            # Intentar guardar en Google Sheets
-            if save_sheet_data(df):
-                st.success(f"✅ Contenido guardado exitosamente para {location} en base de datos y Google Sheets")
-                return True
-            else:
-                st.warning(f"⚠️ Contenido guardado en la base de datos pero hubo un error al guardar en Google Sheets")
-                return False
-                
-        except Exception as sheet_error:
-            st.error(f"Error al guardar en Google Sheets: {str(sheet_error)}")
-            st.warning("✓ Contenido guardado solo en la base de datos local")
-            return True
+        # Google Sheets se actualiza en segundo plano; varios guardados seguidos se envían juntos
+        if queue_sheet_changes([location]):
+            st.success(f"✅ Contenido guardado para {location}; se enviará a Google Sheets en segundo plano")
+        else:
+            st.warning("✓ Contenido guardado solo en la base de datos local por ahora")
+        return True
             
     except Exception as e:
         st.error(f"Error al guardar en la base de datos: {str(e)}")
@@ -699,29 +457,21 @@ def save_to_db(location, content):
 def load_from_db():
     """Cargar datos desde SQLite"""
     try:
-        conn = sqlite3.connect('destinos.db')
-        query = "SELECT location, content FROM destinos"
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        
-        if not df.empty:
-            # Convertir JSON a columnas
-            content_df = pd.DataFrame()
-            for _, row in df.iterrows():
-                try:
-                    content_data = json.loads(row['content'])
-                    content_df = pd.concat([content_df, pd.DataFrame([content_data])], ignore_index=True)
-                except json.JSONDecodeError as e:
-                    st.error(f"Error al decodificar JSON para {row['location']}: {str(e)}")
-                    continue
-            return content_df
-        return pd.DataFrame()  # Retornar DataFrame vacío si no hay datos
+        return db.load_destinations(DB_PATH)
+    except Exception as e:
+        st.error(f"Error al cargar desde la base de datos: {str(e)}")
+        return None
+
+def load_records_from_db():
+    """Cargar los destinos desde SQLite como diccionarios (sin pandas, para el primer dibujo)"""
+    try:
+        return db.load_records(DB_PATH)
     except Exception as e:
         st.error(f"Error al cargar desde la base de datos: {str(e)}")
         return None
 
 def sync_with_sheets():
-    """Sincronizar datos con Google Sheets con mejor manejo de errores"""
+    """Enviar ahora a Google Sheets todos los destinos que cambiaron desde el último envío"""
     try:
         df = load_from_db()
         if df is not None and not df.empty:
@@ -729,103 +479,122 @@ def sync_with_sheets():
             if service is None:
                 st.error("❌ No se pudo obtener el servicio de Google Sheets")
                 return False
-                
-            success = save_sheet_data(df)
-            if success:
-                st.success("✅ Datos sincronizados con Google Sheets")
-            else:
-                st.warning("⚠️ No se pudo sincronizar con Google Sheets, pero los datos están seguros en la base de datos local")
+            
+            queue = get_sheets_queue()
+            queue.enqueue(df['LOCATION'].tolist())
+            try:
+                result = queue.flush()
+            except Exception as e:
+                st.warning(f"⚠️ No se pudo sincronizar con Google Sheets ({str(e)}), pero los datos están seguros en la base de datos local")
+                return False
+            st.success(f"✅ Datos sincronizados con Google Sheets ({result.rows} filas actualizadas)")
+            return True
         else:
             st.warning("⚠️ No hay datos para sincronizar")
     except Exception as e:
         st.error(f"❌ Error en la sincronización: {str(e)}")
         return False
 
-def get_google_credentials():
-    """Obtiene las credenciales de Google Sheets"""
+def pull_from_sheets():
+    """Traer a la base local los destinos editados directamente en Google Sheets"""
     try:
-        creds = None
-        # El archivo token.pickle almacena los tokens de acceso y actualización del usuario
-        if os.path.exists('token.pickle'):
-            with open('token.pickle', 'rb') as token:
-                creds = pickle.load(token)
-        
-        # Si no hay credenciales válidas, solicita al usuario que se autentique
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    'credentials.json', SCOPES)
-                creds = flow.run_local_server(port=0)
-            
-            # Guarda las credenciales para la próxima ejecución
-            with open('token.pickle', 'wb') as token:
-                pickle.dump(creds, token)
+        if get_google_sheets_service() is None:
+            st.error("❌ No se pudo obtener el servicio de Google Sheets")
+            return None
+        if not verify_or_create_sheet():
+            st.error("Error: No se pudo verificar o crear la hoja")
+            return None
         
-        return creds
+        queue = get_sheets_queue()
+        with queue.lock:
+            result = queue.sync.pull()
+        if result.conflicts:
+            # Cambiados en ambos lados: se conserva la versión local, que se vuelve a enviar a la hoja
+            queue.enqueue(result.conflicts)
+            st.warning(f"⚠️ {len(result.conflicts)} destinos también tenían cambios locales; se conservó la versión local: "
+                       + ', '.join(result.conflicts))
+        if result.locations:
+            st.success(f"✅ {result.inserted} destinos nuevos y {result.updated} actualizados desde Google Sheets")
+        else:
+            st.info(f"ℹ️ Sin cambios en Google Sheets ({result.rows} filas revisadas)")
+        return result
     except Exception as e:
-        st.error(f"Error al obtener credenciales de Google: {str(e)}")
+        st.error(f"❌ Error al traer cambios de Google Sheets: {str(e)}")
         return None
 
-def connect_to_google_sheets():
+def search_destinations(query: str, section: str = None):
+    """Buscar en el contenido de la base local; None si la búsqueda falla"""
     try:
-        creds = get_google_credentials()
-        if not creds:
-            st.warning("No se pudo conectar con Google Sheets. La aplicación funcionará con almacenamiento local.")
-            return None
-
-        service = build('sheets', 'v4', credentials=creds)
-        return service
+        return search.search(query, section, db_path=DB_PATH)
     except Exception as e:
-        st.warning(f"No se pudo conectar con Google Sheets: {str(e)}. La aplicación funcionará con almacenamiento local.")
+        st.error(f"Error al buscar: {str(e)}")
         return None
 
+def show_search_results(hits, elapsed: float, max_hits: int = 20, max_fields: int = 3):
+    """Resultados de la búsqueda con las coincidencias resaltadas"""
+    st.caption(f"{len(hits)} destinos encontrados en {elapsed * 1000:.1f} ms")
+    for hit in hits[:max_hits]:
+        lines = [f"**{html.escape(hit.location)}**"]
+        for name, text in hit.fields[:max_fields]:
+            text = html.escape(text).replace(search.MARK_START, '<mark>').replace(search.MARK_END, '</mark>')
+            lines.append(f"<small><code>{html.escape(name)}</code></small> {text}")
+        if len(hit.fields) > max_fields:
+            lines.append(f"<small>… y {len(hit.fields) - max_fields} campos más</small>")
+        st.markdown('<br>'.join(lines), unsafe_allow_html=True)
+
+def import_destinations(uploaded) -> bool:
+    """Importar un CSV o Excel subido y actualizar la sesión y la cola de Google Sheets"""
+    try:
+        result = transfer.import_file(uploaded, transfer.detect_format(uploaded.name), DB_PATH)
+    except Exception as e:
+        st.error(f"Error al importar {uploaded.name}: {str(e)}")
+        return False
+    
+    df = load_from_db()
+    if df is not None:
+        st.session_state.store = DestinationStore.from_frame(df)
+    queue_sheet_changes(result.locations)
+    try:
+        # Una importación grande escribe muchas revisiones; comprimirlas enseguida
+        revisions.maybe_checkpoint(DB_PATH)
+    except Exception as e:
+        logger.warning("No se pudo compactar el historial: %s", e)
+    st.success(f"✅ {result.rows} destinos importados desde {uploaded.name}")
+    if result.skipped:
+        st.warning(f"⚠️ {result.skipped} filas sin LOCATION fueron omitidas")
+    if result.unmapped:
+        st.warning(f"⚠️ Columnas ignoradas: {', '.join(result.unmapped)}")
+    return True
+
+def export_destinations(fmt: str) -> bytes:
+    """Todos los destinos de la base local como archivo CSV o Excel"""
+    buffer = io.BytesIO()
+    transfer.export_file(buffer, fmt, DB_PATH)
+    return buffer.getvalue()
+
 def clean_database():
     """Limpiar la base de datos y mantener solo Antofagasta"""
     try:
-        conn = sqlite3.connect('destinos.db')
-        c = conn.cursor()
-        
-        # Obtener el contenido de Antofagasta
-        c.execute("SELECT content FROM destinos WHERE location = 'ANTOFAGASTA'")
-        antofagasta_content = c.fetchone()
-        
-        # Eliminar todos los registros
-        c.execute("DELETE FROM destinos")
-        
-        # Si existe el contenido de Antofagasta, volver a insertarlo
-        if antofagasta_content:
-            c.execute("INSERT INTO destinos (location, content) VALUES (?, ?)", 
-                     ('ANTOFAGASTA', antofagasta_content[0]))
-        
-        conn.commit()
-        conn.close()
-        st.success("✅ Base de datos limpiada exitosamente. Solo se mantiene Antofagasta.")
+        db.keep_only('ANTOFAGASTA', DB_PATH)
+        if 'store' in st.session_state:
+            st.session_state.store.remove_except('ANTOFAGASTA')
+        st.success("✅ Base de datos limpiada exitosamente. Solo se mantiene Antofagasta. "
+                   "Se puede deshacer desde \"Cambios recientes\".")
     except Exception as e:
         st.error(f"Error al limpiar la base de datos: {str(e)}")
 
 def clean_databases():
     """Limpia las bases de datos dejando solo los datos de Antofagasta"""
     try:
-        # Limpiar SQLite
-        conn = sqlite3.connect('destinos.db')
-        cursor = conn.cursor()
-        
-        # Guardar los datos de Antofagasta
-        cursor.execute('SELECT * FROM destinos WHERE location = ?', ('ANTOFAGASTA',))
-        antofagasta_data = cursor.fetchone()
-        
-        if not antofagasta_data:
+        # Limpiar SQLite, siempre que existan los datos de Antofagasta
+        if not db.destination_exists('ANTOFAGASTA', DB_PATH):
             st.error("No se encontraron datos de Antofagasta en la base de datos local")
             return False
         
-        # Eliminar todos los registros excepto Antofagasta
-        cursor.execute('DELETE FROM destinos WHERE location != ?', ('ANTOFAGASTA',))
-        conn.commit()
-        conn.close()
-        
-        st.success("Base de datos local limpiada exitosamente")
+        db.keep_only('ANTOFAGASTA', DB_PATH)
+        if 'store' in st.session_state:
+            st.session_state.store.remove_except('ANTOFAGASTA')
+        st.success("Base de datos local limpiada exitosamente (se puede deshacer desde \"Cambios recientes\")")
         
         # Actualizar Google Sheets
         df = load_from_db()  # Cargar solo los datos de Antofagasta
@@ -844,44 +613,147 @@ def clean_databases():
         st.error(f"Error durante la limpieza de las bases de datos: {str(e)}")
         return False
 
-def main():
-    # Inicializar la base de datos
-    init_db()
+# Nombre de cada tipo de revisión en el historial
+REVISION_LABELS = {
+    revisions.SNAPSHOT: "Creado",
+    revisions.DELTA: "Editado",
+    revisions.REBASE: "Editado",
+    revisions.DELETE: "Eliminado",
+    revisions.CHECKPOINT: "Resumen",
+}
+
+def reload_after_revision(locations):
+    """Recargar la sesión y enviar a Sheets los destinos restaurados"""
+    records = load_records_from_db()
+    if records is not None:
+        st.session_state.store = DestinationStore(records)
+    for location in locations:
+        # Descartar ediciones sin guardar y los valores que los campos del editor recuerdan
+        st.session_state.get('pending_edits', {}).pop(location, None)
+        for field in CONTENT_FIELDS:
+            st.session_state.pop(f"{location}:{field}", None)
+    queue_sheet_changes(locations)
+
+def restore_revision(location: str, revision_id: int) -> bool:
+    """Volver un destino al contenido de una revisión"""
+    try:
+        content = revisions.restore(location, revision_id, DB_PATH)
+    except Exception as e:
+        st.error(f"Error al restaurar la revisión: {str(e)}")
+        return False
+    reload_after_revision([location])
+    if content is None:
+        st.success(f"✅ {location} restaurado a la revisión #{revision_id} (el destino no existía)")
+    else:
+        st.success(f"✅ {location} restaurado a la revisión #{revision_id}")
+    return True
+
+def undo_change(change) -> bool:
+    """Deshacer una operación de la lista de cambios recientes"""
+    try:
+        locations = revisions.undo(change.op_id, DB_PATH)
+    except Exception as e:
+        st.error(f"Error al deshacer el cambio: {str(e)}")
+        return False
+    reload_after_revision(locations)
+    st.success(f"✅ Cambio deshecho en {len(locations)} destinos")
+    return True
+
+def revision_time(created_at: float) -> str:
+    return datetime.fromtimestamp(created_at).strftime('%d/%m/%Y %H:%M:%S') if created_at else "inicio"
+
+def show_history(location: str):
+    """Revisiones del destino: comparar dos cualesquiera y restaurar una"""
+    try:
+        entries = revisions.history(location, DB_PATH)
+    except Exception as e:
+        st.error(f"Error al cargar el historial: {str(e)}")
+        return
+    if not entries:
+        st.info("ℹ️ Este destino todavía no tiene historial")
+        return
     
-    # Verificar credenciales de Google al inicio
-    if 'google_creds' not in st.session_state:
-        st.session_state.google_creds = get_google_credentials()
+    ids = {f"#{entry.id} · {revision_time(entry.created_at)} · {REVISION_LABELS[entry.kind]}"
+           f" ({len(entry.fields)} campos)": entry.id for entry in entries}
+    labels = list(ids)
+    from_col, to_col = st.columns(2)
+    with from_col:
+        from_id = ids[st.selectbox("Desde", labels, index=min(1, len(labels) - 1), key=f"history_from:{location}")]
+    with to_col:
+        to_id = ids[st.selectbox("Hasta", labels, index=0, key=f"history_to:{location}")]
     
-    if st.session_state.google_creds is None:
-        st.error("No se pudieron obtener las credenciales de Google. Por favor, verifica tu conexión y credenciales.")
-        return
+    changes = revisions.diff(location, from_id, to_id, DB_PATH)
+    if not changes:
+        st.caption("Sin diferencias entre estas revisiones")
+    for field, (before, after) in changes.items():
+        st.markdown(f"**{field}**")
+        # Sin las dos líneas de encabezado (---/+++) del diff unificado
+        lines = list(difflib.unified_diff(before.splitlines(), after.splitlines(), lineterm='', n=1))[2:]
+        st.code('\n'.join(lines), language='diff')
     
-    # Verificar credenciales de Google Sheets
-    service = get_google_sheets_service()
-    if service is None:
-        st.warning("⚠️ No se pudo conectar con Google Sheets. La aplicación funcionará con almacenamiento local.")
+    # Restaurar también queda en el historial, así se puede volver atrás
+    if st.button(f"↩️ Restaurar revisión #{from_id}", key=f"history_restore:{location}"):
+        if restore_revision(location, from_id):
+            st.rerun()
+
+def show_recent_changes(limit: int = 5):
+    """Últimas operaciones sobre la base local, cada una con su botón para deshacerla"""
+    try:
+        changes = revisions.recent_changes(DB_PATH, limit)
+    except Exception as e:
+        st.error(f"Error al cargar los cambios recientes: {str(e)}")
+        return
+    if not changes:
+        st.caption("Sin cambios registrados")
+    for change in changes:
+        names = ', '.join(change.locations)
+        if change.revisions > len(change.locations):
+            names += f" y {change.revisions - len(change.locations)} más"
+        action = f"{change.revisions} cambios" + (f" ({change.deleted} eliminados)" if change.deleted else "")
+        st.caption(f"{revision_time(change.created_at)} · {action}: {names}")
+        if st.button("Deshacer", key=f"undo:{change.op_id}"):
+            if undo_change(change):
+                st.rerun()
+
+def checkpoint_history():
+    """Comprimir y resumir el historial si corresponde (una vez por sesión)"""
+    if st.session_state.get('history_checked'):
+        return
+    st.session_state.history_checked = True
+    try:
+        result = revisions.maybe_checkpoint(DB_PATH)
+        if result is not None:
+            logger.info("Historial: %s revisiones comprimidas, %s resumidas", result.compressed, result.folded)
+    except Exception as e:
+        logger.warning("No se pudo compactar el historial: %s", e)
+
+def main():
+    # Inicializar la base de datos
+    init_db()
+    checkpoint_history()
     
-    # Cargar los datos al iniciar
-    if 'df' not in st.session_state:
-        df = None
+    # Cargar los datos al iniciar. Google Sheets solo se consulta si la base local falla,
+    # así leer contenido nunca espera la autenticación con Google.
+    if 'store' not in st.session_state:
         # Intentar cargar desde la base de datos primero
-        df = load_from_db()
-        if df is not None:
-            st.session_state.df = df
+        records = load_records_from_db()
+        if records is not None:
+            st.session_state.store = DestinationStore(records)
             st.info("ℹ️ Datos cargados desde la base de datos local")
         else:
-            # Si no hay datos locales, intentar cargar desde Google Sheets
-            if service is not None:
-                df = load_sheet_data()
-                if df is not None:
-                    save_to_db(df)  # Guardar en la base de datos local
-                    st.session_state.df = df
+            # Si no hay datos locales, traer la hoja de Google Sheets a la base local
+            service = get_google_sheets_service()
+            if service is None:
+                st.warning("⚠️ No se pudo conectar con Google Sheets. La aplicación funcionará con almacenamiento local.")
+            elif pull_from_sheets() is not None:
+                records = load_records_from_db()
+                if records is not None:
+                    st.session_state.store = DestinationStore(records)
                     st.success("✅ Datos cargados desde Google Sheets y guardados localmente")
             
-            if df is None:
-                # Si no hay datos en ninguna fuente, crear DataFrame vacío
-                df = pd.DataFrame(columns=expected_columns)
-                st.session_state.df = df
+            if records is None:
+                # Si no hay datos en ninguna fuente, comenzar con un almacén vacío
+                st.session_state.store = DestinationStore()
                 st.info("ℹ️ No se encontraron datos previos. Se iniciará con una base de datos vacía.")
 
     # Sidebar para agregar nuevos destinos
@@ -891,40 +763,87 @@ def main():
             "Ingresa nuevos destinos (uno por línea)",
             height=100
         )
+        force_regenerate = st.checkbox(
+            "Forzar regeneración",
+            help="Ignora las respuestas guardadas en caché y vuelve a llamar a OpenAI"
+        )
+        bulk_generation = st.checkbox(
+            "Agrupar destinos por llamada",
+            help=f"Genera hasta {GENERATION_GROUP_SIZE} destinos por llamada a OpenAI (útil para rutas nuevas completas)"
+        )
         
         if st.button("Generar Contenido"):
-            if new_locations:
+            if not api_key:
+                st.error("No se encontró la clave API de OpenAI. Por favor, verifica tu archivo .env")
+            elif new_locations:
                 locations = [loc.strip() for loc in new_locations.split('\n') if loc.strip()]
+                # "Santiago", "SANTIAGO" y "santiago " son el mismo destino
+                pending = {}
                 for location in locations:
-                    if location not in st.session_state.df['LOCATION'].values:
-                        new_content = test_content_generation(location)
-                        if new_content:
-                            # Crear un nuevo DataFrame con el contenido generado
-                            new_row = pd.DataFrame([new_content])
-                            
-                            # Asegurarse de que las columnas estén en el orden correcto
-                            for col in st.session_state.df.columns:
-                                if col not in new_row.columns:
-                                    new_row[col] = ''
-                            new_row = new_row[st.session_state.df.columns]
-                            
-                            # Concatenar con el DataFrame existente
-                            st.session_state.df = pd.concat([st.session_state.df, new_row], ignore_index=True)
-                            
-                            # Guardar automáticamente en la base de datos
-                            if save_to_db(location, new_content):
-                                st.success(f"✨ Contenido guardado exitosamente para {location}")
-                                # Intentar sincronizar con Google Sheets
-                                sync_with_sheets()
-                            else:
-                                st.error(f"Error al guardar el contenido para {location}")
+                    if location in st.session_state.store:
+                        st.warning(f"⚠️ {location} ya existe en la base de datos como {st.session_state.store.canonical(location)}")
                     else:
-                        st.warning(f"⚠️ {location} ya existe en la base de datos")
+                        pending.setdefault(location_key(location), location)
+                pending = list(pending.values())
+                
+                # Un solo destino se genera con streaming para ver el contenido de inmediato
+                # Cada destino guardado queda en la cola de Sheets, que los envía juntos
+                if len(pending) == 1 and not bulk_generation:
+                    generate_streaming(pending[0], force=force_regenerate)
+                elif pending and bulk_generation:
+                    generate_batch(pending, force=force_regenerate, bulk=True)
+                elif pending:
+                    # Varios destinos: cola en segundo plano, sobrevive a recargas de la página.
+                    # Los que ya están en cola (otra sesión, doble clic) no se vuelven a pagar:
+                    # la sesión sigue el lote que ya los está generando
+                    queue = get_job_queue()
+                    followed = queue.active_batches(pending)
+                    batch_id = queue.enqueue(pending, {'force': force_regenerate})
+                    batches = st.session_state.setdefault('job_batches', [])
+                    batches.extend(batch for batch in followed + [batch_id] if batch not in batches)
+                    st.info(f"⏳ {len(pending)} destinos en cola de generación")
+        
+        show_job_progress()
+        
+        st.markdown("---")
+        # Se completa al final, después de dibujar el contenido (conecta con Google)
+        sheets_panel = st.container()
+        
+        with st.expander("Importar / exportar"):
+            uploaded = st.file_uploader("Archivo CSV o Excel", type=list(transfer.FORMATS))
+            if uploaded is not None and st.button("Importar destinos"):
+                import_destinations(uploaded)
+            
+            export_format = st.radio("Formato de exportación", transfer.FORMATS, horizontal=True)
+            if st.button("Preparar exportación"):
+                with st.spinner("Exportando destinos..."):
+                    st.session_state.export_file = (export_format, export_destinations(export_format))
+            if 'export_file' in st.session_state:
+                fmt, data = st.session_state.export_file
+                st.download_button(f"Descargar destinos.{fmt}", data, file_name=f"destinos.{fmt}")
+        
+        with st.expander("Cambios recientes"):
+            show_recent_changes()
 
     # Contenido principal
-    if 'df' in st.session_state:
+    if 'store' in st.session_state:
+        # Búsqueda en el contenido; el selector muestra solo los resultados, del más relevante al menos
+        locations = st.session_state.store.locations()
+        search_col, section_col = st.columns([3, 1])
+        with search_col:
+            query = st.text_input("🔎 Buscar en el contenido", placeholder='Ej.: "Cerro San Cristóbal" o URL_IMG')
+        with section_col:
+            section = st.selectbox("Sección", ["Todas"] + list(SECTIONS))
+        if query.strip():
+            start = time.perf_counter()
+            hits = search_destinations(query, None if section == "Todas" else section)
+            if hits is not None:
+                with st.expander("Resultados de la búsqueda", expanded=True):
+                    show_search_results(hits, time.perf_counter() - start)
+                if hits:
+                    locations = [hit.location for hit in hits if hit.location in st.session_state.store]
+        
         # Selector de destino
-        locations = st.session_state.df['LOCATION'].unique()
         selected_location = st.selectbox(
             "Selecciona un destino para ver o editar su contenido",
             locations
@@ -934,23 +853,46 @@ def main():
         if selected_location:
             st.markdown("---")
             st.subheader(f"📍 Contenido de {selected_location}")
-            location_data = st.session_state.df[st.session_state.df['LOCATION'] == selected_location].iloc[0]
+            location_data = st.session_state.store.get(selected_location)
             
-            # Mostrar y editar contenido
-            edited_data = show_edit_content(location_data)
-            
-            # Botón para guardar cambios
-            if st.button("💾 Guardar Cambios"):
-                for col, value in edited_data.items():
-                    st.session_state.df.loc[st.session_state.df['LOCATION'] == selected_location, col] = value
-                
-                # Guardar automáticamente en la base de datos
-                if save_to_db(selected_location, edited_data):
-                    st.success("✅ Cambios guardados exitosamente!")
-                    # Intentar sincronizar con Google Sheets
-                    sync_with_sheets()
+            # Mostrar y editar contenido; "Guardar" incluye lo escrito en la sección visible
+            edited_data, save = show_edit_content(location_data)
+            if save:
+                changes = diff_fields(location_data, edited_data)
+                if not changes:
+                    # Nada cambió: no se escribe en la base de datos ni en Google Sheets
+                    st.session_state.pending_edits.pop(selected_location, None)
+                    st.info("ℹ️ No hay cambios para guardar")
+                # save_to_db guarda solo estos campos y envía a Sheets solo esta fila
+                elif save_to_db(selected_location, changes):
+                    # La copia en memoria cambia solo si la base aceptó el cambio; si no, la
+                    # edición sigue pendiente y el próximo "Guardar" la vuelve a intentar
+                    st.session_state.store.update(selected_location, changes)
+                    st.session_state.pending_edits.pop(selected_location, None)
+                    st.success(f"✅ {len(changes)} campos guardados exitosamente!")
                 else:
                     st.error("❌ Error al guardar los cambios")
+            
+            with st.expander("🕘 Historial de cambios"):
+                show_history(selected_location)
+
+    with sheets_panel:
+        show_sheets_status()
+        if st.button("Sincronizar con Google Sheets"):
+            sync_with_sheets()
+        if st.button("Traer cambios de Google Sheets",
+                     help="Actualiza la base local solo con las filas editadas directamente en la hoja"):
+            result = pull_from_sheets()
+            if result is not None and result.locations:
+                records = load_records_from_db()
+                if records is not None:
+                    st.session_state.store = DestinationStore(records)
+                    st.rerun()
+
+    # Mientras los lotes de esta sesión tengan trabajos en segundo plano, volver a consultar su avance
+    if session_jobs_active():
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""Benchmark de carga de destinos desde SQLite: esquema JSON anterior vs carga en una pasada
+
+Uso:
+    python -m benchmarks.bench_load_from_db [--sizes 100 1000 10000] [--json salida.json]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from destinos.db import ensure_schema, iter_frames, load_frame, row_params, DATA_FIELDS, quote
+from destinos.fields import default_content
+
+
+def synthetic_content(i: int):
+    content = default_content(f"DESTINO {i:05d}")
+    for field in content:
+        if field.startswith('DESCRIP'):
+            content[field] = f"Descripción sintética {i} " * 20
+    return content
+
+
+def build_legacy_db(path: str, n: int):
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE destinos (location TEXT PRIMARY KEY, content TEXT NOT NULL, '
+                 'last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP)')
+    conn.executemany('INSERT INTO destinos (location, content) VALUES (?, ?)',
+                     [(f"DESTINO {i:05d}", json.dumps(synthetic_content(i), ensure_ascii=False)) for i in range(n)])
+    conn.commit()
+    conn.close()
+
+
+def build_normalized_db(path: str, n: int):
+    conn = sqlite3.connect(path)
+    ensure_schema(conn)
+    placeholders = ', '.join('?' for _ in range(len(DATA_FIELDS) + 1))
+    conn.executemany(
+        'INSERT INTO destinos (location, ' + ', '.join(quote(f) for f in DATA_FIELDS) + f') VALUES ({placeholders})',
+        [row_params(f"DESTINO {i:05d}", synthetic_content(i)) for i in range(n)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def load_legacy(path: str) -> pd.DataFrame:
+    """Ruta anterior de load_from_db: iterrows + pd.concat fila por fila"""
+    conn = sqlite3.connect(path)
+    df = pd.read_sql_query("SELECT location, content FROM destinos", conn)
+    conn.close()
+    content_df = pd.DataFrame()
+    for _, row in df.iterrows():
+        content_data = json.loads(row['content'])
+        content_df = pd.concat([content_df, pd.DataFrame([content_data])], ignore_index=True)
+    return content_df
+
+
+def load_new(path: str) -> pd.DataFrame:
+    conn = sqlite3.connect(path)
+    df = load_frame(conn)
+    conn.close()
+    return df
+
+
+def load_chunked(path: str) -> int:
+    conn = sqlite3.connect(path)
+    total = sum(len(frame) for frame in iter_frames(conn, 1000))
+    conn.close()
+    return total
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--json', help='Archivo donde escribir los resultados')
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            legacy_path = os.path.join(tmp, f'legacy_{n}.db')
+            normalized_path = os.path.join(tmp, f'normalized_{n}.db')
+            build_legacy_db(legacy_path, n)
+            build_normalized_db(normalized_path, n)
+
+            legacy_s, legacy_df = timed(load_legacy, legacy_path)
+            new_s, new_df = timed(load_new, normalized_path)
+            chunked_s, chunked_rows = timed(load_chunked, normalized_path)
+            assert len(legacy_df) == len(new_df) == chunked_rows == n
+
+            results.append({'destinations': n, 'legacy_s': round(legacy_s, 4),
+                            'single_pass_s': round(new_s, 4), 'chunked_s': round(chunked_s, 4),
+                            'speedup': round(legacy_s / new_s, 1) if new_s else None})
+            print(f"{n:>6} destinos | anterior {legacy_s:8.3f}s | una pasada {new_s:8.3f}s | "
+                  f"por bloques {chunked_s:8.3f}s | x{results[-1]['speedup']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
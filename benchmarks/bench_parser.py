@@ -0,0 +1,142 @@
+"""Corpus de prueba y micro-benchmark del parser de respuestas del modelo
+
+Genera respuestas sintéticas con adornos de markdown aleatorios y líneas que parecen
+encabezados de campos no generados (``Location: ...``), verifica que el parser
+recupere exactamente cada campo (y reporte los que faltan) y compara el
+tiempo contra el parser anterior, que revisaba cada campo en cada línea.
+
+Uso:
+    python -m benchmarks.bench_parser [--cases 500] [--seed 7] [--json salida.json]
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from destinos.fields import default_content
+from destinos.generation import FIELD_INSTRUCTIONS
+from destinos.parser import parse_response
+
+WORDS = ('playa desierto museo mercado costanera mirador cerro plaza feria vino '
+         'verano invierno ruta aeropuerto centro barrio historia sabor').split()
+
+HEADER_STYLES = [
+    '{f}: {v}',
+    '**{f}:** {v}',
+    '**{f}**: {v}',
+    '- **{f}:** {v}',
+    '1. {f}: {v}',
+    '{lower}: {v}',
+    '### {f}\n{v}',
+    '{f}:\n{v}',
+]
+
+# Líneas del cuerpo que se parecen a campos que el modelo no escribe: no son encabezados
+DECOY_LINES = [
+    'Location: {v}',
+    'LOCATION: {v}',
+    'Nav_bar',
+    '**NAV_BAR**',
+    'IMG_QUE_HACER_EN: {v}',
+    'Card_datos_importantes: {v}',
+]
+
+
+def legacy_parse(location: str, content: str):
+    """Parser anterior de generate_content: O(líneas x campos)"""
+    content_dict = default_content(location)
+    current_field = None
+    current_value = []
+    for line in content.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        field_found = False
+        for field in content_dict.keys():
+            if line.startswith(field + ':'):
+                if current_field and current_value:
+                    content_dict[current_field] = ' '.join(current_value)
+                current_field = field
+                current_value = [line.split(':', 1)[1].strip()]
+                field_found = True
+                break
+        if not field_found and current_field:
+            current_value.append(line)
+    if current_field and current_value:
+        content_dict[current_field] = ' '.join(current_value)
+    return content_dict
+
+
+def sentence(rng: random.Random) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 25))).capitalize() + '.'
+
+
+def make_case(rng: random.Random):
+    """(texto, valores esperados, campos omitidos) para una respuesta sintética"""
+    expected, dropped, blocks = {}, [], []
+    if rng.random() < 0.3:
+        blocks.append('Claro, aquí tienes el contenido solicitado:')
+    for field in FIELD_INSTRUCTIONS:
+        if rng.random() < 0.05:
+            dropped.append(field)
+            continue
+        lines = [sentence(rng) for _ in range(rng.randint(1, 3))]
+        if rng.random() < 0.1:
+            lines.append(rng.choice(DECOY_LINES).format(v=sentence(rng)))
+        expected[field] = ' '.join(lines)
+        style = rng.choice(HEADER_STYLES)
+        blocks.append(style.format(f=field, lower=field.lower(), v=lines[0]) + ''.join('\n' + l for l in lines[1:]))
+    separator = rng.choice(['\n', '\n\n', '\n  \n'])
+    return separator.join(blocks), expected, dropped
+
+
+def check_corpus(cases):
+    failures = 0
+    for text, expected, dropped in cases:
+        result = parse_response('DESTINO', text, FIELD_INSTRUCTIONS)
+        wrong = [f for f, v in expected.items() if result.content[f] != v]
+        if wrong or result.missing != dropped or result.content['LOCATION'] != 'DESTINO':
+            failures += 1
+    return failures
+
+
+def bench(fn, texts, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            fn('DESTINO', text)
+        best = min(best, time.perf_counter() - start)
+    return best / len(texts) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cases', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', help='Archivo donde escribir los resultados')
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    cases = [make_case(rng) for _ in range(args.cases)]
+    failures = check_corpus(cases)
+
+    texts = [text for text, _, _ in cases]
+    legacy_us = bench(legacy_parse, texts)
+    new_us = bench(lambda location, text: parse_response(location, text, FIELD_INSTRUCTIONS), texts)
+
+    results = {'cases': args.cases, 'failures': failures,
+               'legacy_us_per_response': round(legacy_us, 1), 'new_us_per_response': round(new_us, 1)}
+    print(f"Corpus: {args.cases} respuestas, {failures} con errores de parseo")
+    print(f"Parser anterior: {legacy_us:8.1f} µs/respuesta")
+    print(f"Parser nuevo:    {new_us:8.1f} µs/respuesta")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
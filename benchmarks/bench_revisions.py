@@ -0,0 +1,93 @@
+"""Benchmark del historial de revisiones: espacio en disco, checkpoint, diff y restaurar
+
+Cada ronda edita un campo de todos los destinos (un delta por destino y ronda).
+
+Uso:
+    python -m benchmarks.bench_revisions [--sizes 1000 5000] [--rounds 30] [--repeat 20] [--json salida.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_load_from_db import build_normalized_db
+from benchmarks.bench_search import timed_median
+from destinos import db, revisions
+from destinos.telemetry import telemetry
+
+EDIT_FIELD = 'DESCRIP_QUE_HACER_EN'
+
+
+def file_kb(path: str) -> float:
+    conn = db.get_connection(path)
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.execute('VACUUM')
+    return round(os.path.getsize(path) / 1024, 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000])
+    parser.add_argument('--rounds', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', help='Archivo donde escribir los resultados')
+    args = parser.parse_args(argv)
+
+    # Las mediciones van solo al buffer en memoria, no a destinos.db
+    telemetry.sink_name = 'none'
+    results = []
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, 'revisions.db')
+            build_normalized_db(path, n)
+            base_kb = file_kb(path)
+            locations = [f"DESTINO {i:05d}" for i in range(n)]
+
+            start = time.perf_counter()
+            for round_ in range(args.rounds):
+                with db.transaction(path) as conn:
+                    conn.executemany(f'UPDATE destinos SET {db.quote(EDIT_FIELD)} = ? WHERE location = ?',
+                                     [(f"Texto de la ronda {round_} para {location}. " * 8, location)
+                                      for location in locations])
+            edit_s = time.perf_counter() - start
+            raw = revisions.stats(path)
+            raw_kb = file_kb(path)
+
+            start = time.perf_counter()
+            revisions.checkpoint(path)
+            checkpoint_s = time.perf_counter() - start
+            compressed_kb = file_kb(path)
+
+            history = revisions.history(locations[0], path, limit=args.rounds + 1)
+            oldest, newest = history[-1].id, history[0].id
+            diff_s = timed_median(lambda: revisions.diff(locations[0], oldest, newest, path), args.repeat)
+            restore_s = timed_median(lambda: revisions.restore(locations[1], oldest, path), args.repeat)
+
+            # Todo lo anterior queda resumido en una revisión por destino
+            start = time.perf_counter()
+            revisions.checkpoint(path, keep_days=-1)
+            fold_s = time.perf_counter() - start
+            folded = revisions.stats(path)
+            folded_kb = file_kb(path)
+            db.close_connection(path)
+
+        result = {'destinations': n, 'rounds': args.rounds, 'revisions': raw['revisions'],
+                  'base_kb': base_kb, 'raw_kb': raw_kb, 'compressed_kb': compressed_kb, 'folded_kb': folded_kb,
+                  'folded_revisions': folded['revisions'], 'edit_s': round(edit_s, 3),
+                  'checkpoint_s': round(checkpoint_s, 3), 'fold_s': round(fold_s, 3),
+                  'diff_ms': round(diff_s * 1000, 2), 'restore_ms': round(restore_s * 1000, 2)}
+        results.append(result)
+        print(f"{n:>6} destinos x {args.rounds} rondas | base {base_kb:.0f} KB | sin comprimir {raw_kb:.0f} KB | "
+              f"checkpoint {compressed_kb:.0f} KB ({checkpoint_s:.2f}s) | resumido {folded_kb:.0f} KB "
+              f"({folded['revisions']} revisiones) | diff {diff_s * 1000:.2f} ms | restaurar {restore_s * 1000:.2f} ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,277 @@
+"""Escenarios de punta a punta con OpenAI y Google Sheets falsos, en proceso
+
+Cada escenario corre sobre una base temporal con ``destinos.fakes.FakeOpenAI`` y
+``destinos.fakes.FakeSheetsService`` (latencia y tasa de errores configurables):
+
+- generate: generar N destinos, guardarlos y enviarlos a Sheets por la cola
+- edit_save: editar y guardar un destino (SQLite -> cola -> ``values.batchUpdate``), repetido
+- full_sync: reescritura completa de la hoja (``save_sheet_data``) y sincronización incremental
+- load_from_db: carga de todos los destinos con pandas y como diccionarios
+
+El resultado es JSON. Con ``--baseline`` se compara contra una ejecución anterior y
+el proceso termina con código 1 si algún indicador empeora más que ``--tolerance``
+(los conteos de celdas y pedidos se comparan exactos).
+
+Uso:
+    python -m benchmarks.bench_scenarios [--destinations 2000] [--generate 50] [--edits 20]
+        [--openai-latency 0.05] [--sheets-latency 0.02] [--openai-error-rate 0.05]
+        [--sheets-error-rate 0.05] [--json salida.json] [--baseline benchmarks/results/scenarios.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_load_from_db import build_normalized_db
+from destinos import db, pipeline
+from destinos.fakes import FakeOpenAI, FakeSheetsService
+from destinos.scheduler import RetryPolicy, ScheduledClient
+from destinos.sheets_meta import SheetMetadata
+from destinos.sheets_queue import SheetsWriteQueue
+from destinos.sheets_sync import SheetsSync, frame_to_values
+from destinos.telemetry import percentile, summarize, telemetry
+
+SCENARIOS = ('generate', 'edit_save', 'full_sync', 'load_from_db')
+EDIT_FIELD = 'DESCRIP_QUE_HACER_EN'
+MAX_ATTEMPTS = 10
+
+# Indicadores comparados con --baseline (menor es mejor)
+REGRESSION_KEYS = {
+    'generate': ('elapsed_s', 'p95_ms', 'openai_calls', 'sheets_cells'),
+    'edit_save': ('p50_ms', 'p95_ms', 'cells_per_save', 'requests_per_save'),
+    'full_sync': ('full_write_s', 'incremental_noop_s', 'incremental_s', 'incremental_cells'),
+    'load_from_db': ('load_destinations_s', 'load_records_s'),
+}
+
+
+def ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+def retrying(fn, *args):
+    """Ejecutar ``fn`` reintentando los errores inyectados; retorna (resultado, fallas)"""
+    for failures in range(MAX_ATTEMPTS):
+        try:
+            return fn(*args), failures
+        except Exception:
+            if failures == MAX_ATTEMPTS - 1:
+                raise
+
+
+def sheets_queue(service: FakeSheetsService, db_path: str) -> SheetsWriteQueue:
+    """Cola y sincronizador como los arma la aplicación (sin el hilo en segundo plano)"""
+    metadata = SheetMetadata(service, 'bench', 'Destinos')
+    return SheetsWriteQueue(SheetsSync(service, 'bench', 'Destinos', db_path=db_path, metadata=metadata), db_path)
+
+
+def run_generate(args, workdir: str) -> dict:
+    db_path = os.path.join(workdir, 'generate.db')
+    db.init_db(db_path)
+    fake = FakeOpenAI(latency=args.openai_latency, error_rate=args.openai_error_rate, seed=args.seed)
+    client = ScheduledClient(fake, requests_per_minute=1e6, tokens_per_minute=1e9,
+                             policy=RetryPolicy(max_retries=MAX_ATTEMPTS, base_delay=0.01, max_delay=0.05))
+    service = FakeSheetsService(latency=args.sheets_latency, error_rate=args.sheets_error_rate, seed=args.seed)
+    queue = sheets_queue(service, db_path)
+    locations = [f"DESTINO GENERADO {i:04d}" for i in range(args.generate)]
+
+    start = time.perf_counter()
+    results = list(pipeline.generate_and_save(client, locations, db_path, concurrency=args.concurrency, timeout=30))
+    generated_s = time.perf_counter() - start
+    pushed, failures = retrying(queue.flush)
+    elapsed = time.perf_counter() - start
+
+    durations = [result.elapsed for result in results if result.ok]
+    return {
+        'destinations': len(locations),
+        'ok': len(durations),
+        'failed': len(results) - len(durations),
+        'elapsed_s': round(elapsed, 4),
+        'generate_and_save_s': round(generated_s, 4),
+        'per_second': round(len(durations) / generated_s, 1) if generated_s else None,
+        'p50_ms': ms(percentile(durations, 50)),
+        'p95_ms': ms(percentile(durations, 95)),
+        'openai_calls': fake.calls + fake.errors,
+        'openai_errors': fake.errors,
+        'retries': client.retries,
+        'sheets_rows': pushed.rows,
+        'sheets_cells': pushed.cells,
+        'sheets_failed_flushes': failures,
+    }
+
+
+def run_edit_save(args, workdir: str) -> dict:
+    db_path = os.path.join(workdir, 'edit.db')
+    build_normalized_db(db_path, args.destinations)
+    service = FakeSheetsService(latency=args.sheets_latency, seed=args.seed)
+    queue = sheets_queue(service, db_path)
+    queue.sync.write_all(frame_to_values(db.load_destinations(db_path), queue.sync.columns))
+    service.reset_counters()
+    service.error_rate = args.sheets_error_rate
+
+    step = max(args.destinations // max(args.edits, 1), 1)
+    totals, sqlite_times, failures = [], [], 0
+    for i in range(args.edits):
+        location = f"DESTINO {(i * step) % args.destinations:05d}"
+        content = db.load_destination(location, db_path)
+        content[EDIT_FIELD] = f"{content.get(EDIT_FIELD, '')} (edición {i})"
+
+        # Mismo recorrido que save_to_db: SQLite, anotar en la cola y enviar
+        start = time.perf_counter()
+        db.save_destination(location, content, db_path)
+        queue.enqueue([location])
+        saved = time.perf_counter()
+        _, failed = retrying(queue.flush)
+        failures += failed
+        sqlite_times.append(saved - start)
+        totals.append(time.perf_counter() - start)
+
+    return {
+        'destinations': args.destinations,
+        'saves': args.edits,
+        'p50_ms': ms(percentile(totals, 50)),
+        'p95_ms': ms(percentile(totals, 95)),
+        'sqlite_p50_ms': ms(percentile(sqlite_times, 50)),
+        'cells_per_save': round(service.cells_written / max(args.edits, 1), 1),
+        'requests_per_save': round((service.requests - service.errors) / max(args.edits, 1), 2),
+        'failed_flushes': failures,
+    }
+
+
+def run_full_sync(args, workdir: str) -> dict:
+    db_path = os.path.join(workdir, 'sync.db')
+    build_normalized_db(db_path, args.destinations)
+    service = FakeSheetsService(latency=args.sheets_latency, error_rate=args.sheets_error_rate, seed=args.seed)
+    queue = sheets_queue(service, db_path)
+    locations = [f"DESTINO {i:05d}" for i in range(args.destinations)]
+
+    # Reescritura completa, como save_sheet_data
+    start = time.perf_counter()
+    rows = frame_to_values(db.load_destinations(db_path), queue.sync.columns)
+    convert_s = time.perf_counter() - start
+    written, write_failures = retrying(queue.sync.write_all, rows)
+    full_write_s = time.perf_counter() - start
+
+    # "Sincronizar con Google Sheets" sin cambios: todo se descarta por hash
+    start = time.perf_counter()
+    queue.enqueue(locations)
+    noop, noop_failures = retrying(queue.flush)
+    noop_s = time.perf_counter() - start
+
+    # Con el 1% de los destinos modificados
+    changed = locations[::100]
+    for location in changed:
+        db.save_destination(location, {EDIT_FIELD: f"Cambio en {location}"}, db_path)
+    start = time.perf_counter()
+    queue.enqueue(locations)
+    incremental, incremental_failures = retrying(queue.flush)
+    incremental_s = time.perf_counter() - start
+
+    return {
+        'destinations': args.destinations,
+        'convert_s': round(convert_s, 4),
+        'full_write_s': round(full_write_s, 4),
+        'full_write_cells': written.cells,
+        'full_write_requests': written.ranges,
+        'incremental_noop_s': round(noop_s, 4),
+        'incremental_noop_rows': noop.rows,
+        'incremental_s': round(incremental_s, 4),
+        'incremental_rows': incremental.rows,
+        'incremental_cells': incremental.cells,
+        'failed_attempts': write_failures + noop_failures + incremental_failures,
+    }
+
+
+def run_load_from_db(args, workdir: str) -> dict:
+    db_path = os.path.join(workdir, 'load.db')
+    build_normalized_db(db_path, args.destinations)
+    frames, records = [], []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        df = db.load_destinations(db_path)
+        frames.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        rows = db.load_records(db_path)
+        records.append(time.perf_counter() - start)
+    assert len(df) == len(rows) == args.destinations
+    return {
+        'destinations': args.destinations,
+        'load_destinations_s': round(statistics.median(frames), 4),
+        'load_records_s': round(statistics.median(records), 4),
+    }
+
+
+RUNNERS = {
+    'generate': run_generate,
+    'edit_save': run_edit_save,
+    'full_sync': run_full_sync,
+    'load_from_db': run_load_from_db,
+}
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list:
+    """Indicadores que empeoraron respecto de ``baseline``"""
+    regressions = []
+    for name, metrics in result['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            continue
+        for key in REGRESSION_KEYS[name]:
+            old, new = previous.get(key), metrics.get(key)
+            if old is None or new is None:
+                continue
+            exact = isinstance(old, int) and isinstance(new, int)
+            if (new > old) if exact else (new > old * (1 + tolerance) and new - old > 0.001):
+                regressions.append(f"{name}.{key}: {old} -> {new}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--destinations', type=int, default=2000, help='Destinos en la base de edit_save/full_sync/load')
+    parser.add_argument('--generate', type=int, default=50, help='Destinos a generar en el escenario generate')
+    parser.add_argument('--edits', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--openai-latency', type=float, default=0.05)
+    parser.add_argument('--openai-error-rate', type=float, default=0.05)
+    parser.add_argument('--sheets-latency', type=float, default=0.02)
+    parser.add_argument('--sheets-error-rate', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='Archivo donde escribir los resultados')
+    parser.add_argument('--baseline', help='Resultados anteriores (JSON) contra los que comparar')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='Empeoramiento relativo admitido en los tiempos (0.5 = 50%%)')
+    args = parser.parse_args(argv)
+
+    # Las mediciones van solo al buffer en memoria, no a destinos.db
+    telemetry.sink_name = 'none'
+    params = {name: value for name, value in vars(args).items() if name not in ('json', 'baseline', 'scenarios')}
+    result = {'params': params, 'scenarios': {}, 'operations': {}}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in args.scenarios:
+            telemetry.buffer.clear()
+            metrics = RUNNERS[name](args, workdir)
+            result['scenarios'][name] = metrics
+            result['operations'][name] = summarize(telemetry.recent())
+            print(f"{name:>12} | " + ' | '.join(f"{key} {value}" for key, value in metrics.items()))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        if regressions:
+            print("Regresiones respecto de la línea base:\n  " + '\n  '.join(regressions))
+            sys.exit(1)
+        print("Sin regresiones respecto de la línea base")
+    return result
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
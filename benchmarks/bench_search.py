@@ -0,0 +1,79 @@
+"""Benchmark de la búsqueda de texto completo (FTS5): consultas y costo del índice al guardar
+
+Uso:
+    python -m benchmarks.bench_search [--sizes 1000 5000] [--repeat 20] [--json salida.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_load_from_db import build_normalized_db
+from destinos import db, search
+from destinos.telemetry import telemetry
+
+QUERIES = [
+    ('Cerro San Cristóbal', None),
+    ('"cerro san cristobal"', 'Qué hacer en'),
+    ('cristo', None),
+    ('DESTINO 00042', None),
+    ('URL_IMG', None),           # Coincide con todos los destinos
+    ('sintética', 'Aeropuerto'),
+]
+
+
+def timed_median(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', help='Archivo donde escribir los resultados')
+    args = parser.parse_args(argv)
+
+    # Las mediciones van solo al buffer en memoria, no a destinos.db
+    telemetry.sink_name = 'none'
+    results = []
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, 'search.db')
+            start = time.perf_counter()
+            build_normalized_db(path, n)
+            build_s = time.perf_counter() - start
+            db.save_destination('DESTINO 00007', {'DESCRIP_QUE_HACER_EN': 'Subir al Cerro San Cristóbal'}, path)
+
+            # Guardar un destino también actualiza el índice (triggers)
+            counter = iter(range(10 ** 9))
+            save_s = timed_median(lambda: db.save_destination(
+                'DESTINO 00001', {'DESCRIP_QUE_HACER_EN': f"Edición {next(counter)}"}, path), args.repeat)
+
+            queries = []
+            for query, section in QUERIES:
+                hits = search.search(query, section, db_path=path)
+                elapsed = timed_median(lambda: search.search(query, section, db_path=path), args.repeat)
+                queries.append({'query': query, 'section': section, 'hits': len(hits), 'ms': round(elapsed * 1000, 2)})
+            db.close_connection(path)
+
+        results.append({'destinations': n, 'build_s': round(build_s, 3), 'save_ms': round(save_s * 1000, 2),
+                        'queries': queries})
+        print(f"{n:>6} destinos | base con índice {build_s:6.2f}s | guardar {save_s * 1000:5.2f} ms | "
+              + ' | '.join(f"{q['query']!r} {q['ms']:.2f} ms ({q['hits']})" for q in queries))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
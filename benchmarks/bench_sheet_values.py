@@ -0,0 +1,96 @@
+"""Benchmark de la conversión DataFrame -> valores de Sheets: iterrows celda por celda vs vectorizada
+
+Mide también la reescritura completa contra la imitación en memoria de Sheets,
+con los bloques que respetan el tamaño máximo de cada pedido.
+
+Uso:
+    python -m benchmarks.bench_sheet_values [--sizes 100 1000 5000] [--json salida.json]
+"""
+import argparse
+import json
+import sys
+import time
+
+import pandas as pd
+
+from benchmarks.bench_load_from_db import synthetic_content
+from destinos.fakes import FakeSheetsService
+from destinos.fields import CONTENT_FIELDS
+from destinos.sheets_sync import chunk_rows, frame_to_values
+
+
+def build_frame(n: int) -> pd.DataFrame:
+    df = pd.DataFrame([synthetic_content(i) for i in range(n)])
+    # Algunas celdas vacías y una columna ausente, como en los datos reales
+    df.loc[df.index % 7 == 0, 'IMG_DATOS_IMPORTANTES'] = None
+    return df.drop(columns=['IMG_2_CUANDO_IR_A'])
+
+
+def values_legacy(df: pd.DataFrame):
+    """Ruta anterior de save_sheet_data: iterrows + pd.isna/str por celda"""
+    df = df.copy()
+    for col in CONTENT_FIELDS:
+        if col not in df.columns:
+            df[col] = ''
+    df = df[CONTENT_FIELDS]
+    values = [CONTENT_FIELDS]
+    for _, row in df.iterrows():
+        row_values = []
+        for col in CONTENT_FIELDS:
+            val = row[col]
+            if pd.isna(val) or val is None:
+                val = ''
+            row_values.append(str(val))
+        values.append(row_values)
+    return values
+
+
+def values_vectorized(df: pd.DataFrame):
+    return [CONTENT_FIELDS] + frame_to_values(df, CONTENT_FIELDS)
+
+
+def write_chunked(values) -> int:
+    service = FakeSheetsService()
+    for offset, block in chunk_rows(values):
+        service.spreadsheets().values().update(
+            spreadsheetId='bench', range=f'Destinos!A{offset + 1}',
+            valueInputOption='RAW', body={'values': block}
+        ).execute()
+    return service.calls.get('update', 0)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--json', help='Archivo donde escribir los resultados')
+    args = parser.parse_args(argv)
+
+    results = []
+    for n in args.sizes:
+        df = build_frame(n)
+        legacy_s, legacy = timed(values_legacy, df)
+        vectorized_s, vectorized = timed(values_vectorized, df)
+        assert legacy == vectorized
+        write_s, requests = timed(write_chunked, vectorized)
+
+        results.append({'destinations': n, 'legacy_s': round(legacy_s, 4),
+                        'vectorized_s': round(vectorized_s, 4),
+                        'speedup': round(legacy_s / vectorized_s, 1) if vectorized_s else None,
+                        'write_s': round(write_s, 4), 'write_requests': requests})
+        print(f"{n:>6} destinos | iterrows {legacy_s:8.3f}s | vectorizada {vectorized_s:8.3f}s | "
+              f"x{results[-1]['speedup']} | escritura {write_s:6.3f}s en {requests} pedidos")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,123 @@
+"""Benchmark de arranque en frío: importación de app.py y tiempo hasta el primer dibujo
+
+Cada medición corre en un proceso nuevo, en un directorio temporal con una base
+sintética, sin credentials.json ni OPENAI_API_KEY: así se mide lo que la página
+hace antes de tocar Google u OpenAI.
+
+- Importación: ``python -X importtime -c "import app"``; se reportan el total y los
+  módulos más pesados, y si se cargaron openai, googleapiclient o google_auth_oauthlib.
+- Primer dibujo: primera ejecución completa del script con ``streamlit.testing.v1.AppTest``
+  y una segunda ejecución (rerun) en el mismo proceso.
+
+Uso:
+    python -m benchmarks.bench_startup [--destinations 500] [--repeat 3] [--json salida.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.bench_load_from_db import build_normalized_db
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('openai', 'googleapiclient', 'google_auth_oauthlib', 'pandas')
+
+RENDER_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({app!r}, default_timeout=120)
+app.run()
+first = time.perf_counter() - start
+start = time.perf_counter()
+app.run()
+rerun = time.perf_counter() - start
+print(json.dumps({{
+    "first_render_s": first,
+    "rerun_s": rerun,
+    "errors": [e.value for e in app.exception] + [e.value for e in app.error],
+    "locations": len(app.selectbox[0].options) if app.selectbox else 0,
+    "loaded": sorted({{m.split(".")[0] for m in sys.modules}} & set({heavy!r})),
+}}))
+'''
+
+
+def clean_env() -> dict:
+    env = dict(os.environ)
+    for name in ('OPENAI_API_KEY', 'GOOGLE_DRIVE_FILE_ID'):
+        env.pop(name, None)
+    env['PYTHONPATH'] = ROOT + os.pathsep + env.get('PYTHONPATH', '')
+    return env
+
+
+def measure_import(workdir: str) -> dict:
+    """Costo de ``import app`` según -X importtime (microsegundos acumulados por módulo)"""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                          cwd=workdir, env=clean_env(), capture_output=True, text=True)
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace('import time:', '|').split('|'))
+        modules[name.strip()] = int(cumulative_us)
+    top_level = {name: us for name, us in modules.items() if '.' not in name}
+    return {
+        'import_app_s': modules.get('app', 0) / 1e6,
+        'heaviest': sorted(((name, us / 1e6) for name, us in top_level.items() if name != 'app'),
+                           key=lambda item: -item[1])[:8],
+        'loaded': sorted(name for name in HEAVY_MODULES if name in modules),
+    }
+
+
+def measure_render(workdir: str) -> dict:
+    script = RENDER_SCRIPT.format(app=os.path.join(ROOT, 'app.py'), heavy=HEAVY_MODULES)
+    proc = subprocess.run([sys.executable, '-c', script], cwd=workdir, env=clean_env(),
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'AppTest falló')
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--destinations', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help='Archivo donde escribir los resultados')
+    args = parser.parse_args(argv)
+
+    imports, renders = [], []
+    with tempfile.TemporaryDirectory() as workdir:
+        build_normalized_db(os.path.join(workdir, 'destinos.db'), args.destinations)
+        for _ in range(args.repeat):
+            imports.append(measure_import(workdir))
+            renders.append(measure_render(workdir))
+
+    result = {
+        'destinations': args.destinations,
+        'import_app_s': round(statistics.median(r['import_app_s'] for r in imports), 4),
+        'first_render_s': round(statistics.median(r['first_render_s'] for r in renders), 4),
+        'rerun_s': round(statistics.median(r['rerun_s'] for r in renders), 4),
+        'heaviest_imports': [[name, round(s, 4)] for name, s in imports[-1]['heaviest']],
+        'loaded_on_import': imports[-1]['loaded'],
+        'loaded_after_render': renders[-1]['loaded'],
+        'rendered_locations': renders[-1]['locations'],
+        'errors': renders[-1]['errors'],
+    }
+    print(f"import app: {result['import_app_s']:.3f}s | primer dibujo: {result['first_render_s']:.3f}s | "
+          f"rerun: {result['rerun_s']:.3f}s | {result['rendered_locations']} destinos en el selector")
+    print("Módulos más pesados al importar: "
+          + ', '.join(f"{name} {s:.3f}s" for name, s in result['heaviest_imports']))
+    print(f"Cargados al importar: {', '.join(result['loaded_on_import']) or 'ninguno'} | "
+          f"después del primer dibujo: {', '.join(result['loaded_after_render']) or 'ninguno'}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+    return result
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
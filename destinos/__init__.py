@@ -0,0 +1 @@
+"""Lógica de negocio de Destinos AI, independiente de la interfaz de Streamlit"""
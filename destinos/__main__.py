@@ -0,0 +1,155 @@
+"""Línea de comandos de Destinos AI (sin Streamlit)
+
+Uso:
+    python -m destinos generate --from ciudades.txt [--concurrency 8] [--bulk] [--force] [--db destinos.db]
+    python -m destinos import destinos.xlsx [--db destinos.db] [--no-sheets]
+    python -m destinos export destinos.csv [--db destinos.db]
+    python -m destinos checkpoint [--keep-days 90] [--db destinos.db]
+"""
+import argparse
+import sys
+import time
+
+from destinos import config, db, pipeline, revisions, sheets_queue, transfer
+from destinos.db import DB_PATH
+from destinos.telemetry import telemetry
+
+
+def read_locations(args) -> list:
+    locations = list(args.locations)
+    if args.source:
+        if args.source == '-':
+            locations.extend(sys.stdin.read().splitlines())
+        else:
+            with open(args.source, encoding='utf-8-sig') as f:
+                locations.extend(f.read().splitlines())
+    return [location.strip() for location in locations if location.strip()]
+
+
+def cmd_generate(args) -> int:
+    requested = read_locations(args)
+    locations = pipeline.new_locations(requested, args.db)
+    skipped = len(requested) - len(locations)
+    if skipped:
+        print(f"{skipped} destinos omitidos (repetidos o ya existentes en {args.db})")
+    if not locations:
+        print("No hay destinos nuevos para generar")
+        return 0
+
+    client = config.build_openai_client()
+    results = pipeline.generate_and_save(
+        client, locations, args.db,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        cache=config.build_response_cache(args.db),
+        force=args.force,
+        bulk=args.bulk,
+        group_size=config.GENERATION_GROUP_SIZE,
+        enqueue_sheets=not args.no_sheets
+    )
+
+    start = time.perf_counter()
+    failed = []
+    for done, result in enumerate(results, start=1):
+        if result.ok:
+            print(f"[{done}/{len(locations)}] OK    {result.location} ({result.elapsed:.1f}s)", flush=True)
+        else:
+            failed.append(result.location)
+            print(f"[{done}/{len(locations)}] ERROR {result.location}: {result.error}", flush=True)
+
+    elapsed = time.perf_counter() - start
+    revisions.maybe_checkpoint(args.db)
+    print(f"{len(locations) - len(failed)} destinos generados y guardados en {args.db} en {elapsed:.1f}s"
+          + (f"; {len(failed)} con error: {', '.join(failed)}" if failed else ''))
+    return 1 if failed else 0
+
+
+def cmd_import(args) -> int:
+    result = transfer.import_file(args.file, args.format, args.db, args.batch_size)
+    if not args.no_sheets:
+        # Quedan en la cola de Sheets; la aplicación los envía al iniciar
+        sheets_queue.enqueue(result.locations, args.db)
+    # Una importación grande escribe muchas revisiones; comprimirlas enseguida
+    revisions.maybe_checkpoint(args.db)
+    print(f"{result.rows} destinos importados ({len(result.fields) + 1} columnas)"
+          + (f", {result.skipped} filas sin LOCATION" if result.skipped else ''))
+    if result.unmapped:
+        print(f"Columnas ignoradas: {', '.join(result.unmapped)}")
+    return 0
+
+
+def cmd_export(args) -> int:
+    count = transfer.export_file(args.file, args.format, args.db, args.batch_size)
+    print(f"{count} destinos exportados a {args.file}")
+    return 0
+
+
+def cmd_checkpoint(args) -> int:
+    # Crea las tablas si la base es nueva (o migra una antigua) antes de leer el historial
+    db.init_db(args.db)
+    before = revisions.stats(args.db)
+    result = revisions.checkpoint(args.db, keep_days=args.keep_days, max_chain=args.max_chain)
+    after = revisions.stats(args.db)
+    print(f"Historial: {before['revisions']} -> {after['revisions']} revisiones, "
+          f"{before['bytes'] / 1024:.0f} -> {after['bytes'] / 1024:.0f} KB "
+          f"({result.compressed} comprimidas, {result.snapshots} snapshots, {result.folded} resumidas)")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m destinos', description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default=DB_PATH, help='Base de datos SQLite (por defecto destinos.db)')
+    # --db también se acepta después del subcomando; SUPPRESS evita pisar el valor dado antes
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--db', default=argparse.SUPPRESS, help='Base de datos SQLite (por defecto destinos.db)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    # Los valores por defecto vienen de .env, igual que en la aplicación
+    generator = commands.add_parser('generate', parents=[common], help='Generar contenido con OpenAI y guardarlo en la base')
+    generator.add_argument('locations', nargs='*', help='Destinos a generar')
+    generator.add_argument('--from', dest='source', help='Archivo con un destino por línea ("-" para stdin)')
+    generator.add_argument('--concurrency', type=int, default=config.GENERATION_CONCURRENCY,
+                           help='Llamadas simultáneas a OpenAI')
+    generator.add_argument('--timeout', type=float, default=config.GENERATION_TIMEOUT,
+                           help='Timeout por destino en segundos, incluidas la espera del presupuesto y los reintentos')
+    generator.add_argument('--bulk', action='store_true', help='Pedir varios destinos por llamada')
+    generator.add_argument('--force', action='store_true', help='Ignorar las respuestas guardadas en caché')
+    generator.add_argument('--no-sheets', action='store_true', help='No encolar los destinos para Google Sheets')
+    generator.set_defaults(handler=cmd_generate)
+
+    importer = commands.add_parser('import', parents=[common], help='Importar destinos desde un CSV o .xlsx')
+    importer.add_argument('file')
+    importer.add_argument('--format', choices=transfer.FORMATS, help='Por defecto, según la extensión')
+    importer.add_argument('--batch-size', type=int, default=transfer.DEFAULT_BATCH_SIZE)
+    importer.add_argument('--no-sheets', action='store_true', help='No encolar los destinos para Google Sheets')
+    importer.set_defaults(handler=cmd_import)
+
+    exporter = commands.add_parser('export', parents=[common], help='Exportar todos los destinos a un CSV o .xlsx')
+    exporter.add_argument('file')
+    exporter.add_argument('--format', choices=transfer.FORMATS, help='Por defecto, según la extensión')
+    exporter.add_argument('--batch-size', type=int, default=transfer.DEFAULT_BATCH_SIZE)
+    exporter.set_defaults(handler=cmd_export)
+
+    checkpointer = commands.add_parser('checkpoint', parents=[common], help='Comprimir y resumir el historial de revisiones')
+    checkpointer.add_argument('--keep-days', type=float, default=revisions.KEEP_DAYS,
+                              help='Días de historial completo; lo anterior queda en una revisión por destino')
+    checkpointer.add_argument('--max-chain', type=int, default=revisions.MAX_CHAIN,
+                              help='Deltas seguidos antes de guardar un snapshot')
+    checkpointer.set_defaults(handler=cmd_checkpoint)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    config.configure_logging()
+    # Las mediciones van a la misma base que el subcomando
+    telemetry.bind(args.db)
+    try:
+        return args.handler(args)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
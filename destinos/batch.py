@@ -0,0 +1,83 @@
+"""Motor de generación por lotes con un pool de hilos acotado"""
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Función que genera el contenido de un destino: (location, timeout) -> dict
+GenerateFn = Callable[[str, Optional[float]], Dict[str, str]]
+
+# Función que genera varios destinos en una llamada: (locations, timeout) -> (contenidos, fallidos)
+GenerateGroupFn = Callable[[List[str], Optional[float]], Tuple[Dict[str, Dict[str, str]], List[str]]]
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TIMEOUT = 90.0
+
+
+@dataclass
+class BatchResult:
+    """Resultado de generar un destino dentro de un lote"""
+    location: str
+    content: Optional[Dict[str, str]] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.content is not None
+
+
+class BatchGenerator:
+    """Genera varios destinos en paralelo y entrega los resultados a medida que terminan"""
+
+    def __init__(self, generate: GenerateFn, concurrency: int = DEFAULT_CONCURRENCY,
+                 timeout: Optional[float] = DEFAULT_TIMEOUT,
+                 generate_group: Optional[GenerateGroupFn] = None, group_size: int = 1):
+        self.generate = generate
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = timeout
+        # Si hay generate_group, los destinos se piden de a group_size por llamada
+        self.generate_group = generate_group
+        self.group_size = max(1, int(group_size)) if generate_group else 1
+
+    def _run_one(self, location: str) -> BatchResult:
+        start = time.perf_counter()
+        try:
+            content = self.generate(location, self.timeout)
+            if not content:
+                return BatchResult(location, error="Respuesta vacía",
+                                   elapsed=time.perf_counter() - start)
+            return BatchResult(location, content=content, elapsed=time.perf_counter() - start)
+        except Exception as e:
+            return BatchResult(location, error=str(e), elapsed=time.perf_counter() - start)
+
+    def _run_group(self, locations: List[str]) -> List[BatchResult]:
+        """Generar un grupo en una llamada; los destinos que fallen se piden de a uno"""
+        if len(locations) == 1:
+            return [self._run_one(locations[0])]
+
+        start = time.perf_counter()
+        try:
+            contents, failed = self.generate_group(locations, self.timeout)
+        except Exception:
+            contents, failed = {}, list(locations)
+        elapsed = time.perf_counter() - start
+
+        results = [BatchResult(location, content=contents[location], elapsed=elapsed)
+                   for location in locations if location in contents]
+        results.extend(self._run_one(location) for location in failed)
+        return results
+
+    def run(self, locations: Iterable[str]) -> Iterator[BatchResult]:
+        """Generar los destinos y devolver cada resultado en orden de finalización"""
+        # Eliminar duplicados manteniendo el orden original
+        pending: List[str] = list(dict.fromkeys(locations))
+        if not pending:
+            return
+
+        groups = [pending[i:i + self.group_size] for i in range(0, len(pending), self.group_size)]
+        workers = min(self.concurrency, len(groups))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="generar") as executor:
+            futures = [executor.submit(self._run_group, group) for group in groups]
+            for future in as_completed(futures):
+                yield from future.result()
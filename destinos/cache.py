@@ -0,0 +1,90 @@
+"""Caché persistente de respuestas de OpenAI, direccionada por contenido"""
+import hashlib
+import json
+import time
+from typing import Any, Dict, Optional
+
+from destinos.db import DB_PATH, run_once, transaction
+
+DEFAULT_TTL = 30 * 24 * 3600  # 30 días
+DEFAULT_MAX_ENTRIES = 500
+
+
+def cache_key(**params: Any) -> str:
+    """Hash estable de los parámetros que determinan la respuesta"""
+    payload = json.dumps(params, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _create_tables(conn):
+    with conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS generation_cache (
+                key TEXT PRIMARY KEY,
+                params TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_generation_cache_accessed '
+                     'ON generation_cache (last_accessed)')
+
+
+class ResponseCache:
+    """Respuestas guardadas en SQLite con expiración (TTL) y desalojo LRU por tamaño"""
+
+    def __init__(self, db_path: str = DB_PATH, ttl: float = DEFAULT_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        run_once(self.db_path, 'generation_cache', _create_tables)
+
+    def get(self, key: str) -> Optional[str]:
+        """Respuesta guardada para la clave, o None si no existe o expiró"""
+        now = time.time()
+        with transaction(self.db_path) as conn:
+            row = conn.execute('SELECT response, created_at FROM generation_cache WHERE key = ?',
+                               (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if self.ttl and now - row[1] > self.ttl:
+                conn.execute('DELETE FROM generation_cache WHERE key = ?', (key,))
+                self.misses += 1
+                return None
+            conn.execute('UPDATE generation_cache SET last_accessed = ? WHERE key = ?', (now, key))
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, response: str, params: Optional[Dict[str, Any]] = None):
+        """Guardar una respuesta y desalojar las menos usadas si se supera el tamaño máximo"""
+        now = time.time()
+        with transaction(self.db_path) as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO generation_cache (key, params, response, created_at, last_accessed)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (key, json.dumps(params or {}, ensure_ascii=False), response, now, now))
+            if self.ttl:
+                conn.execute('DELETE FROM generation_cache WHERE created_at < ?', (now - self.ttl,))
+            conn.execute('''
+                DELETE FROM generation_cache WHERE key IN (
+                    SELECT key FROM generation_cache
+                    ORDER BY last_accessed DESC LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_entries,))
+
+    def invalidate(self, key: str):
+        with transaction(self.db_path) as conn:
+            conn.execute('DELETE FROM generation_cache WHERE key = ?', (key,))
+
+    def clear(self):
+        with transaction(self.db_path) as conn:
+            conn.execute('DELETE FROM generation_cache')
+
+    def __len__(self) -> int:
+        with transaction(self.db_path) as conn:
+            return conn.execute('SELECT COUNT(*) FROM generation_cache').fetchone()[0]
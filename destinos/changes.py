@@ -0,0 +1,25 @@
+"""Seguimiento de cambios: solo los campos modificados llegan a la base de datos y a Sheets"""
+from typing import Any, Dict, Mapping
+
+
+def normalize(value: Any) -> str:
+    """Valor comparable: None/NaN como cadena vacía y todo lo demás como texto"""
+    if value is None or isinstance(value, str):
+        return value or ''
+    # NaN (y pd.NA/NaT) no son iguales a sí mismos; se evita importar pandas solo para esto
+    try:
+        if value != value:
+            return ''
+    except TypeError:
+        return ''  # pd.NA no se puede evaluar como booleano
+    return str(value)
+
+
+def diff_fields(original: Mapping[str, Any], edited: Mapping[str, Any]) -> Dict[str, str]:
+    """Campos de ``edited`` cuyo valor difiere del contenido cargado"""
+    changes = {}
+    for field, value in edited.items():
+        value = normalize(value)
+        if normalize(original.get(field)) != value:
+            changes[field] = value
+    return changes
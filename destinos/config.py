@@ -0,0 +1,75 @@
+"""Configuración desde variables de entorno (.env), compartida por la aplicación y la línea de comandos
+
+Los clientes externos se construyen con funciones, no al importar el módulo, para
+que ni la aplicación ni la línea de comandos paguen su costo antes de usarlos.
+"""
+import logging
+import os
+
+from dotenv import load_dotenv
+
+# Antes de importar el resto: algunos módulos leen su configuración al importarse
+load_dotenv()
+
+from destinos.batch import DEFAULT_CONCURRENCY, DEFAULT_TIMEOUT
+from destinos.cache import ResponseCache
+from destinos.db import DB_PATH
+from destinos.generation import BULK_GROUP_SIZE
+from destinos.scheduler import RetryPolicy, ScheduledClient
+
+# Generación por lotes: llamadas simultáneas a OpenAI y timeout por destino, reintentos incluidos (segundos)
+GENERATION_CONCURRENCY = int(os.getenv('GENERATION_CONCURRENCY', str(DEFAULT_CONCURRENCY)))
+GENERATION_TIMEOUT = float(os.getenv('GENERATION_TIMEOUT', str(DEFAULT_TIMEOUT)))
+# Destinos por llamada en el modo por lotes
+GENERATION_GROUP_SIZE = int(os.getenv('GENERATION_GROUP_SIZE', str(BULK_GROUP_SIZE)))
+
+# Caché de respuestas de OpenAI en destinos.db (expiración en días y máximo de entradas)
+GENERATION_CACHE_TTL = float(os.getenv('GENERATION_CACHE_TTL_DAYS', '30')) * 24 * 3600
+GENERATION_CACHE_MAX_ENTRIES = int(os.getenv('GENERATION_CACHE_MAX_ENTRIES', '500'))
+
+# Presupuesto por minuto y reintentos de las llamadas a OpenAI
+OPENAI_REQUESTS_PER_MINUTE = float(os.getenv('OPENAI_REQUESTS_PER_MINUTE', '200'))
+OPENAI_TOKENS_PER_MINUTE = float(os.getenv('OPENAI_TOKENS_PER_MINUTE', '40000'))
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', '5'))
+
+# Envío diferido a Sheets: segundos sin cambios antes de enviar y espera máxima
+SHEETS_FLUSH_DEBOUNCE = float(os.getenv('SHEETS_FLUSH_DEBOUNCE', '5'))
+SHEETS_FLUSH_MAX_DELAY = float(os.getenv('SHEETS_FLUSH_MAX_DELAY', '30'))
+
+
+# Nivel de los mensajes de diagnóstico (DEBUG, INFO, WARNING...); desactivados por defecto
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'WARNING').upper()
+
+
+def configure_logging():
+    """Mensajes de ``destinos`` a stderr con el nivel de LOG_LEVEL"""
+    logger = logging.getLogger('destinos')
+    logger.setLevel(LOG_LEVEL)
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+        logger.addHandler(handler)
+        logger.propagate = False
+
+
+def openai_api_key() -> str:
+    return os.getenv('OPENAI_API_KEY') or ''
+
+
+def build_openai_client() -> ScheduledClient:
+    """Cliente de OpenAI envuelto en el planificador (los reintentos los maneja el planificador)"""
+    api_key = openai_api_key()
+    if not api_key:
+        raise RuntimeError("No se encontró la clave API de OpenAI. Por favor, verifica tu archivo .env")
+    from openai import OpenAI
+
+    return ScheduledClient(
+        OpenAI(api_key=api_key, max_retries=0),
+        requests_per_minute=OPENAI_REQUESTS_PER_MINUTE,
+        tokens_per_minute=OPENAI_TOKENS_PER_MINUTE,
+        policy=RetryPolicy(max_retries=OPENAI_MAX_RETRIES)
+    )
+
+
+def build_response_cache(db_path: str = DB_PATH) -> ResponseCache:
+    return ResponseCache(db_path, ttl=GENERATION_CACHE_TTL, max_entries=GENERATION_CACHE_MAX_ENTRIES)
@@ -0,0 +1,396 @@
+"""Capa de acceso a SQLite: conexiones por hilo, esquema de destinos y consultas
+
+La tabla destinos tiene una columna tipada por cada campo de contenido.
+"""
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from destinos.changes import normalize
+from destinos.fields import CONTENT_FIELDS
+from destinos.telemetry import span
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DB_PATH = 'destinos.db'
+
+# Pragmas aplicados a cada conexión nueva. WAL permite que varios editores lean
+# mientras otro escribe; busy_timeout espera al bloqueo en vez de fallar de inmediato.
+CONNECTION_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=5000',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-16000',
+]
+
+# Conexiones libres de hilos que ya terminaron. Streamlit ejecuta cada rerun en un
+# hilo nuevo: el siguiente hilo reutiliza una de estas conexiones (con sus pragmas y
+# sentencias preparadas) en vez de abrir otra.
+POOL_SIZE = 8
+
+_local = threading.local()
+_pool: Dict[str, List[sqlite3.Connection]] = {}
+_pool_lock = threading.Lock()
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+class _ThreadConnections(dict):
+    """Conexiones del hilo actual por base; al terminar el hilo vuelven al pool"""
+
+    def __del__(self):
+        for db_path, conn in self.items():
+            _release(db_path, conn)
+
+
+def _release(db_path: str, conn: sqlite3.Connection):
+    try:
+        if conn.in_transaction:
+            conn.rollback()
+        with _pool_lock:
+            idle = _pool.setdefault(db_path, [])
+            if len(idle) < POOL_SIZE:
+                idle.append(conn)
+                return
+        conn.close()
+    except Exception:
+        pass  # Al cerrar el intérprete el módulo puede ya no existir
+
+
+def get_connection(db_path: str = DB_PATH) -> sqlite3.Connection:
+    """Conexión de larga duración del hilo actual para la base indicada
+
+    Cada conexión guarda en caché sus sentencias preparadas, por lo que las
+    consultas repetidas no se vuelven a compilar. La conexión pertenece al hilo
+    mientras vive; luego pasa al pool para el próximo hilo que la pida.
+    """
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = _ThreadConnections()
+    conn = connections.get(db_path)
+    if conn is None:
+        with _pool_lock:
+            idle = _pool.get(db_path)
+            conn = idle.pop() if idle else None
+        if conn is None:
+            # Un hilo a la vez: pasa de un hilo a otro solo a través del pool
+            conn = sqlite3.connect(db_path, timeout=30, cached_statements=256, check_same_thread=False)
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+        connections[db_path] = conn
+    return conn
+
+
+def close_connection(db_path: str = DB_PATH):
+    """Cerrar las conexiones a la base (por ejemplo, antes de reemplazar el archivo)
+
+    Cierra la del hilo actual y las libres del pool; las de otros hilos activos siguen abiertas.
+    """
+    connections = getattr(_local, 'connections', {})
+    conn = connections.pop(db_path, None)
+    if conn is not None:
+        conn.close()
+    with _pool_lock:
+        idle = _pool.pop(db_path, [])
+    for conn in idle:
+        conn.close()
+
+
+@contextmanager
+def transaction(db_path: str = DB_PATH) -> Iterator[sqlite3.Connection]:
+    """Conexión del hilo dentro de una transacción: commit al salir, rollback si hay error
+
+    Las revisiones que escribió quedan con un mismo número de operación (ver destinos.revisions).
+    """
+    conn = get_connection(db_path)
+    with conn:
+        changes = conn.total_changes
+        yield conn
+        if conn.total_changes != changes and (db_path, 'destinos') in _initialized:
+            from destinos.revisions import mark_operation  # revisions importa este módulo
+            mark_operation(conn)
+
+
+def run_once(db_path: str, key: str, setup: Callable[[sqlite3.Connection], Any]) -> Any:
+    """Ejecutar ``setup`` (creación de tablas, migraciones) una sola vez por proceso y base"""
+    marker = (db_path, key)
+    if marker in _initialized:
+        return None
+    with _init_lock:
+        if marker in _initialized:
+            return None
+        result = setup(get_connection(db_path))
+        _initialized.add(marker)
+        return result
+
+# LOCATION se guarda en la clave primaria `location`; el resto, una columna por campo
+DATA_FIELDS = [field for field in CONTENT_FIELDS if field != 'LOCATION']
+
+
+def quote(name: str) -> str:
+    """Identificador SQL entre comillas (algunos campos tienen espacios)"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+CREATE_TABLE_SQL = (
+    'CREATE TABLE IF NOT EXISTS destinos (\n'
+    '    location TEXT PRIMARY KEY,\n'
+    + ''.join(f"    {quote(field)} TEXT NOT NULL DEFAULT '',\n" for field in DATA_FIELDS)
+    + '    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP\n'
+    ')'
+)
+
+CREATE_INDEXES_SQL = [
+    'CREATE INDEX IF NOT EXISTS idx_destinos_location_nocase ON destinos (location COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS idx_destinos_last_updated ON destinos (last_updated)',
+]
+
+# Índice de búsqueda de texto completo: una columna por campo, en el orden de CONTENT_FIELDS.
+# Sin distinguir mayúsculas ni tildes ('cristobal' encuentra 'Cristóbal').
+SEARCH_COLUMNS = ['location'] + [field.lower().replace(' ', '_') for field in DATA_FIELDS]
+_SEARCH_VALUES = ', '.join(['new.location'] + [f'new.{quote(field)}' for field in DATA_FIELDS])
+
+CREATE_SEARCH_SQL = [
+    # search_docs fija el rowid de cada destino en el índice (VACUUM puede renumerar los de destinos)
+    'CREATE TABLE IF NOT EXISTS search_docs (id INTEGER PRIMARY KEY, location TEXT NOT NULL UNIQUE)',
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS destinos_fts USING fts5({', '.join(SEARCH_COLUMNS)}, "
+    "tokenize = 'unicode61 remove_diacritics 2')",
+    f'''CREATE TRIGGER IF NOT EXISTS destinos_search_insert AFTER INSERT ON destinos BEGIN
+        INSERT OR IGNORE INTO search_docs (location) VALUES (new.location);
+        INSERT INTO destinos_fts (rowid, {', '.join(SEARCH_COLUMNS)})
+            SELECT id, {_SEARCH_VALUES} FROM search_docs WHERE location = new.location;
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS destinos_search_update AFTER UPDATE ON destinos BEGIN
+        DELETE FROM destinos_fts WHERE rowid = (SELECT id FROM search_docs WHERE location = old.location);
+        UPDATE search_docs SET location = new.location WHERE location = old.location;
+        INSERT INTO destinos_fts (rowid, {', '.join(SEARCH_COLUMNS)})
+            SELECT id, {_SEARCH_VALUES} FROM search_docs WHERE location = new.location;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS destinos_search_delete AFTER DELETE ON destinos BEGIN
+        DELETE FROM destinos_fts WHERE rowid = (SELECT id FROM search_docs WHERE location = old.location);
+        DELETE FROM search_docs WHERE location = old.location;
+    END''',
+]
+
+# Consulta de carga: las columnas salen con los nombres y el orden de CONTENT_FIELDS
+SELECT_COLUMNS = 'location AS "LOCATION", ' + ', '.join(quote(field) for field in DATA_FIELDS)
+SELECT_SQL = f'SELECT {SELECT_COLUMNS} FROM destinos'
+
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def load_frame(conn: sqlite3.Connection) -> 'pd.DataFrame':
+    """Todos los destinos en un único DataFrame construido en una sola pasada"""
+    import pandas as pd
+
+    rows = conn.execute(SELECT_SQL).fetchall()
+    return pd.DataFrame.from_records(rows, columns=CONTENT_FIELDS)
+
+
+def iter_frames(conn: sqlite3.Connection, chunk_size: Optional[int] = DEFAULT_CHUNK_SIZE) -> Iterator['pd.DataFrame']:
+    """Destinos en bloques de ``chunk_size`` filas, para catálogos que no conviene cargar de una vez"""
+    import pandas as pd
+
+    cursor = conn.execute(SELECT_SQL + ' ORDER BY location')
+    while True:
+        rows = cursor.fetchmany(chunk_size or DEFAULT_CHUNK_SIZE)
+        if not rows:
+            break
+        yield pd.DataFrame.from_records(rows, columns=CONTENT_FIELDS)
+
+
+def table_columns(conn: sqlite3.Connection, table: str = 'destinos') -> List[str]:
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({quote(table)})')]
+
+
+def ensure_schema(conn: sqlite3.Connection) -> Tuple[int, int]:
+    """Crear o migrar la tabla destinos; retorna (filas migradas, filas con JSON inválido)"""
+    columns = table_columns(conn)
+    if 'content' in columns:
+        return migrate_json_blobs(conn)
+
+    conn.execute(CREATE_TABLE_SQL)
+    # Agregar columnas de campos nuevos si la tabla es de una versión anterior
+    existing = {col.lower() for col in table_columns(conn)}
+    for field in DATA_FIELDS:
+        if field.lower() not in existing:
+            conn.execute(f"ALTER TABLE destinos ADD COLUMN {quote(field)} TEXT NOT NULL DEFAULT ''")
+    for sql in CREATE_INDEXES_SQL:
+        conn.execute(sql)
+    conn.commit()
+    ensure_search_index(conn)
+    ensure_history(conn)
+    return 0, 0
+
+
+def ensure_search_index(conn: sqlite3.Connection) -> bool:
+    """Crear el índice FTS5 y los triggers que lo mantienen; False si SQLite no incluye FTS5
+
+    La primera vez (o si cambiaron los campos) el índice se llena con los destinos existentes.
+    """
+    current = table_columns(conn, 'destinos_fts')
+    try:
+        with conn:
+            if current and current != SEARCH_COLUMNS:
+                conn.execute('DROP TABLE destinos_fts')
+                for name in ('insert', 'update', 'delete'):
+                    conn.execute(f'DROP TRIGGER IF EXISTS destinos_search_{name}')
+                conn.execute('DROP TABLE IF EXISTS search_docs')
+            for sql in CREATE_SEARCH_SQL:
+                conn.execute(sql)
+            if current != SEARCH_COLUMNS:
+                conn.execute('INSERT OR IGNORE INTO search_docs (location) SELECT location FROM destinos')
+                conn.execute(
+                    f"INSERT INTO destinos_fts (rowid, {', '.join(SEARCH_COLUMNS)}) "
+                    f"SELECT s.id, d.location, {', '.join('d.' + quote(field) for field in DATA_FIELDS)} "
+                    'FROM destinos d JOIN search_docs s ON s.location = d.location'
+                )
+                # Una coincidencia en el nombre del destino pesa más que en el resto del contenido
+                conn.execute("INSERT INTO destinos_fts (destinos_fts, rank) VALUES ('rank', 'bm25(5.0)')")
+    except sqlite3.OperationalError as e:
+        if 'fts5' in str(e):
+            return False
+        raise
+    return True
+
+
+def ensure_history(conn: sqlite3.Connection):
+    """Tabla de revisiones y triggers que registran cada cambio (ver destinos.revisions)"""
+    from destinos.revisions import ensure_revisions  # revisions importa este módulo
+    ensure_revisions(conn)
+
+
+def migrate_json_blobs(conn: sqlite3.Connection) -> Tuple[int, int]:
+    """Pasar la tabla antigua (un JSON por destino en `content`) al esquema normalizado
+
+    Si algún JSON no se puede decodificar o no es un objeto, el destino queda vacío y la
+    tabla antigua se conserva como ``destinos_json_legacy`` para no perder datos.
+    """
+    conn.execute('BEGIN')
+    try:
+        conn.execute('ALTER TABLE destinos RENAME TO destinos_json_legacy')
+        conn.execute(CREATE_TABLE_SQL)
+        rows = conn.execute('SELECT location, content, last_updated FROM destinos_json_legacy').fetchall()
+
+        migrated, failed = [], 0
+        for location, content, last_updated in rows:
+            try:
+                data = json.loads(content) if content else {}
+            except (TypeError, ValueError):
+                data = None
+            if not isinstance(data, dict):
+                failed += 1
+                data = {}
+            migrated.append(row_params(location, data) + [last_updated])
+
+        placeholders = ', '.join('?' for _ in range(len(DATA_FIELDS) + 2))
+        conn.executemany(
+            'INSERT OR REPLACE INTO destinos (location, '
+            + ', '.join(quote(field) for field in DATA_FIELDS)
+            + f', last_updated) VALUES ({placeholders})',
+            migrated
+        )
+        if not failed:
+            conn.execute('DROP TABLE destinos_json_legacy')
+        for sql in CREATE_INDEXES_SQL:
+            conn.execute(sql)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    ensure_search_index(conn)
+    ensure_history(conn)
+    return len(migrated), failed
+
+
+def field_value(value: Any) -> str:
+    return normalize(value)
+
+
+def row_params(location: str, content: Dict[str, Any]) -> List[str]:
+    """Valores de una fila completa en el orden de DATA_FIELDS, precedidos por location"""
+    return [location] + [field_value(content.get(field)) for field in DATA_FIELDS]
+
+
+def upsert_sql(fields: Iterable[str]) -> str:
+    """INSERT que, si el destino existe, actualiza solo los campos indicados"""
+    fields = list(fields)
+    columns = ', '.join(['location'] + [quote(field) for field in fields])
+    placeholders = ', '.join('?' for _ in range(len(fields) + 1))
+    updates = ', '.join([f'{quote(field)} = excluded.{quote(field)}' for field in fields]
+                        + ['last_updated = CURRENT_TIMESTAMP'])
+    return (f'INSERT INTO destinos ({columns}, last_updated) VALUES ({placeholders}, CURRENT_TIMESTAMP) '
+            f'ON CONFLICT(location) DO UPDATE SET {updates}')
+
+
+def content_fields(content: Dict[str, Any]) -> List[str]:
+    """Campos de contenido presentes en el diccionario, en el orden de DATA_FIELDS"""
+    return [field for field in DATA_FIELDS if field in content]
+
+
+def init_db(db_path: str = DB_PATH) -> Tuple[int, int]:
+    """Crear o migrar el esquema una vez por proceso; retorna (migradas, inválidas)"""
+    return run_once(db_path, 'destinos', ensure_schema) or (0, 0)
+
+
+def destination_exists(location: str, db_path: str = DB_PATH) -> bool:
+    conn = get_connection(db_path)
+    return conn.execute('SELECT 1 FROM destinos WHERE location = ?', (location,)).fetchone() is not None
+
+
+def save_destination(location: str, content: Dict[str, Any], db_path: str = DB_PATH):
+    """Insertar o actualizar un destino; solo se escriben los campos presentes en ``content``"""
+    fields = content_fields(content)
+    with span('sqlite.save_destination', fields=len(fields)), transaction(db_path) as conn:
+        conn.execute(upsert_sql(fields), [location] + [field_value(content[field]) for field in fields])
+
+
+def load_destination(location: str, db_path: str = DB_PATH) -> Optional[Dict[str, str]]:
+    """Contenido de un destino como diccionario con las claves de CONTENT_FIELDS"""
+    with span('sqlite.load_destination'):
+        row = get_connection(db_path).execute(SELECT_SQL + ' WHERE location = ?', (location,)).fetchone()
+    return dict(zip(CONTENT_FIELDS, row)) if row else None
+
+
+def load_destinations(db_path: str = DB_PATH) -> 'pd.DataFrame':
+    with span('sqlite.load_destinations') as attrs:
+        df = load_frame(get_connection(db_path))
+        attrs['rows'] = len(df)
+    return df
+
+
+def load_records(db_path: str = DB_PATH) -> List[Dict[str, str]]:
+    """Todos los destinos como diccionarios, sin pasar por pandas (carga inicial de la aplicación)"""
+    with span('sqlite.load_records') as attrs:
+        records = [dict(zip(CONTENT_FIELDS, row)) for row in get_connection(db_path).execute(SELECT_SQL)]
+        attrs['rows'] = len(records)
+    return records
+
+
+def load_versions(locations: Iterable[str], db_path: str = DB_PATH,
+                  chunk_size: int = 500) -> Dict[str, Tuple[Dict[str, str], float]]:
+    """Contenido y ``last_updated`` (segundos desde 1970, UTC) de los destinos indicados"""
+    locations = list(dict.fromkeys(locations))
+    conn = get_connection(db_path)
+    versions = {}
+    with span('sqlite.load_versions', rows=len(locations)):
+        for i in range(0, len(locations), chunk_size):
+            chunk = locations[i:i + chunk_size]
+            rows = conn.execute(
+                f"SELECT {SELECT_COLUMNS}, CAST(strftime('%s', last_updated) AS REAL) FROM destinos "
+                f"WHERE location IN ({', '.join('?' for _ in chunk)})", chunk
+            ).fetchall()
+            for row in rows:
+                versions[row[0]] = (dict(zip(CONTENT_FIELDS, row[:-1])), row[-1] or 0.0)
+    return versions
+
+
+def keep_only(location: str, db_path: str = DB_PATH) -> int:
+    """Eliminar todos los destinos excepto uno; retorna la cantidad de filas eliminadas"""
+    with span('sqlite.keep_only'), transaction(db_path) as conn:
+        return conn.execute('DELETE FROM destinos WHERE location != ?', (location,)).rowcount
@@ -0,0 +1,331 @@
+"""Clientes falsos en proceso para probar sin credenciales reales"""
+import json
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import List, Optional
+
+from destinos.fields import GENERATED_FIELDS
+
+
+def fake_completion_text(location: str) -> str:
+    """Respuesta con el mismo formato de campos que pide el prompt"""
+    lines = []
+    for field in GENERATED_FIELDS:
+        lines.append(f"{field}:")
+        lines.append(f"Texto de prueba para {field} en {location}.")
+        lines.append("")
+    return '\n'.join(lines)
+
+
+class FakeAPIError(Exception):
+    """Error HTTP con la forma de los errores de ``openai`` (status_code y response.headers)"""
+
+    def __init__(self, status_code: int = 429, retry_after: Optional[float] = None):
+        super().__init__(f"Error {status_code} simulado")
+        self.status_code = status_code
+        headers = {'retry-after': str(retry_after)} if retry_after is not None else {}
+        self.response = SimpleNamespace(status_code=status_code, headers=headers)
+
+
+def fake_bulk_completion_text(locations: List[str]) -> str:
+    """Respuesta JSON para el prompt por lotes, con los mismos textos que el modo individual"""
+    from destinos.generation import FIELD_INSTRUCTIONS
+    return json.dumps({
+        location: {field: f"Texto de prueba para {field} en {location}." for field in FIELD_INSTRUCTIONS}
+        for location in locations
+    }, ensure_ascii=False)
+
+
+class _FakeCompletions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, model=None, messages=None, timeout=None, stream=False, **kwargs):
+        owner = self._owner
+        prompt = messages[-1]['content'] if messages else ''
+        owner.maybe_fail()
+        if stream:
+            return self._stream(model, prompt)
+        with owner._lock:
+            owner.calls += 1
+            owner.in_flight += 1
+            owner.max_in_flight = max(owner.max_in_flight, owner.in_flight)
+        try:
+            if owner.latency:
+                time.sleep(owner.latency)
+            message = SimpleNamespace(content=self._text(prompt))
+            usage = SimpleNamespace(prompt_tokens=len(prompt) // 4, completion_tokens=500,
+                                    total_tokens=len(prompt) // 4 + 500)
+            return SimpleNamespace(model=model, choices=[SimpleNamespace(message=message)], usage=usage)
+        finally:
+            with owner._lock:
+                owner.in_flight -= 1
+
+    def _text(self, prompt: str) -> str:
+        bulk_locations = self._owner.locations_from_bulk_prompt(prompt)
+        if bulk_locations:
+            return fake_bulk_completion_text(bulk_locations)
+        return fake_completion_text(self._owner.location_from_prompt(prompt))
+
+    def _stream(self, model, prompt: str):
+        """Respuesta en trozos pequeños, repartiendo la latencia entre ellos"""
+        owner = self._owner
+        with owner._lock:
+            owner.calls += 1
+        text = self._text(prompt)
+        pieces = [text[i:i + owner.chunk_size] for i in range(0, len(text), owner.chunk_size)]
+        delay = owner.latency / max(len(pieces), 1)
+        for piece in pieces:
+            if delay:
+                time.sleep(delay)
+            delta = SimpleNamespace(content=piece)
+            yield SimpleNamespace(model=model, choices=[SimpleNamespace(delta=delta)])
+
+
+class FakeOpenAI:
+    """Imitación mínima de ``openai.OpenAI`` para ``chat.completions.create``"""
+
+    def __init__(self, latency: float = 0.0, chunk_size: int = 16, error_rate: float = 0.0,
+                 fail_first: int = 0, error_status: int = 429, seed: Optional[int] = None):
+        self.latency = latency
+        self.chunk_size = chunk_size
+        # Errores inyectados: las primeras ``fail_first`` llamadas y luego una fracción al azar
+        self.error_rate = error_rate
+        self.fail_first = fail_first
+        self.error_status = error_status
+        self.errors = 0
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=_FakeCompletions(self))
+
+    def maybe_fail(self):
+        with self._lock:
+            fail = self.fail_first > 0 or (self.error_rate and self._random.random() < self.error_rate)
+            if self.fail_first > 0:
+                self.fail_first -= 1
+            if fail:
+                self.errors += 1
+        if fail:
+            raise FakeAPIError(self.error_status)
+
+    @staticmethod
+    def locations_from_bulk_prompt(prompt: str) -> List[str]:
+        if 'objeto JSON' not in prompt:
+            return []
+        header = prompt.split('Para cada destino', 1)[0]
+        return [line[2:].strip() for line in header.splitlines() if line.startswith('- ')]
+
+    @staticmethod
+    def location_from_prompt(prompt: str) -> str:
+        marker = 'atractivo para '
+        if marker in prompt:
+            return prompt.split(marker, 1)[1].split(' que será publicado', 1)[0]
+        return 'DESTINO'
+
+
+def _column_index(letters: str) -> int:
+    index = 0
+    for char in letters:
+        index = index * 26 + (ord(char) - 64)
+    return index
+
+
+def _parse_a1(a1: str):
+    """Separar un rango A1 en (hoja, col_ini, fila_ini, col_fin, fila_fin); None = abierto"""
+    sheet, _, cells = a1.partition('!')
+    sheet = sheet.strip("'")
+    if not cells:
+        return sheet, 1, 1, None, None
+
+    def parse_ref(ref):
+        letters = ''.join(ch for ch in ref if ch.isalpha())
+        digits = ''.join(ch for ch in ref if ch.isdigit())
+        return (_column_index(letters) if letters else None), (int(digits) if digits else None)
+
+    start, _, end = cells.partition(':')
+    col1, row1 = parse_ref(start)
+    if end:
+        col2, row2 = parse_ref(end)
+    else:
+        col2, row2 = None, None
+    return sheet, col1 or 1, row1 or 1, col2, row2
+
+
+class FakeHttpError(Exception):
+    """Error con la forma de ``googleapiclient.errors.HttpError`` (resp.status)"""
+
+    def __init__(self, status: int = 503):
+        super().__init__(f"HttpError {status} simulado")
+        self.resp = SimpleNamespace(status=status, reason='simulado')
+        self.status_code = status
+
+
+class _Request:
+    def __init__(self, owner, fn):
+        self._owner = owner
+        self._fn = fn
+
+    def execute(self):
+        self._owner.before_request()
+        return self._fn()
+
+
+class _FakeValues:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def get(self, spreadsheetId=None, range=None, **kwargs):
+        return _Request(self._owner, lambda: self._owner._get(range))
+
+    def update(self, spreadsheetId=None, range=None, valueInputOption=None, body=None, **kwargs):
+        return _Request(self._owner, lambda: self._owner._write('update', range, body.get('values', [])))
+
+    def clear(self, spreadsheetId=None, range=None, **kwargs):
+        return _Request(self._owner, lambda: self._owner._clear(range))
+
+    def batchUpdate(self, spreadsheetId=None, body=None, **kwargs):
+        def run():
+            self._owner._count('values.batchUpdate')
+            responses = [self._owner._write(None, item['range'], item['values']) for item in body.get('data', [])]
+            return {'totalUpdatedCells': sum(r['updatedCells'] for r in responses), 'responses': responses}
+        return _Request(self._owner, run)
+
+
+class _FakeSpreadsheets:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def values(self):
+        return _FakeValues(self._owner)
+
+    def get(self, spreadsheetId=None, **kwargs):
+        def run():
+            self._owner._count('get')
+            if not spreadsheetId:
+                raise FakeHttpError(404)  # Sin ID configurado la hoja no existe
+            return {'spreadsheetId': spreadsheetId,
+                    'sheets': [{'properties': {'title': title, 'sheetId': i}}
+                               for i, title in enumerate(self._owner.sheets)]}
+        return _Request(self._owner, run)
+
+    def batchUpdate(self, spreadsheetId=None, body=None, **kwargs):
+        def run():
+            self._owner._count('batchUpdate')
+            for request in body.get('requests', []):
+                if 'addSheet' in request:
+                    self._owner.sheets.setdefault(request['addSheet']['properties']['title'], [])
+            return {}
+        return _Request(self._owner, run)
+
+    def create(self, body=None, **kwargs):
+        def run():
+            self._owner._count('create')
+            for sheet in body.get('sheets', []):
+                self._owner.sheets.setdefault(sheet['properties']['title'], [])
+            return {'spreadsheetId': 'fake-spreadsheet'}
+        return _Request(self._owner, run)
+
+
+class FakeSheetsService:
+    """Imitación en memoria del servicio ``sheets v4`` que cuenta las celdas escritas
+
+    ``latency`` (segundos) se aplica a cada ``execute()``; ``error_rate`` hace fallar
+    esa fracción de los pedidos con un error HTTP ``error_status``.
+    """
+
+    def __init__(self, sheets=None, latency: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 503, seed: Optional[int] = None):
+        self.sheets = {name: [list(row) for row in rows] for name, rows in (sheets or {'Destinos': []}).items()}
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.errors = 0
+        self.requests = 0
+        self._random = random.Random(seed)
+        self.cells_written = 0
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def spreadsheets(self):
+        return _FakeSpreadsheets(self)
+
+    def reset_counters(self):
+        self.cells_written = 0
+        self.calls = {}
+        self.requests = 0
+        self.errors = 0
+
+    def before_request(self):
+        """Latencia y errores inyectados, antes de ejecutar cada pedido"""
+        with self._lock:
+            self.requests += 1
+            fail = bool(self.error_rate) and self._random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise FakeHttpError(self.error_status)
+
+    def _count(self, operation: str):
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+
+    def _grid(self, sheet: str):
+        if sheet not in self.sheets:
+            raise KeyError(f"Unable to parse range: {sheet}")
+        return self.sheets[sheet]
+
+    def _get(self, a1: str):
+        self._count('values.get')
+        sheet, col1, row1, col2, row2 = _parse_a1(a1)
+        grid = self._grid(sheet)
+        last_row = len(grid) if row2 is None else min(row2, len(grid))
+        values = []
+        for row in grid[row1 - 1:last_row]:
+            cells = row[col1 - 1:col2]
+            while cells and cells[-1] == '':
+                cells.pop()
+            values.append(cells)
+        while values and not values[-1]:
+            values.pop()
+        result = {'range': a1}
+        if values:
+            result['values'] = values
+        return result
+
+    def _write(self, operation, a1: str, values):
+        if operation:
+            self._count(operation)
+        sheet, col1, row1, _, _ = _parse_a1(a1)
+        grid = self._grid(sheet)
+        cells = 0
+        for offset, row_values in enumerate(values):
+            row_number = row1 + offset
+            while len(grid) < row_number:
+                grid.append([])
+            row = grid[row_number - 1]
+            needed = col1 - 1 + len(row_values)
+            if len(row) < needed:
+                row.extend([''] * (needed - len(row)))
+            row[col1 - 1:col1 - 1 + len(row_values)] = [str(v) for v in row_values]
+            cells += len(row_values)
+        with self._lock:
+            self.cells_written += cells
+        return {'updatedRange': a1, 'updatedCells': cells}
+
+    def _clear(self, a1: str):
+        self._count('values.clear')
+        sheet, col1, row1, col2, row2 = _parse_a1(a1)
+        grid = self._grid(sheet)
+        last_row = len(grid) if row2 is None else min(row2, len(grid))
+        for row in grid[row1 - 1:last_row]:
+            end = len(row) if col2 is None else min(col2, len(row))
+            for i in range(col1 - 1, end):
+                row[i] = ''
+        return {'clearedRange': a1}
@@ -0,0 +1,72 @@
+"""Campos de contenido de un destino, en el mismo orden que la hoja 'Destinos'"""
+from typing import Dict
+
+CONTENT_FIELDS = [
+    'LOCATION', 'NAV_BAR', 'NAV_ACERCA DE', 'NAV_QUE_HACER_EN', 'NAV_CUANDO_IR_A',
+    'NAV_LOS_IMPERDIBLES_DE', 'CARD_CONOCE_LA_CIUDAD_DE', 'TITLE_CONOCE_LA_CIUDAD_DE',
+    'IMG_CONOCE_LA_CIUDAD_DE', 'DESCRIP_CONOCE_LA_CIUDAD_DE', 'CARD_ACERCA_DEL_AEROPUERTO',
+    'IMG_ACERCA_DEL_AEROPUERTO', 'SUBTITLE_ACERCA_DEL_AEROPUERTO', 'DESCRIP_ACERCA_DEL_AEROPUERTO',
+    'CARD_QUE_HACER_EN', 'TITLE_QUE_HACER_EN', 'IMG_QUE_HACER_EN', 'SUBTITLE_QUE_HACER_EN',
+    'DESCRIP_QUE_HACER_EN', 'CARD_CUANDO_IR_A', 'TITLE_CUANDO_IR_A', 'SUBTITLE_CUANDO_IR_A',
+    'IMG_1_CUANDO_IR_A', 'DESCRIP_CUANDO_IR_A', 'IMG_2_CUANDO_IR_A',
+    'CARD_CONOCE_LOS_IMPERDIBLES_DE', 'TITLE_CONOCE_LOS_IMPERDIBLES_DE',
+    'IMG_CONOCE_LOS_IMPERDIBLES_DE', 'DESCRIP_CONOCE_LOS_IMPERDIBLES_DE',
+    'SUBCARD_1_TITLE_CONOCE_LOS_IMPERDIBLES_DE', 'SUBCARD_1_IMG_CONOCE_LOS_IMPERDIBLES_DE',
+    'SUBCARD_1_DESCRIP__CONOCE_LOS_IMPERDIBLES_DE', 'SUBCARD_2_TITLE_CONOCE_LOS_IMPERDIBLES_DE',
+    'SUBCARD_2_IMG_CONOCE_LOS_IMPERDIBLES_DE', 'SUBCARD_2_DESCRIP__CONOCE_LOS_IMPERDIBLES_DE',
+    'SUBCARD_3_TITLE_CONOCE_LOS_IMPERDIBLES_DE', 'SUBCARD_3_IMG_CONOCE_LOS_IMPERDIBLES_DE',
+    'SUBCARD_3_DESCRIP__CONOCE_LOS_IMPERDIBLES_DE', 'SUBCARD_4_TITLE_CONOCE_LOS_IMPERDIBLES_DE',
+    'SUBCARD_4_IMG_CONOCE_LOS_IMPERDIBLES_DE', 'SUBCARD_4_DESCRIP__CONOCE_LOS_IMPERDIBLES_DE',
+    'CARD_DATOS_IMPORTANTES', 'IMG_DATOS_IMPORTANTES', 'DESCRIP_DATOS_IMPORTANTES'
+]
+
+# Campos que por defecto llevan el nombre del destino
+LOCATION_FIELDS = {
+    'LOCATION', 'NAV_ACERCA DE', 'NAV_QUE_HACER_EN', 'NAV_CUANDO_IR_A', 'NAV_LOS_IMPERDIBLES_DE',
+    'TITLE_CONOCE_LA_CIUDAD_DE', 'TITLE_QUE_HACER_EN', 'TITLE_CUANDO_IR_A',
+    'TITLE_CONOCE_LOS_IMPERDIBLES_DE'
+}
+
+IMG_PLACEHOLDER = 'URL_IMG'
+
+# Campos que escribe el modelo (generation.FIELD_INSTRUCTIONS, en el mismo orden); el resto
+# lleva el nombre del destino, una imagen o un texto que no se genera
+GENERATED_FIELDS = [
+    field for field in CONTENT_FIELDS
+    if field not in LOCATION_FIELDS and 'IMG' not in field and not field.startswith('CARD_') and field != 'NAV_BAR'
+]
+
+
+def default_content(location: str) -> Dict[str, str]:
+    """Diccionario de contenido con los valores por defecto para un destino"""
+    content = {}
+    for field in CONTENT_FIELDS:
+        if field in LOCATION_FIELDS:
+            content[field] = location
+        elif 'IMG' in field:
+            content[field] = IMG_PLACEHOLDER
+        else:
+            content[field] = ''
+    return content
+
+
+# Secciones del editor (y de los filtros de búsqueda), en el orden de la página
+SECTIONS = {
+    'Navegación': ['NAV_BAR', 'NAV_ACERCA DE', 'NAV_QUE_HACER_EN', 'NAV_CUANDO_IR_A', 'NAV_LOS_IMPERDIBLES_DE'],
+    'Conoce la ciudad': ['CARD_CONOCE_LA_CIUDAD_DE', 'TITLE_CONOCE_LA_CIUDAD_DE', 'IMG_CONOCE_LA_CIUDAD_DE',
+                         'DESCRIP_CONOCE_LA_CIUDAD_DE'],
+    'Aeropuerto': ['CARD_ACERCA_DEL_AEROPUERTO', 'IMG_ACERCA_DEL_AEROPUERTO', 'SUBTITLE_ACERCA_DEL_AEROPUERTO',
+                   'DESCRIP_ACERCA_DEL_AEROPUERTO'],
+    'Qué hacer en': ['CARD_QUE_HACER_EN', 'TITLE_QUE_HACER_EN', 'IMG_QUE_HACER_EN', 'SUBTITLE_QUE_HACER_EN',
+                     'DESCRIP_QUE_HACER_EN'],
+    'Cuándo ir a': ['CARD_CUANDO_IR_A', 'TITLE_CUANDO_IR_A', 'SUBTITLE_CUANDO_IR_A', 'IMG_1_CUANDO_IR_A',
+                    'DESCRIP_CUANDO_IR_A', 'IMG_2_CUANDO_IR_A'],
+    'Imperdibles': ['CARD_CONOCE_LOS_IMPERDIBLES_DE', 'TITLE_CONOCE_LOS_IMPERDIBLES_DE',
+                    'IMG_CONOCE_LOS_IMPERDIBLES_DE', 'DESCRIP_CONOCE_LOS_IMPERDIBLES_DE'],
+    **{
+        f'Imperdible {i}': [f'SUBCARD_{i}_TITLE_CONOCE_LOS_IMPERDIBLES_DE', f'SUBCARD_{i}_IMG_CONOCE_LOS_IMPERDIBLES_DE',
+                            f'SUBCARD_{i}_DESCRIP__CONOCE_LOS_IMPERDIBLES_DE']
+        for i in range(1, 5)
+    },
+    'Datos importantes': ['CARD_DATOS_IMPORTANTES', 'IMG_DATOS_IMPORTANTES', 'DESCRIP_DATOS_IMPORTANTES'],
+}
@@ -0,0 +1,283 @@
+"""Generación de contenido turístico con OpenAI"""
+import json
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from destinos.cache import ResponseCache, cache_key
+from destinos.fields import default_content
+from destinos.parser import ContentParser, parse_content, parse_response
+
+# Incrementar cada vez que cambie el prompt para invalidar la caché de respuestas
+PROMPT_VERSION = 1
+
+# Modo por lotes: varios destinos por llamada, con tokens de salida por destino y tope total
+BULK_GROUP_SIZE = 3
+BULK_MAX_TOKENS_PER_LOCATION = 1500
+BULK_MAX_TOKENS = 4096
+
+MODEL = "gpt-4"
+TEMPERATURE = 0.7
+MAX_TOKENS = 2000
+
+# Campos que completa el modelo, con la instrucción de cada uno (en el orden del prompt);
+# las claves son fields.GENERATED_FIELDS, los únicos encabezados que reconoce el parser
+FIELD_INSTRUCTIONS = {
+    'DESCRIP_CONOCE_LA_CIUDAD_DE': 'Introduce el destino destacando su identidad, estilo de viaje (aventura, descanso, cultura), lo más representativo y actual: paisajes, ambiente, vida local o eventos.',
+    'SUBTITLE_ACERCA_DEL_AEROPUERTO': 'Nombre del aeropuerto',
+    'DESCRIP_ACERCA_DEL_AEROPUERTO': 'Explica dónde está ubicado, cómo se conecta con la ciudad, cuánto demora el trayecto, y qué medios existen (transporte público, transfer, aplicaciones de transporte).',
+    'SUBTITLE_QUE_HACER_EN': 'Subtítulo atractivo para la sección',
+    'DESCRIP_QUE_HACER_EN': 'Recomienda actividades variadas: cultura, gastronomía, vida urbana, naturaleza. Puedes incluir panoramas clásicos y otros más actuales o únicos del lugar.',
+    'SUBTITLE_CUANDO_IR_A': 'Resumen de temporada ideal',
+    'DESCRIP_CUANDO_IR_A': 'Describe la mejor época para visitar según clima, actividades, festivales, precios o experiencias especiales. Incluye ventajas de temporada alta y baja.',
+    'DESCRIP_CONOCE_LOS_IMPERDIBLES_DE': 'Haz un resumen general de los panoramas más llamativos, sin repetir literalmente los 4 que vendrán, pero puedes anticiparlos sutilmente.',
+    'SUBCARD_1_TITLE_CONOCE_LOS_IMPERDIBLES_DE': 'Nombre del primer panorama imperdible',
+    'SUBCARD_1_DESCRIP__CONOCE_LOS_IMPERDIBLES_DE': '¿Qué es? ¿Qué se hace? ¿Por qué es imperdible? ¿Es gratuito o de pago? Precio estimado si aplica. Tips útiles.',
+    'SUBCARD_2_TITLE_CONOCE_LOS_IMPERDIBLES_DE': 'Nombre del segundo panorama imperdible',
+    'SUBCARD_2_DESCRIP__CONOCE_LOS_IMPERDIBLES_DE': 'Descripción detallada siguiendo el mismo formato',
+    'SUBCARD_3_TITLE_CONOCE_LOS_IMPERDIBLES_DE': 'Nombre del tercer panorama imperdible',
+    'SUBCARD_3_DESCRIP__CONOCE_LOS_IMPERDIBLES_DE': 'Descripción detallada siguiendo el mismo formato',
+    'SUBCARD_4_TITLE_CONOCE_LOS_IMPERDIBLES_DE': 'Nombre del cuarto panorama imperdible',
+    'SUBCARD_4_DESCRIP__CONOCE_LOS_IMPERDIBLES_DE': 'Descripción detallada siguiendo el mismo formato',
+    'DESCRIP_DATOS_IMPORTANTES': 'Consejos prácticos para el viaje incluyendo transporte, clima, seguridad, costumbres locales y tips para turistas.',
+}
+
+SYSTEM_PROMPT = "Eres un experto en contenido turístico para JetSMART. Genera contenido atractivo y útil para viajeros."
+
+
+def _structure(indent: str = '    ') -> str:
+    """Bloque de campos e instrucciones, tal como aparece en el prompt"""
+    return ''.join(f"{indent}{field}:\n{indent}[{instruction}]\n\n"
+                   for field, instruction in FIELD_INSTRUCTIONS.items())
+
+
+def build_prompt(location: str) -> str:
+    """Prompt con la estructura de campos que debe completar el modelo"""
+    structure = _structure()
+    return f"""
+    Actúa como un redactor profesional especializado en turismo y SEO para aerolíneas low-cost como JetSMART. Tu tarea es generar contenido completo, útil y atractivo para {location} que será publicado en la sección de guía de destinos del sitio web.
+
+    🔍 Tu contenido debe seguir la estructura exacta de un Excel, tal como en el ejemplo de Antofagasta. Cada celda debe contener el tipo de información que corresponde, sin agregar campos nuevos ni alterar los existentes.
+
+    📚 ESTRUCTURA QUE DEBES COMPLETAR:
+
+{structure}    💡 IMPORTANTE: Para cada panorama imperdible, asegúrate de proporcionar un título claro y descriptivo en el campo SUBCARD_X_TITLE_CONOCE_LOS_IMPERDIBLES_DE.
+
+    Responde SOLO con el contenido solicitado para cada campo, manteniendo el formato exacto de los nombres de los campos.
+    """
+
+
+def generation_params(location: str) -> Dict[str, object]:
+    """Parámetros que determinan la respuesta del modelo para un destino"""
+    return {
+        'location': location.strip(),
+        'prompt_version': PROMPT_VERSION,
+        'model': MODEL,
+        'temperature': TEMPERATURE,
+        'max_tokens': MAX_TOKENS
+    }
+
+
+def complete(client, location: str, timeout: Optional[float] = None) -> str:
+    """Texto crudo de la respuesta de OpenAI para un destino"""
+    response = client.chat.completions.create(
+        model=MODEL,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": build_prompt(location)}
+        ],
+        temperature=TEMPERATURE,
+        max_tokens=MAX_TOKENS,
+        timeout=timeout
+    )
+    return response.choices[0].message.content or ''
+
+
+def request_content(client, location: str, timeout: Optional[float] = None,
+                    cache: Optional[ResponseCache] = None, force: bool = False) -> Dict[str, str]:
+    """Pedir a OpenAI el contenido de un destino; las excepciones se propagan al llamador
+
+    Si se entrega una caché se reutiliza la respuesta guardada, salvo que ``force`` sea True.
+    Solo se guardan las respuestas que traen todos los campos.
+    """
+    if cache is None:
+        return parse_content(location, complete(client, location, timeout))
+
+    params = generation_params(location)
+    key = cache_key(**params)
+    text = None if force else cache.get(key)
+    if text is not None:
+        return parse_content(location, text)
+    text = complete(client, location, timeout)
+    result = parse_response(location, text, FIELD_INSTRUCTIONS)
+    if not result.missing:
+        cache.put(key, text, params)
+    return result.content
+
+
+class ContentStream:
+    """Generación con ``stream=True``: itera (campo, valor) a medida que llega el texto
+
+    Al terminar, ``content`` tiene el diccionario completo, ``missing`` los campos que el
+    modelo no entregó, y la respuesta queda en la caché si no falta ninguno.
+    """
+
+    def __init__(self, client, location: str, timeout: Optional[float] = None,
+                 cache: Optional[ResponseCache] = None, force: bool = False):
+        self.client = client
+        self.location = location
+        self.timeout = timeout
+        self.cache = cache
+        self.force = force
+        self.content: Optional[Dict[str, str]] = None
+        self.time_to_first_field: Optional[float] = None
+        self.from_cache = False
+        self.missing: List[str] = []
+
+    def _chunks(self) -> Iterator[str]:
+        stream = self.client.chat.completions.create(
+            model=MODEL,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": build_prompt(self.location)}
+            ],
+            temperature=TEMPERATURE,
+            max_tokens=MAX_TOKENS,
+            timeout=self.timeout,
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        start = time.perf_counter()
+        parser = ContentParser(self.location)
+        params = generation_params(self.location)
+        key = cache_key(**params)
+
+        cached = None if self.cache is None or self.force else self.cache.get(key)
+        chunks = [cached] if cached is not None else self._chunks()
+        self.from_cache = cached is not None
+
+        received = []
+        for text in chunks:
+            received.append(text)
+            for field, value in parser.feed(text):
+                if self.time_to_first_field is None:
+                    self.time_to_first_field = time.perf_counter() - start
+                yield field, value
+
+        self.content = parser.close()
+        self.missing = parser.missing(FIELD_INSTRUCTIONS)
+        if parser.current_field:
+            yield parser.current_field, self.content[parser.current_field]
+        # Una respuesta vacía o incompleta no se guarda: el próximo intento vuelve a pedirla
+        if self.cache is not None and cached is None and not self.missing:
+            self.cache.put(key, ''.join(received), params)
+
+
+def build_bulk_prompt(locations: List[str]) -> str:
+    """Prompt para generar varios destinos en una sola llamada, con respuesta en JSON"""
+    destinations = '\n'.join(f"- {location}" for location in locations)
+    fields = ''.join(f"- {field}: {instruction}\n" for field, instruction in FIELD_INSTRUCTIONS.items())
+    return f"""Actúa como un redactor profesional especializado en turismo y SEO para aerolíneas low-cost como JetSMART. Genera contenido completo, útil y atractivo para la guía de destinos del sitio web de cada uno de estos destinos:
+{destinations}
+
+Para cada destino completa TODOS estos campos (nombre del campo: instrucción):
+{fields}
+Para cada panorama imperdible, proporciona un título claro y descriptivo en SUBCARD_X_TITLE_CONOCE_LOS_IMPERDIBLES_DE.
+
+Responde SOLO con un objeto JSON válido, sin texto adicional, con esta forma:
+{{"<destino>": {{"<campo>": "<texto>", ...}}, ...}}
+Usa como claves exactamente los nombres de destino de la lista y los nombres de campo indicados.
+"""
+
+
+def _extract_json(text: str):
+    """Objeto JSON de la respuesta, tolerando bloques de código o texto alrededor"""
+    start, end = text.find('{'), text.rfind('}')
+    if start == -1 or end <= start:
+        raise ValueError("La respuesta no contiene un objeto JSON")
+    return json.loads(text[start:end + 1])
+
+
+def validate_entry(location: str, entry) -> Optional[Dict[str, str]]:
+    """Contenido completo de un destino, o None si la entrada no trae todos los campos"""
+    if not isinstance(entry, dict):
+        return None
+    content = default_content(location)
+    for field in FIELD_INSTRUCTIONS:
+        value = entry.get(field)
+        if not isinstance(value, str) or not value.strip():
+            return None
+        content[field] = value.strip()
+    return content
+
+
+def parse_bulk_content(locations: List[str], text: str) -> Tuple[Dict[str, Dict[str, str]], List[str]]:
+    """Separar la respuesta por destino; retorna (contenidos válidos, destinos fallidos)"""
+    try:
+        data = _extract_json(text)
+    except ValueError:
+        return {}, list(locations)
+    if not isinstance(data, dict):
+        return {}, list(locations)
+
+    # El modelo puede cambiar mayúsculas o espacios en las claves de destino
+    entries = {str(key).strip().casefold(): value for key, value in data.items()}
+    contents, failed = {}, []
+    for location in locations:
+        content = validate_entry(location, entries.get(location.strip().casefold()))
+        if content is None:
+            failed.append(location)
+        else:
+            contents[location] = content
+    return contents, failed
+
+
+def bulk_generation_params(location: str) -> Dict[str, object]:
+    """Parámetros de la entrada en caché de un destino generado por lotes"""
+    return {
+        'location': location.strip(),
+        'prompt_version': PROMPT_VERSION,
+        'model': MODEL,
+        'temperature': TEMPERATURE,
+        'mode': 'bulk'
+    }
+
+
+def cached_content(cache: ResponseCache, location: str) -> Optional[Dict[str, str]]:
+    """Contenido de un destino ya generado (de a uno o por lotes), o None si no está en la caché"""
+    text = cache.get(cache_key(**generation_params(location)))
+    if text is not None:
+        return parse_content(location, text)
+    text = cache.get(cache_key(**bulk_generation_params(location)))
+    if text is not None:
+        return validate_entry(location, json.loads(text))
+    return None
+
+
+def request_bulk_content(client, locations: List[str], timeout: Optional[float] = None,
+                         cache: Optional[ResponseCache] = None) -> Tuple[Dict[str, Dict[str, str]], List[str]]:
+    """Generar varios destinos en una sola llamada a OpenAI; retorna (contenidos, fallidos)
+
+    Con ``cache`` se guarda el contenido de cada destino por separado; para no pedir
+    destinos ya generados, consultar antes ``cached_content``.
+    """
+    response = client.chat.completions.create(
+        model=MODEL,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": build_bulk_prompt(locations)}
+        ],
+        temperature=TEMPERATURE,
+        max_tokens=min(BULK_MAX_TOKENS, BULK_MAX_TOKENS_PER_LOCATION * len(locations)),
+        timeout=timeout
+    )
+    contents, failed = parse_bulk_content(locations, response.choices[0].message.content)
+    if cache is not None:
+        for location, content in contents.items():
+            params = bulk_generation_params(location)
+            cache.put(cache_key(**params),
+                      json.dumps({field: content[field] for field in FIELD_INSTRUCTIONS}, ensure_ascii=False), params)
+    return contents, failed
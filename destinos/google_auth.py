@@ -0,0 +1,66 @@
+"""Credenciales de Google y servicio de Sheets"""
+import os
+import pickle
+from datetime import datetime, timedelta
+from typing import List
+
+# Las bibliotecas de Google se importan al usarlas: cargarlas toma cerca de un segundo
+
+# Refrescar el token solo cuando le queden menos de estos minutos de vigencia
+REFRESH_MARGIN = timedelta(minutes=5)
+
+
+def needs_refresh(creds, margin: timedelta = REFRESH_MARGIN) -> bool:
+    """True si las credenciales vencieron o están por vencer"""
+    if not creds.valid:
+        return True
+    expiry = getattr(creds, 'expiry', None)
+    return expiry is not None and expiry - datetime.utcnow() < margin
+
+
+def _load_token(token_file: str):
+    if not os.path.exists(token_file):
+        return None
+    try:
+        with open(token_file, 'rb') as token:
+            return pickle.load(token)
+    except Exception:
+        os.remove(token_file)  # Eliminar token inválido
+        return None
+
+
+def _save_token(creds, token_file: str):
+    with open(token_file, 'wb') as token:
+        pickle.dump(creds, token)
+
+
+def load_credentials(credentials_file: str, token_file: str, scopes: List[str]):
+    """Credenciales desde token.pickle; refresca cerca del vencimiento o pide autorización"""
+    creds = _load_token(token_file)
+
+    if creds and not needs_refresh(creds):
+        return creds
+
+    if creds and creds.refresh_token:
+        from google.auth.transport.requests import Request
+
+        try:
+            creds.refresh(Request())
+            _save_token(creds, token_file)
+            return creds
+        except Exception:
+            creds = None
+
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
+    flow = InstalledAppFlow.from_client_secrets_file(credentials_file, scopes)
+    creds = flow.run_local_server(port=0, success_message="Autenticación exitosa!")
+    _save_token(creds, token_file)
+    return creds
+
+
+def build_sheets_service(creds):
+    """Servicio ``sheets v4``; las credenciales se refrescan solas al vencer"""
+    from googleapiclient.discovery import build
+
+    return build('sheets', 'v4', credentials=creds)
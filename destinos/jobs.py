@@ -0,0 +1,218 @@
+"""Cola persistente de trabajos de generación, ejecutada por hilos en segundo plano
+
+Los trabajos viven en la tabla ``jobs`` de destinos.db: si se cierra la pestaña o
+se reinicia la aplicación, los pendientes (y los que quedaron a medio ejecutar)
+se retoman al iniciar la cola.
+"""
+import json
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from destinos.db import DB_PATH, get_connection, run_once, transaction
+from destinos.store import location_key
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def _create_tables(conn):
+    with conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                batch_id TEXT NOT NULL,
+                location TEXT NOT NULL,
+                params TEXT NOT NULL DEFAULT '{}',
+                status TEXT NOT NULL DEFAULT 'pending',
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs (batch_id)')
+
+
+@dataclass
+class Job:
+    id: int
+    batch_id: str
+    location: str
+    params: Dict[str, Any]
+    status: str = PENDING
+    result: Optional[Dict[str, str]] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    finished_at: Optional[float] = None
+
+    @classmethod
+    def from_row(cls, row) -> 'Job':
+        id_, batch_id, location, params, status, result, error, attempts = row
+        return cls(id_, batch_id, location, json.loads(params or '{}'), status,
+                   json.loads(result) if result else None, error, attempts)
+
+
+_JOB_COLUMNS = 'id, batch_id, location, params, status, result, error, attempts'
+
+
+class JobQueue:
+    """Cola de trabajos con un pool de hilos; ``handler(job)`` retorna el contenido generado"""
+
+    def __init__(self, handler: Callable[[Job], Dict[str, str]], db_path: str = DB_PATH,
+                 workers: int = 4, poll_interval: float = 1.0, max_attempts: int = 2):
+        self.handler = handler
+        self.db_path = db_path
+        self.workers = max(1, int(workers))
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        run_once(db_path, 'jobs', _create_tables)
+
+    def start(self):
+        """Retomar trabajos interrumpidos y lanzar los hilos de trabajo"""
+        if self._threads:
+            return
+        with transaction(self.db_path) as conn:
+            # Un trabajo 'running' al iniciar quedó cortado por un reinicio
+            conn.execute('UPDATE jobs SET status = ? WHERE status = ?', (PENDING, RUNNING))
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"jobs-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def enqueue(self, locations: Iterable[str], params: Optional[Dict[str, Any]] = None) -> str:
+        """Agregar un trabajo por destino; retorna el identificador del lote
+
+        Un destino que ya tiene un trabajo pendiente o en curso (de otra sesión, o de un
+        doble clic) no se vuelve a encolar; ``active_batches`` indica en qué lote seguirlo.
+        """
+        batch_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        payload = json.dumps(params or {})
+        conn = get_connection(self.db_path)
+        # IMMEDIATE: dos sesiones que encolan a la vez no ven ambas el destino como libre
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            active = self._active_jobs(conn)
+            rows = []
+            for location in locations:
+                key = location_key(location)
+                if key not in active:
+                    active[key] = batch_id
+                    rows.append((batch_id, location, payload, now))
+            conn.executemany('INSERT INTO jobs (batch_id, location, params, created_at) VALUES (?, ?, ?, ?)', rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        self._wake.set()
+        return batch_id
+
+    def _active_jobs(self, conn) -> Dict[str, str]:
+        """Lote del trabajo pendiente o en curso de cada destino, por ``location_key``"""
+        return {location_key(location): batch_id for location, batch_id in conn.execute(
+            'SELECT location, batch_id FROM jobs WHERE status IN (?, ?)', (PENDING, RUNNING))}
+
+    def active_batches(self, locations: Iterable[str]) -> List[str]:
+        """Lotes con trabajos pendientes o en curso para alguno de estos destinos"""
+        active = self._active_jobs(get_connection(self.db_path))
+        return list(dict.fromkeys(active[key] for key in map(location_key, locations) if key in active))
+
+    def _claim(self) -> Optional[Job]:
+        """Tomar el siguiente trabajo pendiente de forma atómica"""
+        conn = get_connection(self.db_path)
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(f'SELECT {_JOB_COLUMNS} FROM jobs WHERE status = ? ORDER BY id LIMIT 1',
+                               (PENDING,)).fetchone()
+            if row is not None:
+                conn.execute('UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1 WHERE id = ?',
+                             (RUNNING, time.time(), row[0]))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return Job.from_row(row) if row else None
+
+    def _finish(self, job: Job, result: Optional[Dict[str, str]], error: Optional[str]):
+        if error is not None and job.attempts + 1 < self.max_attempts:
+            status = PENDING  # Reintentar más tarde
+        else:
+            status = DONE if error is None else FAILED
+        with transaction(self.db_path) as conn:
+            conn.execute('UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?',
+                         (status, json.dumps(result, ensure_ascii=False) if result is not None else None,
+                          error, time.time(), job.id))
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                job = self._claim()
+            except Exception:
+                job = None  # Base ocupada: reintentar en el próximo ciclo
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            try:
+                result = self.handler(job)
+                if not result:
+                    raise ValueError("Respuesta vacía")
+                self._finish(job, result, None)
+            except Exception as e:
+                self._finish(job, None, str(e))
+
+    def progress(self, batch_id: Optional[str] = None) -> Dict[str, int]:
+        """Cantidad de trabajos por estado (de un lote o de toda la cola)"""
+        sql = 'SELECT status, COUNT(*) FROM jobs'
+        params: tuple = ()
+        if batch_id:
+            sql += ' WHERE batch_id = ?'
+            params = (batch_id,)
+        counts = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        for status, count in get_connection(self.db_path).execute(sql + ' GROUP BY status', params):
+            counts[status] = count
+        return counts
+
+    def active(self) -> bool:
+        counts = self.progress()
+        return bool(counts[PENDING] or counts[RUNNING])
+
+    def finished_since(self, since: float = 0.0, batch_ids: Optional[Iterable[str]] = None) -> List[Job]:
+        """Trabajos terminados (bien o con error) después del instante ``since``
+
+        Con ``batch_ids`` solo los de esos lotes (por ejemplo, los de una sesión).
+        """
+        sql = f'SELECT {_JOB_COLUMNS}, finished_at FROM jobs WHERE status IN (?, ?) AND finished_at > ?'
+        params: list = [DONE, FAILED, since]
+        if batch_ids is not None:
+            batch_ids = list(batch_ids)
+            if not batch_ids:
+                return []
+            sql += f" AND batch_id IN ({', '.join('?' for _ in batch_ids)})"
+            params += batch_ids
+        rows = get_connection(self.db_path).execute(sql + ' ORDER BY finished_at', params).fetchall()
+        jobs = []
+        for row in rows:
+            job = Job.from_row(row[:-1])
+            job.finished_at = row[-1]
+            jobs.append(job)
+        return jobs
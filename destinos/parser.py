@@ -0,0 +1,122 @@
+"""Parser de la respuesta del modelo: encabezados de campo reconocidos en una sola pasada
+
+Un único regex precompilado reconoce líneas como ``CAMPO: texto``, también con
+adornos de markdown (``**CAMPO**:``, ``### CAMPO``, ``- **CAMPO:**``). Las
+alternativas van de la más larga a la más corta, así un nombre que es prefijo
+de otro nunca le gana. Solo se reconocen los campos que escribe el modelo: una línea
+del texto como ``Location: frente al mar`` sigue siendo parte del campo en curso.
+"""
+import re
+from dataclasses import dataclass, field as dataclass_field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from destinos.fields import GENERATED_FIELDS, default_content
+
+_MARKDOWN_PREFIX = r'[ \t]*(?:(?:#{1,6}|>|[-*+•]|\d+[.)])[ \t]+)*'
+_EMPHASIS = r'(?:\*\*|\*|__)?'
+
+_FIELDS_BY_KEY = {name.upper(): name for name in GENERATED_FIELDS}
+_ALTERNATION = '|'.join(re.escape(name) for name in sorted(GENERATED_FIELDS, key=len, reverse=True))
+
+HEADER_RE = re.compile(
+    rf'^{_MARKDOWN_PREFIX}{_EMPHASIS}[ \t]*({_ALTERNATION})[ \t]*{_EMPHASIS}'
+    rf'(?:[ \t]*:[ \t]*{_EMPHASIS}[ \t]*(.*?))?[ \t]*$',
+    re.IGNORECASE
+)
+_PREFIX_STRIP_RE = re.compile(rf'^{_MARKDOWN_PREFIX}{_EMPHASIS}[ \t]*')
+
+
+def match_header(line: str) -> Optional[Tuple[str, str]]:
+    """(campo, resto de la línea) si la línea es un encabezado de campo"""
+    match = HEADER_RE.match(line)
+    if match is None:
+        return None
+    return _FIELDS_BY_KEY[match.group(1).upper()], match.group(2) or ''
+
+
+def may_be_header(partial: str) -> bool:
+    """True si una línea incompleta todavía puede terminar siendo un encabezado"""
+    if HEADER_RE.match(partial):
+        return True
+    rest = _PREFIX_STRIP_RE.sub('', partial).upper()
+    if not rest:
+        return True
+    return any(key.startswith(rest) or rest.startswith(key) for key in _FIELDS_BY_KEY)
+
+
+@dataclass
+class ParseResult:
+    """Campos reconocidos y campos esperados que no aparecieron en la respuesta"""
+    content: Dict[str, str]
+    missing: List[str] = dataclass_field(default_factory=list)
+
+
+class ContentParser:
+    """Parser incremental: recibe la respuesta por partes y completa los campos a medida que llegan"""
+
+    def __init__(self, location: str):
+        self.content = default_content(location)
+        self.current_field: Optional[str] = None
+        self.current_value: List[str] = []
+        self.found: List[str] = []
+        self._buffer = ''
+
+    def _feed_line(self, line: str) -> Optional[str]:
+        """Procesar una línea completa; retorna el campo cuyo valor cambió"""
+        line = line.strip()
+        if not line:
+            return None
+
+        header = match_header(line)
+        if header is not None:
+            self.current_field, first = header
+            self.current_value = [first] if first else []
+            if self.current_field not in self.found:
+                self.found.append(self.current_field)
+        elif self.current_field:
+            self.current_value.append(line)
+        else:
+            return None
+
+        self.content[self.current_field] = ' '.join(self.current_value)
+        return self.current_field
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        """Agregar texto recibido; retorna los (campo, valor) que cambiaron, incluida la línea en curso"""
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split('\n')
+        changed = []
+        for line in lines:
+            field = self._feed_line(line)
+            if field and field not in changed:
+                changed.append(field)
+
+        updates = [(field, self.content[field]) for field in changed]
+        partial = self._buffer.strip()
+        if partial and self.current_field and not may_be_header(partial):
+            updates = [u for u in updates if u[0] != self.current_field]
+            updates.append((self.current_field, ' '.join(self.current_value + [partial])))
+        return updates
+
+    def close(self) -> Dict[str, str]:
+        """Procesar el resto del texto y retornar el diccionario de campos"""
+        if self._buffer:
+            self._feed_line(self._buffer)
+            self._buffer = ''
+        return self.content
+
+    def missing(self, expected: Iterable[str]) -> List[str]:
+        return [name for name in expected if name not in self.found]
+
+
+def parse_response(location: str, text: str, expected: Iterable[str] = ()) -> ParseResult:
+    """Convertir la respuesta completa en campos e informar cuáles de ``expected`` faltaron"""
+    parser = ContentParser(location)
+    parser.feed(text)
+    content = parser.close()
+    return ParseResult(content, parser.missing(expected))
+
+
+def parse_content(location: str, text: str) -> Dict[str, str]:
+    """Convertir la respuesta del modelo en un diccionario de campos"""
+    return parse_response(location, text).content
@@ -0,0 +1,74 @@
+"""Generar y guardar destinos: el flujo común de la aplicación, la cola y la línea de comandos"""
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from destinos import db, sheets_queue
+from destinos.batch import DEFAULT_CONCURRENCY, DEFAULT_TIMEOUT, BatchGenerator, BatchResult
+from destinos.cache import ResponseCache
+from destinos.db import DB_PATH, get_connection
+from destinos.generation import cached_content, request_bulk_content, request_content
+from destinos.store import location_key
+
+
+def save_generated(location: str, content: Dict[str, str], db_path: str = DB_PATH,
+                   enqueue_sheets: bool = True):
+    """Guardar un destino generado en SQLite y anotarlo para enviarlo a Google Sheets"""
+    db.save_destination(location, content, db_path)
+    if enqueue_sheets:
+        sheets_queue.enqueue([location], db_path)
+
+
+def new_locations(locations: Iterable[str], db_path: str = DB_PATH) -> List[str]:
+    """Destinos que aún no existen en la base, sin repetidos ('Santiago' y 'SANTIAGO' son el mismo)"""
+    db.init_db(db_path)
+    existing = {location_key(location) for location, in get_connection(db_path).execute('SELECT location FROM destinos')}
+    pending = {}
+    for location in locations:
+        location = location.strip()
+        key = location_key(location)
+        if key and key not in existing:
+            pending.setdefault(key, location)
+    return list(pending.values())
+
+
+def generate_and_save(client, locations: Iterable[str], db_path: str = DB_PATH,
+                      concurrency: int = DEFAULT_CONCURRENCY, timeout: Optional[float] = DEFAULT_TIMEOUT,
+                      cache: Optional[ResponseCache] = None, force: bool = False,
+                      bulk: bool = False, group_size: int = 1,
+                      enqueue_sheets: bool = True) -> Iterator[BatchResult]:
+    """Generar en paralelo y guardar cada destino a medida que termina
+
+    Un destino que se generó pero no se pudo guardar se entrega con ``error``. En modo
+    ``bulk`` los destinos que ya están en la caché se entregan sin llamar a OpenAI y los
+    grupos se arman solo con los que faltan.
+    """
+    def saved(result: BatchResult) -> BatchResult:
+        if result.ok:
+            try:
+                save_generated(result.location, result.content, db_path, enqueue_sheets)
+            except Exception as e:
+                result = BatchResult(result.location, error=f"Error al guardar: {e}", elapsed=result.elapsed)
+        return result
+
+    pending = list(dict.fromkeys(locations))
+    if bulk and cache is not None and not force:
+        misses = []
+        for location in pending:
+            start = time.perf_counter()
+            content = cached_content(cache, location)
+            if content is None:
+                misses.append(location)
+            else:
+                yield saved(BatchResult(location, content=content, elapsed=time.perf_counter() - start))
+        pending = misses
+
+    engine = BatchGenerator(
+        lambda location, timeout: request_content(client, location, timeout=timeout, cache=cache, force=force),
+        concurrency=concurrency,
+        timeout=timeout,
+        generate_group=(lambda group, timeout: request_bulk_content(client, group, timeout=timeout, cache=cache))
+        if bulk else None,
+        group_size=group_size
+    )
+    for result in engine.run(pending):
+        yield saved(result)
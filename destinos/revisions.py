@@ -0,0 +1,352 @@
+"""Historial de revisiones de los destinos: deltas y snapshots comprimidos, solo agregando filas
+
+Triggers sobre la tabla destinos agregan una fila a ``revisions`` por cada cambio,
+cualquiera sea su origen (guardar, importar, traer desde Sheets, limpiar). Al confirmar,
+``db.transaction()`` marca las filas que escribió con un número de operación nuevo
+(``op_id``): es la unidad que muestran "Cambios recientes" y ``undo()``.
+
+- ``snapshot``: contenido completo (al crear un destino)
+- ``delta``: solo los campos que cambiaron, con su valor nuevo
+- ``rebase``: un cambio guardado con el contenido completo, para cortar una cadena de deltas
+- ``delete``: el destino se eliminó; guarda el contenido que tenía
+- ``checkpoint``: contenido completo que resume revisiones anteriores (no es un cambio)
+
+Los triggers escriben JSON sin comprimir. ``checkpoint()`` comprime con zlib lo
+nuevo, convierte en ``rebase`` el último delta de las cadenas de más de MAX_CHAIN
+(así reconstruir una revisión lee pocas filas) y resume en una sola fila por destino
+lo anterior a KEEP_DAYS, de modo que el historial no crece sin límite.
+"""
+import json
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from destinos.db import DATA_FIELDS, DB_PATH, SELECT_SQL, get_connection, quote, transaction, upsert_sql
+from destinos.telemetry import span
+
+SNAPSHOT, DELTA, REBASE, DELETE, CHECKPOINT = 'snapshot', 'delta', 'rebase', 'delete', 'checkpoint'
+
+MAX_CHAIN = 20            # Deltas seguidos antes de guardar un snapshot
+KEEP_DAYS = 90            # Revisiones más antiguas se resumen en una por destino
+CHECKPOINT_EVERY = 1000   # Revisiones nuevas que disparan un checkpoint automático
+CHECKPOINT_INTERVAL = 24 * 3600
+
+# Segundos desde 1970 con milisegundos (unixepoch('subsec') requiere SQLite 3.42)
+_NOW_SQL = "((julianday('now') - 2440587.5) * 86400.0)"
+
+
+def _content_json(row: str, skip) -> str:
+    """JSON con los campos de ``row`` (new/old), sin los que cumplen ``skip``"""
+    pairs = ', '.join(f"'{name}', CASE WHEN {skip(quote(name))} THEN NULL ELSE {row}.{quote(name)} END"
+                      for name in DATA_FIELDS)
+    # json_patch descarta las claves con valor NULL
+    return f"json_patch('{{}}', json_object({pairs}))"
+
+
+CREATE_SQL = [
+    '''CREATE TABLE IF NOT EXISTS revisions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        location TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        kind TEXT NOT NULL,
+        data BLOB,
+        op_id INTEGER
+    )''',
+    'CREATE INDEX IF NOT EXISTS idx_revisions_location ON revisions (location, id)',
+    'CREATE INDEX IF NOT EXISTS idx_revisions_created ON revisions (created_at)',
+    'CREATE INDEX IF NOT EXISTS idx_revisions_op ON revisions (op_id)',
+    'CREATE TABLE IF NOT EXISTS revisions_meta (key TEXT PRIMARY KEY, value REAL NOT NULL)',
+    f'''CREATE TRIGGER destinos_revision_insert AFTER INSERT ON destinos BEGIN
+        INSERT INTO revisions (location, created_at, kind, data)
+        VALUES (new.location, {_NOW_SQL}, '{SNAPSHOT}', {_content_json('new', lambda col: f"new.{col} = ''")});
+    END''',
+    f'''CREATE TRIGGER destinos_revision_update AFTER UPDATE ON destinos
+    WHEN {' OR '.join(f'old.{quote(name)} IS NOT new.{quote(name)}' for name in DATA_FIELDS)} BEGIN
+        INSERT INTO revisions (location, created_at, kind, data)
+        VALUES (new.location, {_NOW_SQL}, '{DELTA}', {_content_json('new', lambda col: f'old.{col} IS new.{col}')});
+    END''',
+    f'''CREATE TRIGGER destinos_revision_delete AFTER DELETE ON destinos BEGIN
+        INSERT INTO revisions (location, created_at, kind, data)
+        VALUES (old.location, {_NOW_SQL}, '{DELETE}', {_content_json('old', lambda col: f"old.{col} = ''")});
+    END''',
+]
+
+# Las revisiones aún sin operación son las de la transacción en curso (las escrituras se serializan)
+MARK_OPERATION_SQL = ('UPDATE revisions SET op_id = (SELECT COALESCE(MAX(op_id), 0) + 1 FROM revisions) '
+                      'WHERE op_id IS NULL')
+
+
+def encode(content: Dict[str, str]):
+    """JSON comprimido con zlib, o el texto si comprimir no lo achica"""
+    text = json.dumps(content, ensure_ascii=False, separators=(',', ':'))
+    packed = zlib.compress(text.encode('utf-8'), 9)
+    return packed if len(packed) < len(text.encode('utf-8')) else text
+
+
+def decode(data) -> Dict[str, str]:
+    if data is None:
+        return {}
+    if isinstance(data, bytes):
+        data = zlib.decompress(data).decode('utf-8')
+    return json.loads(data)
+
+
+def ensure_revisions(conn):
+    """Crear la tabla y los triggers; la primera vez guarda el contenido actual como punto de partida"""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'revisions'").fetchone()
+    with conn:
+        # Los triggers se recrean por si cambiaron los campos
+        for name in ('insert', 'update', 'delete'):
+            conn.execute(f'DROP TRIGGER IF EXISTS destinos_revision_{name}')
+        if exists and 'op_id' not in {row[1] for row in conn.execute('PRAGMA table_info(revisions)')}:
+            conn.execute('ALTER TABLE revisions ADD COLUMN op_id INTEGER')
+            _number_operations(conn)
+        for sql in CREATE_SQL:
+            conn.execute(sql)
+        if not exists:
+            # El punto de partida no es una operación que se pueda deshacer
+            conn.executemany(
+                'INSERT INTO revisions (location, created_at, kind, data, op_id) VALUES (?, ?, ?, ?, 0)',
+                [(row[0], 0.0, CHECKPOINT, encode({name: value for name, value in zip(DATA_FIELDS, row[1:]) if value}))
+                 for row in conn.execute(SELECT_SQL)]
+            )
+            _set_meta(conn, 'last_checkpoint_id', _max_id(conn))
+            _set_meta(conn, 'last_checkpoint_at', time.time())
+
+
+def _number_operations(conn):
+    """Historial anterior a ``op_id``: las revisiones con la misma hora cuentan como una operación"""
+    ops, op, last = [], 0, None
+    for revision_id, created_at, kind in conn.execute('SELECT id, created_at, kind FROM revisions '
+                                                      'ORDER BY created_at, id').fetchall():
+        if kind == CHECKPOINT:
+            ops.append((0, revision_id))
+            continue
+        if created_at != last:
+            op, last = op + 1, created_at
+        ops.append((op, revision_id))
+    conn.executemany('UPDATE revisions SET op_id = ? WHERE id = ?', ops)
+
+
+def mark_operation(conn):
+    """Asignar un número de operación nuevo a las revisiones escritas en la transacción en curso"""
+    conn.execute(MARK_OPERATION_SQL)
+
+
+def _max_id(conn) -> int:
+    return conn.execute('SELECT COALESCE(MAX(id), 0) FROM revisions').fetchone()[0]
+
+
+def _get_meta(conn, key: str) -> float:
+    row = conn.execute('SELECT value FROM revisions_meta WHERE key = ?', (key,)).fetchone()
+    return row[0] if row else 0
+
+
+def _set_meta(conn, key: str, value: float):
+    conn.execute('INSERT OR REPLACE INTO revisions_meta (key, value) VALUES (?, ?)', (key, value))
+
+
+@dataclass
+class Revision:
+    id: int
+    location: str
+    created_at: float
+    kind: str
+    fields: List[str] = field(default_factory=list)  # Campos que cambiaron respecto de la revisión anterior
+    size: int = 0                                    # Bytes guardados
+
+
+@dataclass
+class Change:
+    """Revisiones escritas por una misma operación (por ejemplo, una limpieza de la base)"""
+    op_id: int
+    created_at: float
+    revisions: int
+    deleted: int
+    locations: List[str]
+
+
+@dataclass
+class CheckpointResult:
+    compressed: int = 0
+    saved_bytes: int = 0
+    snapshots: int = 0    # Cadenas de deltas cortadas con una revisión ``rebase``
+    folded: int = 0       # Revisiones antiguas eliminadas al resumir
+
+
+def _empty() -> Dict[str, str]:
+    return {name: '' for name in DATA_FIELDS}
+
+
+def _apply(state: Optional[Dict[str, str]], kind: str, data: Dict[str, str]) -> Optional[Dict[str, str]]:
+    if kind == DELETE:
+        return None
+    if kind != DELTA or state is None:
+        state = _empty()
+    state.update(data)
+    return state
+
+
+def _state(conn, location: str, upto: int) -> Optional[Dict[str, str]]:
+    """Contenido del destino en la revisión ``upto`` (None si no existía)"""
+    start = conn.execute(
+        f"SELECT COALESCE(MAX(id), 0) FROM revisions WHERE location = ? AND id <= ? AND kind != '{DELTA}'",
+        (location, upto)
+    ).fetchone()[0]
+    state = None
+    for kind, data in conn.execute('SELECT kind, data FROM revisions WHERE location = ? AND id BETWEEN ? AND ? '
+                                   'ORDER BY id', (location, start, upto)):
+        state = _apply(state, kind, decode(data))
+    return state
+
+
+def _write(conn, location: str, state: Optional[Dict[str, str]]):
+    if state is None:
+        conn.execute('DELETE FROM destinos WHERE location = ?', (location,))
+    else:
+        conn.execute(upsert_sql(DATA_FIELDS), [location] + [state.get(name, '') for name in DATA_FIELDS])
+
+
+def _with_location(location: str, state: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+    return None if state is None else {'LOCATION': location, **state}
+
+
+def history(location: str, db_path: str = DB_PATH, limit: int = 50) -> List[Revision]:
+    """Revisiones del destino, de la más reciente a la más antigua"""
+    revisions = []
+    state = None
+    with span('sqlite.history') as attrs:
+        rows = get_connection(db_path).execute(
+            'SELECT id, created_at, kind, data FROM revisions WHERE location = ? ORDER BY id', (location,)
+        ).fetchall()
+        attrs['rows'] = len(rows)
+    for revision_id, created_at, kind, data in rows:
+        values = decode(data)
+        previous = state or _empty()
+        state = _apply(dict(state) if state else None, kind, values)
+        if kind == DELETE:
+            changed = [name for name in DATA_FIELDS if values.get(name)]
+        else:
+            changed = [name for name in DATA_FIELDS if state[name] != previous.get(name, '')]
+        revisions.append(Revision(revision_id, location, created_at, kind, changed, len(data or b'')))
+    return revisions[::-1][:limit]
+
+
+def content_at(location: str, revision_id: int, db_path: str = DB_PATH) -> Optional[Dict[str, str]]:
+    """Contenido del destino (con LOCATION) tal como quedó en la revisión indicada"""
+    return _with_location(location, _state(get_connection(db_path), location, revision_id))
+
+
+def diff(location: str, from_id: int, to_id: int, db_path: str = DB_PATH) -> Dict[str, Tuple[str, str]]:
+    """Campos que difieren entre dos revisiones: {campo: (antes, después)}"""
+    conn = get_connection(db_path)
+    before = _state(conn, location, from_id) or _empty()
+    after = _state(conn, location, to_id) or _empty()
+    return {name: (before[name], after[name]) for name in DATA_FIELDS if before[name] != after[name]}
+
+
+def restore(location: str, revision_id: int, db_path: str = DB_PATH) -> Optional[Dict[str, str]]:
+    """Volver el destino al contenido de una revisión (queda registrado como un cambio nuevo)"""
+    with span('sqlite.restore'), transaction(db_path) as conn:
+        state = _state(conn, location, revision_id)
+        _write(conn, location, state)
+    return _with_location(location, state)
+
+
+def recent_changes(db_path: str = DB_PATH, limit: int = 10) -> List[Change]:
+    """Últimas operaciones: las revisiones escritas por una misma transacción comparten ``op_id``"""
+    conn = get_connection(db_path)
+    groups = conn.execute(
+        f"SELECT op_id, MAX(created_at), COUNT(*), SUM(kind = '{DELETE}') FROM revisions "
+        f"WHERE op_id > 0 AND kind != '{CHECKPOINT}' GROUP BY op_id ORDER BY op_id DESC LIMIT ?", (limit,)
+    ).fetchall()
+    changes = []
+    for op_id, created_at, count, deleted in groups:
+        locations = [location for location, in conn.execute(
+            'SELECT location FROM revisions WHERE op_id = ? ORDER BY id LIMIT 5', (op_id,))]
+        changes.append(Change(op_id, created_at, count, deleted, locations))
+    return changes
+
+
+def undo(op_id: int, db_path: str = DB_PATH) -> List[str]:
+    """Deshacer una operación: cada destino vuelve al contenido previo a su primera revisión en ella"""
+    with span('sqlite.undo') as attrs, transaction(db_path) as conn:
+        rows = conn.execute(f"SELECT id, location, kind, data FROM revisions WHERE op_id = ? "
+                            f"AND kind != '{CHECKPOINT}' ORDER BY id", (op_id,)).fetchall()
+        undone: Dict[str, None] = {}
+        for revision_id, location, kind, data in rows:
+            if location in undone:
+                continue
+            # La fila ``delete`` guarda el contenido eliminado aunque lo anterior ya esté resumido
+            previous = {**_empty(), **decode(data)} if kind == DELETE else _state(conn, location, revision_id - 1)
+            _write(conn, location, previous)
+            undone[location] = None
+        attrs['rows'] = len(rows)
+    return list(undone)
+
+
+def checkpoint(db_path: str = DB_PATH, keep_days: float = KEEP_DAYS, max_chain: int = MAX_CHAIN) -> CheckpointResult:
+    """Comprimir las revisiones nuevas, acortar cadenas de deltas y resumir las antiguas"""
+    result = CheckpointResult()
+    with span('sqlite.checkpoint') as attrs, transaction(db_path) as conn:
+        last_id = int(_get_meta(conn, 'last_checkpoint_id'))
+
+        # Comprimir lo escrito por los triggers desde el último checkpoint
+        updates = []
+        for revision_id, data in conn.execute("SELECT id, data FROM revisions WHERE id > ? AND typeof(data) = 'text'",
+                                              (last_id,)).fetchall():
+            packed = encode(decode(data))
+            if isinstance(packed, bytes):
+                updates.append((packed, revision_id))
+                result.saved_bytes += len(data.encode('utf-8')) - len(packed)
+        conn.executemany('UPDATE revisions SET data = ? WHERE id = ?', updates)
+        result.compressed = len(updates)
+
+        # Contenido completo cada ``max_chain`` deltas en los destinos que cambiaron; sigue siendo
+        # una edición (con su op_id), así que no se marca como ``snapshot`` (creación)
+        touched = [location for location, in conn.execute(
+            'SELECT DISTINCT location FROM revisions WHERE id > ?', (last_id,))]
+        for location in touched:
+            deltas = conn.execute(
+                f"SELECT COUNT(*), MAX(id) FROM revisions WHERE location = ? AND kind = '{DELTA}' AND id > "
+                f"(SELECT COALESCE(MAX(id), 0) FROM revisions WHERE location = ? AND kind != '{DELTA}')",
+                (location, location)
+            ).fetchone()
+            if deltas[0] > max_chain:
+                state = _state(conn, location, deltas[1])
+                conn.execute('UPDATE revisions SET kind = ?, data = ? WHERE id = ?', (REBASE, encode(state), deltas[1]))
+                result.snapshots += 1
+
+        # Lo anterior a ``keep_days`` queda resumido en una fila por destino
+        horizon = time.time() - keep_days * 24 * 3600
+        for location, newest in conn.execute('SELECT location, MAX(id) FROM revisions WHERE created_at < ? '
+                                             'GROUP BY location HAVING COUNT(*) > 1', (horizon,)).fetchall():
+            state = _state(conn, location, newest)
+            if state is not None:
+                conn.execute('UPDATE revisions SET kind = ?, data = ? WHERE id = ?', (CHECKPOINT, encode(state), newest))
+            # Si el destino estaba eliminado, la fila ``delete`` ya guarda su último contenido
+            result.folded += conn.execute('DELETE FROM revisions WHERE location = ? AND id < ?',
+                                          (location, newest)).rowcount
+
+        _set_meta(conn, 'last_checkpoint_id', _max_id(conn))
+        _set_meta(conn, 'last_checkpoint_at', time.time())
+        attrs.update(compressed=result.compressed, folded=result.folded)
+    return result
+
+
+def maybe_checkpoint(db_path: str = DB_PATH, every: int = CHECKPOINT_EVERY,
+                     interval: float = CHECKPOINT_INTERVAL) -> Optional[CheckpointResult]:
+    """Checkpoint si hay ``every`` revisiones nuevas o pasó ``interval`` desde el último"""
+    conn = get_connection(db_path)
+    pending = _max_id(conn) - _get_meta(conn, 'last_checkpoint_id')
+    if pending >= every or (pending and time.time() - _get_meta(conn, 'last_checkpoint_at') >= interval):
+        return checkpoint(db_path)
+    return None
+
+
+def stats(db_path: str = DB_PATH) -> Dict[str, Any]:
+    """Cantidad de revisiones y bytes que ocupan"""
+    count, size = get_connection(db_path).execute(
+        'SELECT COUNT(*), COALESCE(SUM(length(data)), 0) FROM revisions').fetchone()
+    return {'revisions': count, 'bytes': size}
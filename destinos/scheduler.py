@@ -0,0 +1,187 @@
+"""Planificador de llamadas a OpenAI: presupuesto por minuto y reintentos con backoff
+
+``ScheduledClient`` envuelve al cliente de OpenAI con la misma interfaz
+(``client.chat.completions.create``), así que el resto del código no cambia.
+"""
+import random
+import threading
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Callable, Optional
+
+from destinos.telemetry import openai_cost, span
+
+# Códigos HTTP que vale la pena reintentar
+TRANSIENT_STATUS = {408, 409, 429, 500, 502, 503, 504}
+# Errores de OpenAI (o de red) que no traen código HTTP pero son transitorios
+TRANSIENT_ERRORS = {'APITimeoutError', 'APIConnectionError', 'Timeout', 'ConnectionError', 'TimeoutError'}
+
+
+def is_transient(error: BaseException) -> bool:
+    """True para 429, errores 5xx, timeouts y cortes de conexión"""
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status in TRANSIENT_STATUS
+    return type(error).__name__ in TRANSIENT_ERRORS or isinstance(error, (TimeoutError, ConnectionError))
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Segundos indicados por el servidor en la cabecera Retry-After, si existe"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        value = headers.get('retry-after')
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Presupuesto que se recarga de forma continua hasta ``per_minute`` unidades por minuto"""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.available = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Segundos hasta poder consumir ``amount`` (0 si ya se puede)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def consume(self, amount: float):
+        self._refill()
+        self.available -= min(amount, self.capacity)
+
+    def adjust(self, delta: float):
+        """Corregir el consumo cuando el uso real difiere de la estimación"""
+        self._refill()
+        self.available = min(self.capacity, self.available - delta)
+
+
+class RateLimiter:
+    """Presupuesto de solicitudes y de tokens por minuto, compartido entre hilos"""
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float, deadline: Optional[float] = None):
+        """Bloquear hasta que ambos presupuestos permitan una solicitud de ``tokens``
+
+        Con ``deadline`` (en ``time.monotonic()``) lanza TimeoutError si no alcanza a tiempo.
+        """
+        while True:
+            with self._lock:
+                wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+                if wait <= 0:
+                    self.requests.consume(1)
+                    self.tokens.consume(tokens)
+                    return
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise TimeoutError("Sin presupuesto de OpenAI disponible antes del timeout")
+            time.sleep(min(wait, 1.0))
+
+    def record_usage(self, estimated: float, actual: float):
+        with self._lock:
+            self.tokens.adjust(actual - estimated)
+
+
+@dataclass
+class RetryPolicy:
+    """Backoff exponencial con jitter completo"""
+    max_retries: int = 5
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+
+    def delay(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        suggested = retry_after(error) if error is not None else None
+        if suggested is not None:
+            return min(suggested, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+def estimate_tokens(messages, max_tokens: Optional[int]) -> int:
+    """Tokens que puede consumir la solicitud: prompt (~4 caracteres por token) más la salida máxima"""
+    prompt_chars = sum(len(message.get('content') or '') for message in messages or [])
+    return prompt_chars // 4 + (max_tokens or 0)
+
+
+def _record_usage(attrs, kwargs, response, estimated: int):
+    """Tokens y costo de la respuesta; en streaming se estiman a partir del prompt"""
+    usage = getattr(response, 'usage', None)
+    if usage is not None and getattr(usage, 'prompt_tokens', None) is not None:
+        prompt_tokens, completion_tokens = usage.prompt_tokens, usage.completion_tokens or 0
+    elif kwargs.get('stream'):
+        attrs['stream'] = True
+        attrs['estimated'] = True
+        prompt_tokens, completion_tokens = estimated - (kwargs.get('max_tokens') or 0), 0
+    else:
+        return
+    attrs['prompt_tokens'] = prompt_tokens
+    attrs['completion_tokens'] = completion_tokens
+    attrs['cost_usd'] = openai_cost(kwargs.get('model'), prompt_tokens, completion_tokens)
+
+
+class _ScheduledCompletions:
+    def __init__(self, owner: 'ScheduledClient'):
+        self._owner = owner
+
+    def create(self, **kwargs) -> Any:
+        owner = self._owner
+        estimated = estimate_tokens(kwargs.get('messages'), kwargs.get('max_tokens'))
+        # ``timeout`` acota la solicitud completa: espera del presupuesto, intentos y backoff
+        timeout = kwargs.get('timeout')
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        attempt = 0
+        while True:
+            waited = time.perf_counter()
+            owner.limiter.acquire(estimated, deadline)
+            waited = time.perf_counter() - waited
+            if deadline is not None:
+                kwargs['timeout'] = max(deadline - time.monotonic(), 0.001)
+            try:
+                with span('openai.chat', model=kwargs.get('model'), attempt=attempt,
+                          wait_s=round(waited, 3)) as attrs:
+                    response = owner.client.chat.completions.create(**kwargs)
+                    _record_usage(attrs, kwargs, response, estimated)
+            except Exception as e:
+                if not is_transient(e) or attempt >= owner.policy.max_retries:
+                    raise
+                delay = owner.policy.delay(attempt, e)
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    raise  # No queda tiempo para otro intento
+                with owner._lock:
+                    owner.retries += 1
+                time.sleep(delay)
+                attempt += 1
+                continue
+            usage = getattr(response, 'usage', None)
+            if usage is not None and getattr(usage, 'total_tokens', None):
+                owner.limiter.record_usage(estimated, usage.total_tokens)
+            return response
+
+
+class ScheduledClient:
+    """Cliente de OpenAI con límite de solicitudes/tokens por minuto y reintentos transitorios"""
+
+    def __init__(self, client, requests_per_minute: float = 200, tokens_per_minute: float = 40000,
+                 policy: Optional[RetryPolicy] = None):
+        self.client = client
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.policy = policy or RetryPolicy()
+        self.retries = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=_ScheduledCompletions(self))
@@ -0,0 +1,90 @@
+"""Búsqueda de texto completo en el contenido de los destinos (SQLite FTS5)
+
+El índice ``destinos_fts`` (ver ``db.ensure_search_index``) tiene una columna por
+campo y lo mantienen triggers sobre la tabla destinos: cualquier escritura
+(guardar, importar, traer desde Sheets, limpiar) lo actualiza en la misma transacción.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from destinos.db import DB_PATH, SEARCH_COLUMNS, get_connection, init_db
+from destinos.fields import CONTENT_FIELDS, SECTIONS
+from destinos.telemetry import span
+
+# Marcas de las coincidencias en los fragmentos (caracteres de control que no aparecen en el contenido)
+MARK_START, MARK_END = '\x02', '\x03'
+FRAGMENT_CHARS = 160
+DEFAULT_LIMIT = 50
+
+
+@dataclass
+class SearchHit:
+    location: str
+    score: float
+    # (campo, fragmento con las coincidencias entre MARK_START y MARK_END)
+    fields: List[Tuple[str, str]] = field(default_factory=list)
+
+
+def fts_query(text: str) -> str:
+    """Consulta FTS5 a partir del texto del usuario, sin operadores que puedan fallar
+
+    Todas las palabras (o frases entre comillas) deben aparecer; la última palabra
+    también encuentra prefijos ('cristo' encuentra 'Cristóbal'). Una comilla sin cerrar
+    abre una frase hasta el final y las comillas sueltas dentro de una palabra se escapan.
+    """
+    terms = [(phrase or word) for phrase, word in re.findall(r'"([^"]*)(?:"|$)|(\S+)', text)
+             if any(ch.isalnum() for ch in (phrase or word))]
+    parts = ['"' + term.replace('"', '""') + '"' for term in terms]
+    if parts and not text.rstrip().endswith('"'):
+        parts[-1] += ' *'
+    return ' '.join(parts)
+
+
+def fragment(text: str, width: int = FRAGMENT_CHARS) -> str:
+    """Parte de ``text`` alrededor de la primera coincidencia, sin cortar una marca a la mitad"""
+    first = text.find(MARK_START)
+    start = max(0, first - width // 3)
+    end = min(len(text), start + width)
+    # No dejar una coincidencia abierta al final del fragmento
+    if text.rfind(MARK_START, start, end) > text.rfind(MARK_END, start, end):
+        end = text.find(MARK_END, end) + 1 or len(text)
+    piece = text[start:end]
+    if start > 0:
+        piece = '…' + piece.lstrip(MARK_END)
+    if end < len(text):
+        piece += '…'
+    return piece
+
+
+def search(query: str, section: Optional[str] = None, limit: int = DEFAULT_LIMIT,
+           db_path: str = DB_PATH) -> List[SearchHit]:
+    """Destinos que contienen ``query``, del más al menos relevante, con los campos donde aparece
+
+    ``section`` (una clave de SECTIONS) limita la búsqueda a los campos de esa sección.
+    """
+    match = fts_query(query)
+    if not match:
+        return []
+    fields = SECTIONS[section] if section else CONTENT_FIELDS
+    indexes = [CONTENT_FIELDS.index(name) for name in fields]
+    if section:
+        match = '{' + ' '.join(SEARCH_COLUMNS[i] for i in indexes) + '} : (' + match + ')'
+
+    init_db(db_path)
+    highlights = ', '.join(f"highlight(destinos_fts, {i}, char(2), char(3))" for i in indexes)
+    with span('sqlite.search', section=section or '') as attrs:
+        rows = get_connection(db_path).execute(
+            f'SELECT location, rank, {highlights} FROM destinos_fts WHERE destinos_fts MATCH ? '
+            'ORDER BY rank LIMIT ?', (match, limit)
+        ).fetchall()
+        attrs['rows'] = len(rows)
+
+    hits = []
+    for location, rank, *texts in rows:
+        hit = SearchHit(location, -rank)
+        for name, text in zip(fields, texts):
+            if text and MARK_START in text:
+                hit.fields.append((name, fragment(text)))
+        hits.append(hit)
+    return hits
@@ -0,0 +1,165 @@
+"""Metadatos de la hoja de cálculo (ID, pestaña y encabezado) consultados una sola vez
+
+``spreadsheets().get`` devuelve las propiedades de todas las pestañas; en vez de
+pedirlo antes de cada escritura se guarda el resultado y solo se vuelve a
+consultar cuando una escritura falla porque la hoja o el rango ya no existen.
+
+Si hubo que crear la hoja de cálculo, su ID se guarda en la tabla ``sheets_spreadsheets``
+(con ``db_path``) para seguir usándola después de reiniciar la aplicación.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from destinos.db import run_once, transaction
+from destinos.fields import CONTENT_FIELDS
+from destinos.telemetry import span
+
+# Mensajes de la API que indican que la hoja o la pestaña cambiaron
+STALE_MESSAGES = ('unable to parse range', 'not found', 'requested entity was not found')
+
+
+def is_stale_error(error: Exception) -> bool:
+    """True si el error indica que los metadatos guardados ya no son válidos"""
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    if status == 404:
+        return True
+    message = str(error).lower()
+    return any(text in message for text in STALE_MESSAGES)
+
+
+def _create_tables(conn):
+    with conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS sheets_spreadsheets (
+                configured_id TEXT PRIMARY KEY,
+                spreadsheet_id TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        ''')
+
+
+def saved_spreadsheet_id(db_path: str, configured_id: Optional[str]) -> Optional[str]:
+    """ID de la hoja creada en reemplazo de ``configured_id`` (None si no se creó ninguna)"""
+    run_once(db_path, 'sheets_spreadsheets', _create_tables)
+    with transaction(db_path) as conn:
+        row = conn.execute('SELECT spreadsheet_id FROM sheets_spreadsheets WHERE configured_id = ?',
+                           (configured_id or '',)).fetchone()
+    return row[0] if row else None
+
+
+def save_spreadsheet_id(db_path: str, configured_id: Optional[str], spreadsheet_id: str):
+    run_once(db_path, 'sheets_spreadsheets', _create_tables)
+    with transaction(db_path) as conn:
+        conn.execute('INSERT OR REPLACE INTO sheets_spreadsheets (configured_id, spreadsheet_id, created_at) '
+                     'VALUES (?, ?, ?)', (configured_id or '', spreadsheet_id, time.time()))
+
+
+@dataclass
+class SheetInfo:
+    spreadsheet_id: str
+    sheet_id: int
+    title: str
+    header: List[str]
+    created: bool = False  # True si se creó una hoja de cálculo nueva
+
+
+class SheetMetadata:
+    """Caché de los metadatos de una pestaña; la crea (o crea la hoja) si no existe
+
+    ``spreadsheet_id`` es el ID configurado; con ``db_path`` se usa en su lugar la hoja
+    creada la última vez que el configurado faltaba o ya no existía.
+    """
+
+    def __init__(self, service, spreadsheet_id: Optional[str], sheet_name: str = 'Destinos',
+                 columns: Optional[List[str]] = None, spreadsheet_title: str = 'Destinos JetSMART',
+                 db_path: Optional[str] = None):
+        self.service = service
+        self.configured_id = spreadsheet_id
+        self.db_path = db_path
+        if db_path is not None:
+            spreadsheet_id = saved_spreadsheet_id(db_path, spreadsheet_id) or spreadsheet_id
+        self.spreadsheet_id = spreadsheet_id
+        self.sheet_name = sheet_name
+        self.columns = list(columns or CONTENT_FIELDS)
+        self.spreadsheet_title = spreadsheet_title
+        self.fetches = 0
+        self._info: Optional[SheetInfo] = None
+        self._lock = threading.Lock()
+
+    @property
+    def cached(self) -> bool:
+        return self._info is not None
+
+    def invalidate(self):
+        self._info = None
+
+    def invalidate_on(self, error: Exception) -> bool:
+        """Descartar los metadatos si ``error`` indica que quedaron obsoletos"""
+        if is_stale_error(error):
+            self.invalidate()
+            return True
+        return False
+
+    def set_header(self, header: List[str]):
+        if self._info is not None:
+            self._info.header = list(header)
+
+    def ensure(self) -> SheetInfo:
+        """Metadatos de la pestaña, consultando la API solo la primera vez"""
+        info = self._info
+        if info is not None:
+            return info
+        with self._lock:
+            if self._info is None:
+                with span('sheets.metadata'):
+                    self._info = self._fetch()
+            return self._info
+
+    def _fetch(self) -> SheetInfo:
+        self.fetches += 1
+        try:
+            metadata = self.service.spreadsheets().get(
+                spreadsheetId=self.spreadsheet_id,
+                fields='spreadsheetId,sheets.properties(sheetId,title)'
+            ).execute()
+        except Exception as e:
+            if self.spreadsheet_id and not is_stale_error(e):
+                raise
+            return self._create_spreadsheet()
+
+        for sheet in metadata.get('sheets', []):
+            properties = sheet['properties']
+            if properties['title'] == self.sheet_name:
+                return SheetInfo(self.spreadsheet_id, properties.get('sheetId', 0),
+                                 self.sheet_name, self._read_header())
+
+        # La pestaña no existe: agregarla a la hoja de cálculo
+        reply = self.service.spreadsheets().batchUpdate(
+            spreadsheetId=self.spreadsheet_id,
+            body={'requests': [{'addSheet': {'properties': {'title': self.sheet_name}}}]}
+        ).execute()
+        replies = reply.get('replies') or [{}]
+        sheet_id = replies[0].get('addSheet', {}).get('properties', {}).get('sheetId', 0)
+        return SheetInfo(self.spreadsheet_id, sheet_id, self.sheet_name, [])
+
+    def _create_spreadsheet(self) -> SheetInfo:
+        spreadsheet = self.service.spreadsheets().create(body={
+            'properties': {'title': self.spreadsheet_title},
+            'sheets': [{'properties': {'title': self.sheet_name}}]
+        }).execute()
+        self.spreadsheet_id = spreadsheet['spreadsheetId']
+        if self.db_path is not None:
+            save_spreadsheet_id(self.db_path, self.configured_id, self.spreadsheet_id)
+        sheets = spreadsheet.get('sheets') or [{}]
+        sheet_id = sheets[0].get('properties', {}).get('sheetId', 0)
+        return SheetInfo(self.spreadsheet_id, sheet_id, self.sheet_name, [], created=True)
+
+    def _read_header(self) -> List[str]:
+        result = self.service.spreadsheets().values().get(
+            spreadsheetId=self.spreadsheet_id,
+            range=f"'{self.sheet_name}'!1:1"
+        ).execute()
+        values = result.get('values', [])
+        return list(values[0]) if values else []
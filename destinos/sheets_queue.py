@@ -0,0 +1,156 @@
+"""Cola de escritura diferida (write-behind) hacia Google Sheets
+
+Guardar un destino solo anota su LOCATION en la tabla ``sheets_outbox``; un hilo
+en segundo plano envía las filas pendientes en un único ``batchUpdate`` cuando
+pasa el intervalo de espera sin nuevos cambios. Varios guardados del mismo
+destino ocupan una sola entrada, y lo que quede sin enviar se retoma al reiniciar.
+"""
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from destinos import db
+from destinos.db import DB_PATH, get_connection, run_once, transaction
+from destinos.sheets_sync import SheetsSync, SyncResult
+
+
+def _create_tables(conn):
+    with conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS sheets_outbox (
+                location TEXT PRIMARY KEY,
+                queued_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT
+            )
+        ''')
+
+
+def enqueue(locations: Iterable[str], db_path: str = DB_PATH) -> int:
+    """Anotar destinos para enviar a Sheets; un destino ya pendiente solo renueva su marca"""
+    run_once(db_path, 'sheets_outbox', _create_tables)
+    now = time.time()
+    rows = [(location, now, now) for location in dict.fromkeys(locations) if location]
+    if rows:
+        with transaction(db_path) as conn:
+            conn.executemany('''
+                INSERT INTO sheets_outbox (location, queued_at, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(location) DO UPDATE SET updated_at = excluded.updated_at
+            ''', rows)
+    return len(rows)
+
+
+class SheetsWriteQueue:
+    """Envía a Sheets en segundo plano los destinos anotados en ``sheets_outbox``
+
+    Se espera ``debounce`` segundos sin guardados nuevos antes de enviar, pero
+    nunca más de ``max_delay`` desde el cambio más antiguo. Tras un error se
+    reintenta con espera creciente.
+    """
+
+    def __init__(self, sync: SheetsSync, db_path: str = DB_PATH,
+                 debounce: float = 5.0, max_delay: float = 30.0, max_backoff: float = 300.0):
+        self.sync = sync
+        self.db_path = db_path
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.max_backoff = max_backoff
+        # Serializa los envíos con las reescrituras completas de la hoja
+        self.lock = threading.RLock()
+        self.last_flush_at: Optional[float] = None
+        self.last_flush_latency: Optional[float] = None
+        self.last_result: Optional[SyncResult] = None
+        self.last_error: Optional[str] = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        run_once(db_path, 'sheets_outbox', _create_tables)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._work, name='sheets-writer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def enqueue(self, locations: Iterable[str]) -> int:
+        count = enqueue(locations, self.db_path)
+        self._wake.set()
+        return count
+
+    def depth(self) -> int:
+        """Destinos pendientes de enviar"""
+        return get_connection(self.db_path).execute('SELECT COUNT(*) FROM sheets_outbox').fetchone()[0]
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'depth': self.depth(),
+            'last_flush_at': self.last_flush_at,
+            'last_flush_latency': self.last_flush_latency,
+            'last_error': self.last_error,
+        }
+
+    def _pending(self) -> List[Tuple[str, float, float]]:
+        return get_connection(self.db_path).execute(
+            'SELECT location, queued_at, updated_at FROM sheets_outbox ORDER BY queued_at'
+        ).fetchall()
+
+    def _due(self, pending: List[Tuple[str, float, float]], now: float) -> bool:
+        if not pending or now < self._retry_at:
+            return False
+        oldest = min(queued_at for _, queued_at, _ in pending)
+        newest = max(updated_at for _, _, updated_at in pending)
+        return now - newest >= self.debounce or now - oldest >= self.max_delay
+
+    def flush(self) -> SyncResult:
+        """Enviar ahora todo lo pendiente; lanza la excepción de Sheets si falla"""
+        with self.lock:
+            pending = self._pending()
+            if not pending:
+                return SyncResult()
+            records = [db.load_destination(location, self.db_path) for location, _, _ in pending]
+            start = time.perf_counter()
+            try:
+                result = self.sync.push([record for record in records if record])
+            except Exception as e:
+                self._failed(pending, e)
+                raise
+            self.last_flush_latency = time.perf_counter() - start
+            self.last_flush_at = time.time()
+            self.last_result = result
+            self.last_error = None
+            self._failures = 0
+            self._retry_at = 0.0
+            # Solo se borran las entradas que no volvieron a cambiar durante el envío
+            with transaction(self.db_path) as conn:
+                conn.executemany('DELETE FROM sheets_outbox WHERE location = ? AND updated_at = ?',
+                                 [(location, updated_at) for location, _, updated_at in pending])
+            return result
+
+    def _failed(self, pending: List[Tuple[str, float, float]], error: Exception):
+        self.last_error = str(error)
+        self._failures += 1
+        self._retry_at = time.time() + min(self.max_backoff, self.debounce * 2 ** self._failures)
+        with transaction(self.db_path) as conn:
+            conn.executemany('UPDATE sheets_outbox SET attempts = attempts + 1, last_error = ? WHERE location = ?',
+                             [(self.last_error, location) for location, _, _ in pending])
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                if self._due(self._pending(), time.time()):
+                    self.flush()
+            except Exception:
+                pass  # El error queda en last_error y la entrada en la tabla
+            self._wake.wait(min(1.0, self.debounce))
+            self._wake.clear()
@@ -0,0 +1,445 @@
+"""Sincronización incremental, fila por fila, con la hoja de Google Sheets"""
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from destinos.db import DB_PATH, get_connection, init_db, load_versions, run_once, transaction, upsert_sql
+from destinos.fields import CONTENT_FIELDS
+from destinos.sheets_meta import SheetMetadata
+from destinos.store import location_key
+from destinos.telemetry import span
+
+
+def column_letter(index: int) -> str:
+    """Letra de columna de Sheets para un índice 1-based (1 -> A, 27 -> AA)"""
+    letters = ''
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def cell_value(value: Any) -> str:
+    """Valor de celda como texto, con None/NaN convertidos en cadena vacía"""
+    if value is None or value != value:
+        return ''
+    return str(value)
+
+
+# Filas por lectura al traer cambios desde la hoja
+DEFAULT_PAGE_SIZE = 500
+
+# Tope del cuerpo de cada escritura a Sheets. La API rechaza pedidos de ~10 MB;
+# bloques más chicos además reducen lo que se reenvía si una escritura falla.
+MAX_REQUEST_BYTES = 2_000_000
+
+
+def frame_to_values(df, columns: Optional[List[str]] = None) -> List[List[str]]:
+    """Filas de un DataFrame como texto, en el orden de ``columns`` y sin recorrerlo celda por celda
+
+    Las columnas que falten quedan vacías y None/NaN se convierten en cadena vacía.
+    """
+    columns = list(columns or CONTENT_FIELDS)
+    return df.reindex(columns=columns).fillna('').astype(str).to_numpy().tolist()
+
+
+def chunk_rows(rows: List[List[str]], max_bytes: int = MAX_REQUEST_BYTES) -> Iterator[Tuple[int, List[List[str]]]]:
+    """Dividir ``rows`` en bloques contiguos de a lo más ``max_bytes`` en JSON; retorna (desplazamiento, bloque)"""
+    start, size, block = 0, 0, []
+    for i, row in enumerate(rows):
+        row_bytes = len(json.dumps(row)) + 1
+        if block and size + row_bytes > max_bytes:
+            yield start, block
+            start, size, block = i, 0, []
+        block.append(row)
+        size += row_bytes
+    if block:
+        yield start, block
+
+
+def row_fingerprint(values: List[str]) -> str:
+    """Hash del contenido de una fila, usado para detectar cambios"""
+    return hashlib.sha1('\x1f'.join(values).encode('utf-8')).hexdigest()
+
+
+def _create_tables(conn):
+    with conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS sheets_sync_rows (
+                spreadsheet_id TEXT NOT NULL,
+                location TEXT NOT NULL,
+                row_number INTEGER NOT NULL,
+                fingerprint TEXT NOT NULL,
+                pushed_at REAL NOT NULL,
+                PRIMARY KEY (spreadsheet_id, location)
+            )
+        ''')
+
+
+@dataclass
+class SyncResult:
+    """Resumen de un envío a Google Sheets"""
+    rows: int = 0
+    cells: int = 0
+    ranges: int = 0
+
+
+@dataclass
+class PullResult:
+    """Resumen de una lectura de cambios desde Google Sheets"""
+    rows: int = 0         # Filas leídas de la hoja
+    pages: int = 0        # Pedidos de lectura
+    inserted: int = 0
+    updated: int = 0
+    locations: List[str] = field(default_factory=list)  # Destinos escritos en SQLite
+    conflicts: List[str] = field(default_factory=list)  # Editados en ambos lados; se conservó la versión local
+
+
+def _pending_locations(conn) -> Set[str]:
+    """Destinos con cambios locales aún no enviados a la hoja (tabla de sheets_queue)"""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sheets_outbox'").fetchone()
+    if not exists:
+        return set()
+    return {location for location, in conn.execute('SELECT location FROM sheets_outbox')}
+
+
+class SheetsSync:
+    """Envía a Sheets solo las filas cuyo contenido cambió desde el último envío
+
+    El estado (fila de la hoja y hash de cada LOCATION) se guarda en la tabla
+    ``sheets_sync_rows`` para sobrevivir a reinicios de la aplicación. Con
+    ``metadata`` se verifica (una sola vez) que la pestaña exista antes de escribir.
+    """
+
+    def __init__(self, service, spreadsheet_id: str, sheet_name: str = 'Destinos',
+                 columns: Optional[List[str]] = None, db_path: str = DB_PATH,
+                 metadata: Optional[SheetMetadata] = None):
+        self.service = service
+        self.spreadsheet_id = spreadsheet_id
+        self.sheet_name = sheet_name
+        self.columns = list(columns or CONTENT_FIELDS)
+        self.db_path = db_path
+        self.metadata = metadata
+        self.row_index: Optional[Dict[str, int]] = None
+        self.has_header = False
+        self.sheet_columns: List[str] = list(self.columns)  # Columnas presentes en la hoja (última lectura)
+        self.next_row = 2
+        run_once(self.db_path, 'sheets_sync_rows', _create_tables)
+
+    def _range(self, first_row: int, last_row: int) -> str:
+        last_column = column_letter(len(self.columns))
+        return f"'{self.sheet_name}'!A{first_row}:{last_column}{last_row}"
+
+    def _pushed_state(self) -> Dict[str, Tuple[int, str]]:
+        return {location: (row_number, fingerprint)
+                for location, (row_number, fingerprint, _) in self._sync_state().items()}
+
+    def _sync_state(self) -> Dict[str, Tuple[int, str, float]]:
+        """Fila, hash y momento del último envío o lectura de cada LOCATION"""
+        with transaction(self.db_path) as conn:
+            rows = conn.execute(
+                'SELECT location, row_number, fingerprint, pushed_at FROM sheets_sync_rows WHERE spreadsheet_id = ?',
+                (self.spreadsheet_id,)
+            ).fetchall()
+        return {location: (row_number, fingerprint, pushed_at) for location, row_number, fingerprint, pushed_at in rows}
+
+    def refresh_index(self):
+        """Leer la columna LOCATION para saber en qué fila está cada destino"""
+        with span('sheets.read_index'):
+            result = self.service.spreadsheets().values().get(
+                spreadsheetId=self.spreadsheet_id,
+                range=f"'{self.sheet_name}'!A:A"
+            ).execute()
+        values = result.get('values', [])
+        self.has_header = bool(values) and bool(values[0]) and values[0][0] == self.columns[0]
+        self.row_index = {}
+        for row_number, cells in enumerate(values[1:], start=2):
+            if cells and cells[0]:
+                self.row_index[cells[0]] = row_number
+        self.next_row = max(len(values) + 1, 2)
+
+    def to_values(self, record: Dict[str, Any]) -> List[str]:
+        return [cell_value(record.get(col)) for col in self.columns]
+
+    def _ensure_sheet(self):
+        if self.metadata is not None:
+            info = self.metadata.ensure()
+            if info.spreadsheet_id != self.spreadsheet_id:
+                # Se creó una hoja de cálculo nueva: el índice anterior no sirve
+                self.spreadsheet_id = info.spreadsheet_id
+                self.row_index = None
+
+    def _failed(self, error: Exception):
+        # El índice local puede no coincidir con la hoja; releerlo en el próximo envío
+        self.row_index = None
+        if self.metadata is not None:
+            self.metadata.invalidate_on(error)
+
+    def push(self, records: Iterable[Dict[str, Any]], max_bytes: int = MAX_REQUEST_BYTES) -> SyncResult:
+        """Enviar con ``values.batchUpdate`` las filas nuevas o modificadas
+
+        Los rangos se reparten en pedidos de a lo más ``max_bytes``; cada pedido que
+        termina queda registrado, así un error solo obliga a reenviar lo que faltó.
+        """
+        self._ensure_sheet()
+        if self.row_index is None:
+            self.refresh_index()
+
+        pushed = self._pushed_state()
+        changed: List[Tuple[int, str, List[str], str]] = []
+        for record in records:
+            location = cell_value(record.get('LOCATION'))
+            if not location:
+                continue
+            values = self.to_values(record)
+            fingerprint = row_fingerprint(values)
+            row_number = self.row_index.get(location)
+            if row_number is not None and pushed.get(location) == (row_number, fingerprint):
+                continue
+            if row_number is None:
+                row_number = self.next_row
+                self.next_row += 1
+                self.row_index[location] = row_number
+            changed.append((row_number, location, values, fingerprint))
+
+        # Agrupar filas contiguas en un mismo rango y repartir los rangos en pedidos de a lo
+        # más max_bytes (en JSON); un bloque que no cabe se parte entre dos pedidos
+        changed.sort(key=lambda item: item[0])
+        batches: List[Tuple[List[Dict[str, Any]], List[Tuple[int, str, List[str], str]]]] = []
+        data: List[Dict[str, Any]] = []
+        rows: List[Tuple[int, str, List[str], str]] = []
+        block: List[Tuple[int, str, List[str], str]] = []
+        size = 0
+        if not self.has_header:
+            data.append({'range': self._range(1, 1), 'values': [self.columns]})
+            size = len(json.dumps(data[0]))
+
+        def close_block():
+            if block:
+                data.append({'range': self._range(block[0][0], block[-1][0]),
+                             'values': [values for _, _, values, _ in block]})
+                rows.extend(block)
+                block.clear()
+
+        for item in changed:
+            row_bytes = len(json.dumps(item[2])) + 1
+            range_bytes = len(json.dumps({'range': self._range(item[0], item[0]), 'values': []}))
+            contiguous = bool(block) and item[0] == block[-1][0] + 1
+            if (data or block) and size + row_bytes + (0 if contiguous else range_bytes) > max_bytes:
+                close_block()
+                batches.append((data, rows))
+                data, rows, size, contiguous = [], [], 0, False
+            elif not contiguous:
+                close_block()
+            block.append(item)
+            size += row_bytes + (0 if contiguous else range_bytes)
+        close_block()
+        if data:
+            batches.append((data, rows))
+
+        result = SyncResult()
+        for data, rows in batches:
+            cells = sum(len(item['values']) * len(self.columns) for item in data)
+            try:
+                with span('sheets.push', rows=len(rows), cells=cells, ranges=len(data)):
+                    self.service.spreadsheets().values().batchUpdate(
+                        spreadsheetId=self.spreadsheet_id,
+                        body={'valueInputOption': 'RAW', 'data': data}
+                    ).execute()
+            except Exception as e:
+                self._failed(e)
+                raise
+            self.has_header = True
+            if self.metadata is not None:
+                self.metadata.set_header(self.columns)
+            self._record(rows)
+            result.rows += len(rows)
+            result.cells += cells
+            result.ranges += len(data)
+        return result
+
+    def read_pages(self, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[List[Tuple[int, List[str]]]]:
+        """Filas de la hoja por páginas, como (número de fila, valores en el orden de ``columns``)
+
+        Se lee primero el encabezado y luego ``page_size`` filas por pedido, solo
+        hasta la última columna conocida; las columnas que falten quedan vacías y no
+        figuran en ``sheet_columns``.
+        """
+        with span('sheets.read_header'):
+            result = self.service.spreadsheets().values().get(
+                spreadsheetId=self.spreadsheet_id,
+                range=f"'{self.sheet_name}'!1:1"
+            ).execute()
+        header = (result.get('values') or [[]])[0]
+        self.has_header = bool(header) and header[0] == self.columns[0]
+        positions = {name: index for index, name in enumerate(header) if name in self.columns}
+        self.sheet_columns = [col for col in self.columns if col in positions]
+        if not positions:
+            return
+        if self.columns[0] not in positions:
+            raise ValueError(f"La hoja '{self.sheet_name}' no tiene la columna {self.columns[0]}")
+        indexes = [positions.get(col) for col in self.columns]
+        last_column = column_letter(max(positions.values()) + 1)
+
+        start = 2
+        while True:
+            with span('sheets.read_page') as attrs:
+                result = self.service.spreadsheets().values().get(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=f"'{self.sheet_name}'!A{start}:{last_column}{start + page_size - 1}"
+                ).execute()
+                values = result.get('values', [])
+                attrs['rows'] = len(values)
+            yield [(start + offset, [cell_value(cells[i]) if i is not None and i < len(cells) else ''
+                                     for i in indexes])
+                   for offset, cells in enumerate(values)]
+            if len(values) < page_size:
+                return
+            start += page_size
+
+    def pull(self, page_size: int = DEFAULT_PAGE_SIZE) -> PullResult:
+        """Traer a SQLite solo las filas editadas directamente en la hoja
+
+        Una fila cuenta como editada en la hoja si su hash difiere del registrado en el
+        último envío o lectura. Si el destino también cambió localmente desde entonces
+        (``last_updated`` posterior, o pendiente en la cola de envío) se conserva la
+        versión local y se informa en ``conflicts``; para un destino sin envío ni lectura
+        registrados se compara con la última sincronización de la hoja. Solo se comparan
+        y escriben las columnas presentes en la hoja. Se escribe en una sola transacción.
+        """
+        self._ensure_sheet()
+        init_db(self.db_path)
+        result = PullResult()
+        state = self._sync_state()
+
+        # Filas cuyo hash no coincide con el del último envío o lectura
+        seen: Dict[str, int] = {}
+        candidates: List[Tuple[int, str, List[str], str]] = []
+        moved: List[Tuple[int, str]] = []
+        for page in self.read_pages(page_size):
+            result.pages += 1
+            for row_number, values in page:
+                result.rows += 1
+                location = values[0]
+                if not location.strip() or location in seen:
+                    continue
+                seen[location] = row_number
+                fingerprint = row_fingerprint(values)
+                known = state.get(location)
+                if known is not None and known[1] == fingerprint:
+                    if known[0] != row_number:
+                        moved.append((row_number, location))
+                    continue
+                candidates.append((row_number, location, values, fingerprint))
+
+        # Un destino que ya existe con otra escritura ('Santiago' / 'SANTIAGO') conserva su nombre
+        conn = get_connection(self.db_path)
+        existing = {location_key(location): location for location, in conn.execute('SELECT location FROM destinos')}
+        pending = _pending_locations(conn)
+        names = {location: existing.get(location_key(location), location) for _, location, _, _ in candidates}
+        local = load_versions(names.values(), self.db_path)
+
+        # Solo las columnas que tiene la hoja: las que falten no pisan el contenido local
+        indexes = [i for i, col in enumerate(self.columns) if col in self.sheet_columns]
+        # Referencia para destinos sin estado propio; 0 si la hoja nunca se sincronizó
+        last_synced = max((pushed_at for _, _, pushed_at in state.values()), default=0.0)
+
+        writes: List[List[str]] = []
+        synced: List[Tuple[int, str, List[str], str]] = []
+        for row_number, location, values, fingerprint in candidates:
+            name = names[location]
+            if name in local:
+                record, last_updated = local[name]
+                current = self.to_values(record)
+                if all(current[i] == values[i] for i in indexes[1:]):
+                    # Mismo contenido en ambos lados: solo registrar el hash
+                    synced.append((row_number, location, values, fingerprint))
+                    continue
+                known = state.get(location)
+                if name in pending or last_updated > (known[2] if known is not None else last_synced):
+                    result.conflicts.append(name)
+                    continue
+                result.updated += 1
+            else:
+                result.inserted += 1
+            writes.append([name] + [values[i] for i in indexes[1:]])
+            result.locations.append(name)
+            synced.append((row_number, location, values, fingerprint))
+
+        now = time.time()
+        with span('sqlite.pull', rows=len(writes)), transaction(self.db_path) as conn:
+            if writes:
+                conn.executemany(upsert_sql(self.sheet_columns[1:]), writes)
+            # Mismo pushed_at que last_updated o posterior: lo escrito no cuenta como cambio local
+            conn.executemany(
+                'INSERT OR REPLACE INTO sheets_sync_rows (spreadsheet_id, location, row_number, fingerprint, pushed_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [(self.spreadsheet_id, location, row_number, fingerprint, now)
+                 for row_number, location, _, fingerprint in synced]
+            )
+            # Filas sin cambios que se movieron de lugar (por ejemplo, al ordenar la hoja)
+            conn.executemany('UPDATE sheets_sync_rows SET row_number = ? WHERE spreadsheet_id = ? AND location = ?',
+                             [(row_number, self.spreadsheet_id, location) for row_number, location in moved])
+
+        # La lectura recorrió toda la hoja: sirve como índice para el próximo envío
+        self.row_index = seen
+        self.next_row = max(seen.values(), default=1) + 1
+        return result
+
+    def write_all(self, rows: List[List[str]]) -> SyncResult:
+        """Reescribir la hoja completa (encabezado y ``rows``) en bloques que respetan MAX_REQUEST_BYTES"""
+        self._ensure_sheet()
+        values = [self.columns] + rows
+        cells = ranges = 0
+        try:
+            with span('sheets.clear'):
+                self.service.spreadsheets().values().clear(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=f"'{self.sheet_name}'!A:ZZ"
+                ).execute()
+            for offset, block in chunk_rows(values):
+                with span('sheets.full_write', rows=len(block)) as attrs:
+                    result = self.service.spreadsheets().values().update(
+                        spreadsheetId=self.spreadsheet_id,
+                        range=f"'{self.sheet_name}'!A{offset + 1}",
+                        valueInputOption='RAW',
+                        body={'values': block, 'majorDimension': 'ROWS'}
+                    ).execute()
+                    attrs['cells'] = result.get('updatedCells', 0)
+                cells += result.get('updatedCells', 0)
+                ranges += 1
+        except Exception as e:
+            self._failed(e)
+            raise
+        self.record_full_write(rows)
+        return SyncResult(rows=len(rows), cells=cells, ranges=ranges)
+
+    def record_full_write(self, rows: List[List[str]]):
+        """Registrar el estado tras reescribir la hoja completa (encabezado en la fila 1)"""
+        self.row_index = {}
+        changed = []
+        for row_number, values in enumerate(rows, start=2):
+            location = values[0] if values else ''
+            if not location:
+                continue
+            self.row_index[location] = row_number
+            changed.append((row_number, location, values, row_fingerprint(values)))
+        self.has_header = True
+        self.next_row = len(rows) + 2
+        if self.metadata is not None:
+            self.metadata.set_header(self.columns)
+        with transaction(self.db_path) as conn:
+            conn.execute('DELETE FROM sheets_sync_rows WHERE spreadsheet_id = ?', (self.spreadsheet_id,))
+        self._record(changed)
+
+    def _record(self, changed: List[Tuple[int, str, List[str], str]]):
+        now = time.time()
+        with transaction(self.db_path) as conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO sheets_sync_rows
+                    (spreadsheet_id, location, row_number, fingerprint, pushed_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [(self.spreadsheet_id, location, row_number, fingerprint, now)
+                  for row_number, location, _, fingerprint in changed])
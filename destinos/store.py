@@ -0,0 +1,90 @@
+"""Destinos de la sesión indexados por LOCATION normalizado (mayúsculas y tildes)"""
+import unicodedata
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Mapping, Optional
+
+from destinos.changes import normalize
+from destinos.fields import CONTENT_FIELDS
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def location_key(location: Any) -> str:
+    """Clave de búsqueda: sin tildes, sin distinción de mayúsculas y con espacios simples"""
+    text = unicodedata.normalize('NFKD', normalize(location))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.casefold().split())
+
+
+class DestinationStore:
+    """Filas de destinos con búsqueda, inserción y actualización O(1) por LOCATION
+
+    Refleja la tabla destinos de SQLite: se carga desde ella y recibe los mismos
+    cambios que se guardan, así no hace falta recorrer un DataFrame para cada consulta.
+    """
+
+    def __init__(self, records: Iterable[Mapping[str, Any]] = ()):
+        self._rows: Dict[str, Dict[str, str]] = {}
+        for record in records:
+            self.upsert(record)
+
+    @classmethod
+    def from_frame(cls, df: Optional['pd.DataFrame']) -> 'DestinationStore':
+        if df is None or df.empty:
+            return cls()
+        return cls(df.to_dict('records'))
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, location: Any) -> bool:
+        return location_key(location) in self._rows
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        return iter(self._rows.values())
+
+    def get(self, location: Any) -> Optional[Dict[str, str]]:
+        return self._rows.get(location_key(location))
+
+    def canonical(self, location: str) -> str:
+        """Nombre con que el destino ya está guardado, o el mismo nombre si es nuevo"""
+        row = self.get(location)
+        return row['LOCATION'] if row else location
+
+    def locations(self) -> List[str]:
+        return [row['LOCATION'] for row in self._rows.values()]
+
+    def upsert(self, record: Mapping[str, Any]) -> Dict[str, str]:
+        """Insertar un destino completo o reemplazar los campos que trae"""
+        location = normalize(record.get('LOCATION'))
+        key = location_key(location)
+        if not key:
+            raise ValueError("El destino no tiene LOCATION")
+        row = self._rows.get(key)
+        if row is None:
+            row = {field: '' for field in CONTENT_FIELDS}
+            row['LOCATION'] = location
+            self._rows[key] = row
+        for field, value in record.items():
+            if field != 'LOCATION':
+                row[field] = normalize(value)
+        return row
+
+    def update(self, location: str, changes: Mapping[str, Any]) -> bool:
+        """Aplicar cambios de campos a un destino existente; False si no existe"""
+        row = self.get(location)
+        if row is None:
+            return False
+        for field, value in changes.items():
+            if field != 'LOCATION':
+                row[field] = normalize(value)
+        return True
+
+    def remove_except(self, location: str):
+        key = location_key(location)
+        self._rows = {k: row for k, row in self._rows.items() if k == key}
+
+    def to_frame(self) -> 'pd.DataFrame':
+        import pandas as pd
+
+        return pd.DataFrame.from_records(list(self._rows.values()), columns=CONTENT_FIELDS)
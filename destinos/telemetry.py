@@ -0,0 +1,260 @@
+"""Telemetría de llamadas externas: duración, tokens y costo de OpenAI, celdas de Sheets y SQLite
+
+Cada llamada se registra como un intervalo (``span``) en un buffer circular en
+memoria y, por bloques, en un destino persistente: la tabla ``telemetry_spans``
+de destinos.db o un archivo JSONL. Se configura con TELEMETRY_SINK:
+
+- ``sqlite`` (por defecto): tabla ``telemetry_spans`` de la base indicada con
+  ``telemetry.bind(db_path)`` (la aplicación y la línea de comandos lo hacen con la
+  base en uso); sin ``bind`` los intervalos quedan solo en memoria
+- ``jsonl:ruta.jsonl``: una línea JSON por intervalo
+- ``none``: solo el buffer en memoria
+"""
+import atexit
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+DEFAULT_BUFFER_SIZE = 5000
+FLUSH_EVERY = 50          # Intervalos pendientes antes de escribir en el destino persistente
+FLUSH_INTERVAL = 5.0      # Segundos máximos entre escrituras
+MAX_STORED_SPANS = 100_000
+
+# USD por 1000 tokens (entrada, salida)
+MODEL_PRICES = {
+    'gpt-4': (0.03, 0.06),
+    'gpt-4-turbo': (0.01, 0.03),
+    'gpt-4o': (0.005, 0.015),
+    'gpt-3.5-turbo': (0.0005, 0.0015),
+}
+
+
+def openai_cost(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> float:
+    """Costo estimado en USD de una llamada (0 si el modelo no está en la tabla)"""
+    prices = MODEL_PRICES.get(model or '')
+    if prices is None:
+        # 'gpt-4-0613' y similares usan el precio del modelo base
+        prices = next((p for name, p in sorted(MODEL_PRICES.items(), key=lambda item: -len(item[0]))
+                       if (model or '').startswith(name)), (0.0, 0.0))
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1000
+
+
+@dataclass
+class Span:
+    operation: str
+    started_at: float
+    duration: float = 0.0
+    ok: bool = True
+    error: Optional[str] = None
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentil ``q`` (0-100) por rango más cercano; 0 si no hay valores"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(spans: Iterable[Span]) -> List[Dict[str, Any]]:
+    """Por operación: cantidad, errores, p50/p95 en ms, llamadas por minuto, tokens, costo y celdas"""
+    groups: Dict[str, List[Span]] = {}
+    for span in spans:
+        groups.setdefault(span.operation, []).append(span)
+
+    rows = []
+    for operation, items in sorted(groups.items()):
+        durations = [span.duration for span in items]
+        first = min(span.started_at for span in items)
+        last = max(span.started_at + span.duration for span in items)
+        window = max(last - first, 1.0)
+        totals: Dict[str, float] = {}
+        for span in items:
+            for name in ('prompt_tokens', 'completion_tokens', 'cost_usd', 'cells', 'rows'):
+                value = span.attrs.get(name)
+                if value:
+                    totals[name] = totals.get(name, 0) + value
+        rows.append({
+            'operation': operation,
+            'count': len(items),
+            'errors': sum(1 for span in items if not span.ok),
+            'p50_ms': round(percentile(durations, 50) * 1000, 1),
+            'p95_ms': round(percentile(durations, 95) * 1000, 1),
+            'per_minute': round(len(items) / window * 60, 1),
+            **{name: round(value, 4) for name, value in totals.items()},
+        })
+    return rows
+
+
+class _SqliteSink:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._writes = 0
+        self._lock = threading.Lock()
+        # Conexión propia: la telemetría no debe mezclarse con las transacciones de la aplicación
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        with self._conn:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS telemetry_spans (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    operation TEXT NOT NULL,
+                    started_at REAL NOT NULL,
+                    duration REAL NOT NULL,
+                    ok INTEGER NOT NULL,
+                    error TEXT,
+                    attrs TEXT NOT NULL DEFAULT '{}'
+                )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_telemetry_started ON telemetry_spans (started_at)')
+
+    def write(self, spans: List[Span]):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT INTO telemetry_spans (operation, started_at, duration, ok, error, attrs) VALUES (?, ?, ?, ?, ?, ?)',
+                [(s.operation, s.started_at, s.duration, int(s.ok), s.error, json.dumps(s.attrs)) for s in spans]
+            )
+            self._writes += 1
+            if self._writes % 100 == 0:
+                # Conservar solo los intervalos más recientes
+                self._conn.execute('DELETE FROM telemetry_spans WHERE id <= (SELECT MAX(id) FROM telemetry_spans) - ?',
+                                   (MAX_STORED_SPANS,))
+
+    def read(self, since: float = 0.0) -> List[Span]:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT operation, started_at, duration, ok, error, attrs FROM telemetry_spans '
+                'WHERE started_at >= ? ORDER BY started_at', (since,)
+            ).fetchall()
+        return [Span(op, started, duration, bool(ok), error, json.loads(attrs or '{}'))
+                for op, started, duration, ok, error, attrs in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _JsonlSink:
+    def __init__(self, path: str):
+        self.path = path
+
+    def write(self, spans: List[Span]):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for span in spans:
+                f.write(json.dumps(asdict(span), ensure_ascii=False) + '\n')
+
+    def read(self, since: float = 0.0) -> List[Span]:
+        if not os.path.exists(self.path):
+            return []
+        spans = []
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                data = json.loads(line)
+                if data['started_at'] >= since:
+                    spans.append(Span(**data))
+        return spans
+
+
+class Telemetry:
+    """Buffer circular de intervalos más un destino persistente escrito por bloques"""
+
+    def __init__(self, sink: Optional[str] = 'sqlite', db_path: Optional[str] = None,
+                 buffer_size: int = DEFAULT_BUFFER_SIZE):
+        self.buffer: deque = deque(maxlen=buffer_size)
+        self.sink_name = sink or 'none'
+        self.db_path = db_path
+        self._sink = None
+        self._pending: List[Span] = []
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+
+    @property
+    def persistent(self) -> bool:
+        """Si los intervalos se guardan además del buffer en memoria"""
+        if self.sink_name == 'none':
+            return False
+        return self.sink_name.startswith('jsonl:') or self.db_path is not None
+
+    def bind(self, db_path: str):
+        """Guardar los intervalos en ``db_path``, la base en uso (solo con el destino ``sqlite``)"""
+        if db_path == self.db_path:
+            return
+        self.flush()
+        with self._lock:
+            sink, self._sink = self._sink, None
+            self.db_path = db_path
+        if isinstance(sink, _SqliteSink):
+            sink.close()
+
+    def _get_sink(self):
+        if self._sink is None and self.persistent:
+            if self.sink_name.startswith('jsonl:'):
+                self._sink = _JsonlSink(self.sink_name[len('jsonl:'):])
+            else:
+                self._sink = _SqliteSink(self.db_path)
+        return self._sink
+
+    def record(self, span: Span):
+        with self._lock:
+            self.buffer.append(span)
+            if not self.persistent:
+                return
+            self._pending.append(span)
+            due = len(self._pending) >= FLUSH_EVERY or time.time() - self._last_flush >= FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._last_flush = time.time()
+        if not pending:
+            return
+        try:
+            sink = self._get_sink()
+            if sink is not None:
+                sink.write(pending)
+        except Exception:
+            pass  # La telemetría nunca debe romper la operación medida
+
+    @contextmanager
+    def span(self, operation: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        """Medir un bloque; el diccionario entregado acepta atributos (tokens, celdas, ...)"""
+        span = Span(operation, time.time(), attrs=dict(attrs))
+        start = time.perf_counter()
+        try:
+            yield span.attrs
+        except BaseException as e:
+            span.ok = False
+            span.error = f"{type(e).__name__}: {e}"[:500]
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            self.record(span)
+
+    def recent(self, since: float = 0.0) -> List[Span]:
+        with self._lock:
+            return [span for span in self.buffer if span.started_at >= since]
+
+    def stored(self, since: float = 0.0) -> List[Span]:
+        """Intervalos del destino persistente (incluye los de otros procesos y reinicios)"""
+        self.flush()
+        sink = self._get_sink()
+        return sink.read(since) if sink is not None else []
+
+
+telemetry = Telemetry(
+    sink=os.getenv('TELEMETRY_SINK', 'sqlite'),
+    buffer_size=int(os.getenv('TELEMETRY_BUFFER_SIZE', str(DEFAULT_BUFFER_SIZE)))
+)
+span = telemetry.span
+atexit.register(telemetry.flush)
@@ -0,0 +1,195 @@
+"""Importación y exportación masiva de destinos en CSV y Excel (.xlsx)
+
+Los archivos se leen y escriben fila a fila y se guardan en bloques de
+``batch_size`` con ``executemany`` dentro de una única transacción, así la
+memoria no crece con el tamaño del catálogo y una importación fallida no deja
+la base a medias.
+"""
+import csv
+import io
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Union
+
+from destinos.db import DB_PATH, SELECT_SQL, field_value, get_connection, init_db, transaction, upsert_sql
+from destinos.fields import CONTENT_FIELDS
+from destinos.store import location_key
+from destinos.telemetry import span
+
+DEFAULT_BATCH_SIZE = 1000
+FORMATS = ('csv', 'xlsx')
+
+Source = Union[str, BinaryIO]
+
+
+def column_key(name: Any) -> str:
+    """Nombre de columna sin espacios, guiones ni mayúsculas ('NAV_ACERCA DE ' -> 'NAVACERCADE')"""
+    return re.sub(r'[^A-Z0-9]', '', str(name or '').upper())
+
+
+FIELD_KEYS = {column_key(name): name for name in CONTENT_FIELDS}
+
+
+def map_columns(header: List[Any]) -> Dict[int, str]:
+    """Posición de cada columna del archivo -> campo de contenido; ignora las desconocidas"""
+    mapping = {}
+    for index, name in enumerate(header):
+        field_name = FIELD_KEYS.get(column_key(name))
+        if field_name and field_name not in mapping.values():
+            mapping[index] = field_name
+    if 'LOCATION' not in mapping.values():
+        raise ValueError("El archivo no tiene la columna LOCATION")
+    return mapping
+
+
+def detect_format(name: str) -> str:
+    extension = os.path.splitext(name)[1].lower().lstrip('.')
+    if extension not in FORMATS:
+        raise ValueError(f"Formato no soportado: {name} (se esperaba .csv o .xlsx)")
+    return extension
+
+
+def iter_csv_rows(source: Source) -> Iterator[List[str]]:
+    if isinstance(source, str):
+        with open(source, encoding='utf-8-sig', newline='') as f:
+            yield from csv.reader(f)
+    else:
+        yield from csv.reader(io.TextIOWrapper(source, encoding='utf-8-sig', newline=''))
+
+
+def iter_xlsx_rows(source: Source) -> Iterator[List[Any]]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+def iter_rows(source: Source, fmt: str) -> Iterator[List[Any]]:
+    return iter_xlsx_rows(source) if fmt == 'xlsx' else iter_csv_rows(source)
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    skipped: int = 0
+    fields: List[str] = field(default_factory=list)
+    unmapped: List[str] = field(default_factory=list)
+    locations: List[str] = field(default_factory=list)
+
+
+def import_rows(rows: Iterable[List[Any]], db_path: str = DB_PATH,
+                batch_size: int = DEFAULT_BATCH_SIZE) -> ImportResult:
+    """Insertar o actualizar los destinos de ``rows`` (la primera fila es el encabezado)
+
+    Solo se escriben las columnas presentes en el archivo. Un destino que ya
+    existe con otra escritura ('Santiago' / 'SANTIAGO') se actualiza con su nombre actual.
+    """
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        raise ValueError("El archivo está vacío")
+    mapping = map_columns(header)
+    location_index = next(index for index, name in mapping.items() if name == 'LOCATION')
+    columns = [(index, name) for index, name in mapping.items() if name != 'LOCATION']
+    result = ImportResult(
+        fields=[name for _, name in columns],
+        unmapped=[str(name) for index, name in enumerate(header) if index not in mapping and str(name or '').strip()]
+    )
+    sql = upsert_sql(result.fields)
+
+    init_db(db_path)
+    existing = {location_key(location): location
+                for location, in get_connection(db_path).execute('SELECT location FROM destinos')}
+
+    with span('sqlite.import') as attrs, transaction(db_path) as conn:
+        batch = []
+        for row in rows:
+            location = field_value(row[location_index] if location_index < len(row) else None).strip()
+            if not location:
+                result.skipped += 1
+                continue
+            location = existing.setdefault(location_key(location), location)
+            batch.append([location] + [field_value(row[index] if index < len(row) else None)
+                                       for index, _ in columns])
+            result.locations.append(location)
+            if len(batch) >= batch_size:
+                conn.executemany(sql, batch)
+                batch.clear()
+        if batch:
+            conn.executemany(sql, batch)
+        attrs['rows'] = len(result.locations)
+    result.rows = len(result.locations)
+    return result
+
+
+def import_file(source: Source, fmt: Optional[str] = None, db_path: str = DB_PATH,
+                batch_size: int = DEFAULT_BATCH_SIZE) -> ImportResult:
+    """Importar un CSV o .xlsx (ruta o archivo binario); el formato se deduce del nombre si no se indica"""
+    if fmt is None:
+        fmt = detect_format(source if isinstance(source, str) else getattr(source, 'name', ''))
+    return import_rows(iter_rows(source, fmt), db_path, batch_size)
+
+
+def iter_destination_rows(db_path: str = DB_PATH, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[str]]:
+    """Destinos ordenados por LOCATION, como listas en el orden de CONTENT_FIELDS"""
+    init_db(db_path)
+    cursor = get_connection(db_path).execute(SELECT_SQL + ' ORDER BY location')
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        for row in rows:
+            yield [field_value(value) for value in row]
+
+
+def export_csv(target: Union[str, io.TextIOBase], db_path: str = DB_PATH,
+               batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Escribir todos los destinos en un CSV (UTF-8 con BOM, como lo espera Excel); retorna las filas"""
+    if isinstance(target, str):
+        with open(target, 'w', encoding='utf-8-sig', newline='') as f:
+            return export_csv(f, db_path, batch_size)
+    writer = csv.writer(target)
+    writer.writerow(CONTENT_FIELDS)
+    count = 0
+    for row in iter_destination_rows(db_path, batch_size):
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def export_xlsx(target: Union[str, BinaryIO], db_path: str = DB_PATH,
+                batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Escribir todos los destinos en un .xlsx con el formato de template_destinos.xlsx"""
+    from openpyxl import Workbook
+
+    # En modo write_only openpyxl vuelca las filas a disco en vez de mantenerlas en memoria
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Destinos')
+    sheet.append(CONTENT_FIELDS)
+    count = 0
+    for row in iter_destination_rows(db_path, batch_size):
+        sheet.append(row)
+        count += 1
+    workbook.save(target)
+    return count
+
+
+def export_file(target: Union[str, BinaryIO], fmt: Optional[str] = None, db_path: str = DB_PATH,
+                batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    if fmt is None:
+        fmt = detect_format(target if isinstance(target, str) else getattr(target, 'name', ''))
+    if fmt == 'xlsx':
+        return export_xlsx(target, db_path, batch_size)
+    if isinstance(target, str):
+        return export_csv(target, db_path, batch_size)
+    text = io.TextIOWrapper(target, encoding='utf-8-sig', newline='')
+    try:
+        return export_csv(text, db_path, batch_size)
+    finally:
+        text.flush()
+        text.detach()
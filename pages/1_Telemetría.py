@@ -0,0 +1,72 @@
+"""Panel de telemetría: latencia, volumen y costo de las llamadas a OpenAI, Sheets y SQLite"""
+import time
+from datetime import datetime
+
+import streamlit as st
+
+from destinos.db import DB_PATH
+from destinos.telemetry import summarize, telemetry
+
+st.set_page_config(page_title="Telemetría - Destinos AI", page_icon="📈", layout="wide")
+st.title("📈 Telemetría")
+
+# La página puede abrirse sin pasar por la principal
+telemetry.bind(DB_PATH)
+
+WINDOWS = {
+    "Última hora": 3600,
+    "Últimas 24 horas": 24 * 3600,
+    "Últimos 7 días": 7 * 24 * 3600,
+    "Todo": None,
+}
+
+col1, col2 = st.columns(2)
+with col1:
+    source = st.radio("Origen", ["Este proceso (memoria)", "Historial guardado"], horizontal=True,
+                      help="El historial incluye la línea de comandos y ejecuciones anteriores")
+with col2:
+    window = st.selectbox("Periodo", list(WINDOWS))
+
+seconds = WINDOWS[window]
+since = time.time() - seconds if seconds else 0.0
+if source == "Historial guardado":
+    if not telemetry.persistent:
+        st.info("TELEMETRY_SINK=none: no hay historial guardado, solo los datos en memoria")
+    spans = telemetry.stored(since)
+else:
+    spans = telemetry.recent(since)
+
+if not spans:
+    st.info("No hay mediciones en el periodo seleccionado")
+    st.stop()
+
+rows = summarize(spans)
+totals = {name: sum(row.get(name, 0) for row in rows)
+          for name in ('count', 'errors', 'cost_usd', 'prompt_tokens', 'completion_tokens', 'cells')}
+
+m1, m2, m3, m4 = st.columns(4)
+m1.metric("Llamadas", f"{totals['count']:,}", f"{totals['errors']:,} con error", delta_color="inverse")
+m2.metric("Costo OpenAI (USD)", f"{totals['cost_usd']:.4f}")
+m3.metric("Tokens", f"{int(totals['prompt_tokens'] + totals['completion_tokens']):,}")
+m4.metric("Celdas escritas en Sheets", f"{int(totals['cells']):,}")
+
+st.subheader("Por operación")
+st.dataframe(rows, use_container_width=True, hide_index=True, column_config={
+    'operation': "Operación",
+    'count': "Llamadas",
+    'errors': "Errores",
+    'p50_ms': st.column_config.NumberColumn("p50 (ms)"),
+    'p95_ms': st.column_config.NumberColumn("p95 (ms)"),
+    'per_minute': st.column_config.NumberColumn("Por minuto"),
+})
+
+st.subheader("Últimas llamadas")
+latest = sorted(spans, key=lambda span: span.started_at, reverse=True)[:200]
+st.dataframe([{
+    'Inicio': datetime.fromtimestamp(span.started_at).strftime('%Y-%m-%d %H:%M:%S'),
+    'Operación': span.operation,
+    'Duración (ms)': round(span.duration * 1000, 1),
+    'OK': span.ok,
+    'Error': span.error or '',
+    'Detalle': ', '.join(f"{name}={value}" for name, value in span.attrs.items()),
+} for span in latest], use_container_width=True, hide_index=True)
@@ -0,0 +1,24 @@
+import pytest
+
+from destinos import db
+from destinos.telemetry import telemetry
+
+
+@pytest.fixture(autouse=True)
+def memory_telemetry():
+    """Las mediciones quedan solo en el buffer en memoria, no en destinos.db"""
+    previous = telemetry.sink_name, telemetry.db_path
+    telemetry.sink_name = 'none'
+    yield
+    telemetry.flush()
+    telemetry.bind(previous[1])
+    telemetry.sink_name = previous[0]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Base SQLite temporal con el esquema creado"""
+    path = str(tmp_path / 'destinos.db')
+    db.init_db(path)
+    yield path
+    db.close_connection(path)
@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+from destinos import db
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+AppTest = pytest.importorskip('streamlit.testing.v1').AppTest
+
+
+@pytest.fixture
+def app_dir(tmp_path, monkeypatch):
+    """La aplicación usa destinos.db del directorio actual: uno temporal con un destino"""
+    monkeypatch.chdir(tmp_path)
+    db.init_db(db.DB_PATH)
+    db.save_destination('ANTOFAGASTA', {'NAV_BAR': 'Menú original'}, db.DB_PATH)
+    yield tmp_path
+    db.close_connection(db.DB_PATH)
+
+
+def click_save(at):
+    return next(button for button in at.button if button.label == "💾 Guardar Cambios").click().run()
+
+
+def test_failed_save_keeps_the_edit_pending(app_dir, monkeypatch):
+    at = AppTest.from_file(APP, default_timeout=30).run()
+    at.text_input(key='ANTOFAGASTA:NAV_BAR').set_value('Menú editado')
+
+    def fail(*args, **kwargs):
+        raise OSError("disco lleno")
+    with monkeypatch.context() as patch:
+        patch.setattr(db, 'save_destination', fail)
+        click_save(at)
+    assert any("disco lleno" in error.value for error in at.error)
+    assert db.load_destination('ANTOFAGASTA', db.DB_PATH)['NAV_BAR'] == 'Menú original'
+
+    # El siguiente "Guardar" vuelve a intentar la misma edición
+    click_save(at)
+    assert not any("No hay cambios" in info.value for info in at.info)
+    assert db.load_destination('ANTOFAGASTA', db.DB_PATH)['NAV_BAR'] == 'Menú editado'
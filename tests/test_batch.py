@@ -0,0 +1,59 @@
+import time
+
+from destinos.batch import BatchGenerator
+from destinos.fakes import FakeAPIError, FakeOpenAI
+from destinos.generation import request_content
+from destinos.scheduler import RetryPolicy, ScheduledClient
+
+LOCATIONS = [f"DESTINO {i}" for i in range(8)]
+
+
+class TroubledOpenAI(FakeOpenAI):
+    """FakeOpenAI donde 'LENTO' no responde antes del timeout y 'ROTO' siempre falla"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        create = self.chat.completions.create
+
+        def troubled_create(**request):
+            location = self.location_from_prompt(request['messages'][-1]['content'])
+            if location == 'LENTO':
+                time.sleep(request['timeout'])
+                raise TimeoutError("Request timed out")
+            if location == 'ROTO':
+                raise FakeAPIError(400)
+            return create(**request)
+        self.chat.completions.create = troubled_create
+
+
+def run_batch(client, locations, concurrency, timeout=1.0):
+    engine = BatchGenerator(lambda location, timeout: request_content(client, location, timeout=timeout),
+                            concurrency=concurrency, timeout=timeout)
+    start = time.perf_counter()
+    results = {result.location: result for result in engine.run(locations)}
+    return results, time.perf_counter() - start
+
+
+def test_throughput_scales_with_concurrency():
+    serial_client, parallel_client = FakeOpenAI(latency=0.05), FakeOpenAI(latency=0.05)
+
+    _, serial = run_batch(serial_client, LOCATIONS, concurrency=1)
+    results, parallel = run_batch(parallel_client, LOCATIONS, concurrency=8)
+
+    assert all(result.ok for result in results.values())
+    assert parallel_client.max_in_flight == 8
+    assert parallel < serial / 3
+
+
+def test_slow_or_failing_location_does_not_fail_the_batch():
+    fake = TroubledOpenAI(latency=0.01)
+    client = ScheduledClient(fake, policy=RetryPolicy(base_delay=0.01, max_delay=0.05))
+
+    results, elapsed = run_batch(client, LOCATIONS + ['LENTO', 'ROTO'], concurrency=4, timeout=0.3)
+
+    assert [location for location, result in results.items() if not result.ok] in (['LENTO', 'ROTO'],
+                                                                                  ['ROTO', 'LENTO'])
+    assert all(results[location].ok for location in LOCATIONS)
+    # Los reintentos de 'LENTO' no pasan del timeout de la solicitud
+    assert results['LENTO'].elapsed < 0.6
+    assert elapsed < 1.0
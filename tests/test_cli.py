@@ -0,0 +1,37 @@
+import sqlite3
+
+from destinos import db
+from destinos.__main__ import build_parser, main
+from destinos.telemetry import telemetry
+
+
+def test_db_option_after_the_subcommand():
+    assert build_parser().parse_args(['import', 'x.xlsx', '--db', 'otra.db']).db == 'otra.db'
+    assert build_parser().parse_args(['--db', 'otra.db', 'import', 'x.xlsx']).db == 'otra.db'
+
+
+def test_checkpoint_on_a_new_database(tmp_path, capsys):
+    path = str(tmp_path / 'nueva.db')
+    try:
+        assert main(['checkpoint', '--db', path]) == 0
+    finally:
+        db.close_connection(path)
+    assert 'Historial: 0 -> 0 revisiones' in capsys.readouterr().out
+
+
+def test_telemetry_goes_to_the_database_in_use(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(telemetry, 'sink_name', 'sqlite')
+    path = str(tmp_path / 'datos' / 'otra.db')
+    (tmp_path / 'datos').mkdir()
+    try:
+        (tmp_path / 'destinos.csv').write_text('LOCATION,NAV_BAR\nCALAMA,Menú\n', encoding='utf-8')
+        assert main(['import', 'destinos.csv', '--db', path, '--no-sheets']) == 0
+        telemetry.flush()
+    finally:
+        db.close_connection(path)
+
+    assert not (tmp_path / 'destinos.db').exists()
+    conn = sqlite3.connect(path)
+    assert conn.execute('SELECT COUNT(*) FROM telemetry_spans').fetchone()[0] > 0
+    conn.close()
@@ -0,0 +1,57 @@
+import json
+import sqlite3
+import threading
+
+import pytest
+
+from destinos import db
+
+
+def in_thread(fn):
+    thread = threading.Thread(target=fn)
+    thread.start()
+    thread.join()
+
+
+def test_threads_reuse_pooled_connection(db_path):
+    seen = []
+    for _ in range(5):
+        # Como los reruns de Streamlit: cada uno en un hilo nuevo
+        in_thread(lambda: seen.append(id(db.get_connection(db_path))))
+    assert len(set(seen)) == 1
+
+
+def test_connection_returns_to_pool_without_open_transaction(db_path):
+    def write_without_commit():
+        db.get_connection(db_path).execute("INSERT INTO destinos (location) VALUES ('SIN COMMIT')")
+
+    in_thread(write_without_commit)
+    in_thread(lambda: db.save_destination('CALAMA', {'DESCRIP_QUE_HACER_EN': 'Texto'}, db_path))
+
+    assert [record['LOCATION'] for record in db.load_records(db_path)] == ['CALAMA']
+
+
+def test_missing_values_are_saved_as_empty_text(db_path):
+    pd = pytest.importorskip('pandas')
+    db.save_destination('CALAMA', {'DESCRIP_QUE_HACER_EN': pd.NA, 'NAV_BAR': float('nan')}, db_path)
+
+    record = db.load_destination('CALAMA', db_path)
+    assert record['DESCRIP_QUE_HACER_EN'] == '' and record['NAV_BAR'] == ''
+
+
+def test_migration_keeps_legacy_table_for_non_object_json(tmp_path):
+    path = str(tmp_path / 'antigua.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE destinos (location TEXT PRIMARY KEY, content TEXT, last_updated TIMESTAMP)')
+    conn.executemany('INSERT INTO destinos VALUES (?, ?, CURRENT_TIMESTAMP)', [
+        ('CALAMA', json.dumps({'DESCRIP_QUE_HACER_EN': 'Texto'})),
+        ('ARICA', json.dumps(['no', 'es', 'un', 'objeto'])),
+    ])
+    conn.commit()
+    conn.close()
+
+    assert db.init_db(path) == (2, 1)
+    assert db.load_destination('CALAMA', path)['DESCRIP_QUE_HACER_EN'] == 'Texto'
+    assert db.destination_exists('ARICA', path)
+    legacy = db.get_connection(path).execute("SELECT content FROM destinos_json_legacy WHERE location = 'ARICA'")
+    assert json.loads(legacy.fetchone()[0]) == ['no', 'es', 'un', 'objeto']
@@ -0,0 +1,49 @@
+import time
+
+from destinos.jobs import DONE, PENDING, JobQueue
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "la cola no terminó a tiempo"
+        time.sleep(0.01)
+
+
+def test_enqueue_skips_locations_already_queued(db_path):
+    queue = JobQueue(lambda job: {'LOCATION': job.location}, db_path)
+    first = queue.enqueue(['Santiago', 'Calama'])
+
+    # Otra sesión (o un doble clic) pide los mismos destinos y uno nuevo
+    second = queue.enqueue(['SANTIAGO', 'Arica', 'calama '])
+
+    assert queue.progress(first)[PENDING] == 2
+    assert queue.progress(second)[PENDING] == 1
+    assert queue.active_batches(['santiago', 'Arica', 'Iquique']) == [first, second]
+
+
+def test_finished_location_can_be_queued_again(db_path):
+    queue = JobQueue(lambda job: {'LOCATION': job.location}, db_path, poll_interval=0.01)
+    first = queue.enqueue(['Santiago'])
+    queue.start()
+    try:
+        wait_until(lambda: queue.progress(first)[DONE] == 1)
+        second = queue.enqueue(['Santiago'])
+        wait_until(lambda: queue.progress(second)[DONE] == 1)
+    finally:
+        queue.stop(timeout=1)
+
+
+def test_finished_since_filters_by_batch(db_path):
+    queue = JobQueue(lambda job: {'LOCATION': job.location}, db_path, workers=2, poll_interval=0.01)
+    mine = queue.enqueue(['Santiago'])
+    other = queue.enqueue(['Calama'])
+    queue.start()
+    try:
+        wait_until(lambda: queue.progress(mine)[DONE] + queue.progress(other)[DONE] == 2)
+    finally:
+        queue.stop(timeout=1)
+
+    assert [job.location for job in queue.finished_since(0.0, [mine])] == ['Santiago']
+    assert queue.finished_since(0.0, []) == []
+    assert len(queue.finished_since(0.0)) == 2
@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+from benchmarks.bench_parser import make_case
+from destinos.generation import FIELD_INSTRUCTIONS
+from destinos.parser import ContentParser, parse_content, parse_response
+
+CASES = [make_case(random.Random(seed)) for seed in range(200)]
+
+
+@pytest.mark.parametrize('text, expected, dropped', CASES)
+def test_corpus_fields_are_recovered_exactly(text, expected, dropped):
+    result = parse_response('DESTINO', text, FIELD_INSTRUCTIONS)
+
+    assert {field: result.content[field] for field in expected} == expected
+    assert result.missing == dropped
+    assert result.content['LOCATION'] == 'DESTINO'
+
+
+@pytest.mark.parametrize('text, expected, dropped', CASES[:20])
+def test_streaming_in_small_chunks_gives_the_same_content(text, expected, dropped):
+    parser = ContentParser('DESTINO')
+    for i in range(0, len(text), 7):
+        parser.feed(text[i:i + 7])
+
+    assert parser.close() == parse_content('DESTINO', text)
+
+
+def test_body_line_named_like_location_is_not_a_header():
+    content = parse_content('Santiago', "DESCRIP_CONOCE_LA_CIUDAD_DE: Una ciudad entre cerros.\n"
+                                        "Location: frente al mar…")
+
+    assert content['LOCATION'] == 'Santiago'
+    assert content['DESCRIP_CONOCE_LA_CIUDAD_DE'] == 'Una ciudad entre cerros. Location: frente al mar…'
+
+
+def test_bare_line_named_like_a_non_generated_field_is_text():
+    content = parse_content('Santiago', "**DESCRIP_DATOS_IMPORTANTES:** Lleva abrigo.\nNav_bar")
+
+    assert content['DESCRIP_DATOS_IMPORTANTES'] == 'Lleva abrigo. Nav_bar'
+    assert content['NAV_BAR'] == ''
@@ -0,0 +1,68 @@
+from destinos import db, generation, pipeline
+from destinos.cache import ResponseCache
+from destinos.fakes import FakeOpenAI
+from destinos.generation import FIELD_INSTRUCTIONS
+
+LOCATIONS = ['Calama', 'Arica', 'Iquique']
+
+
+def generate(client, db_path, cache, locations=LOCATIONS, **kwargs):
+    return list(pipeline.generate_and_save(client, locations, db_path, cache=cache, bulk=True, group_size=3,
+                                           enqueue_sheets=False, **kwargs))
+
+
+def test_bulk_generation_reuses_cached_destinations(db_path):
+    cache = ResponseCache(db_path)
+    first = FakeOpenAI()
+    generate(first, db_path, cache)
+    assert first.calls == 1
+
+    again = FakeOpenAI()
+    results = generate(again, db_path, cache)
+
+    assert again.calls == 0
+    assert all(result.ok for result in results)
+    content = db.load_destination('Arica', db_path)
+    assert all(content[field] == f"Texto de prueba para {field} en Arica." for field in FIELD_INSTRUCTIONS)
+
+
+def test_bulk_generation_groups_only_cache_misses(db_path):
+    cache = ResponseCache(db_path)
+    generate(FakeOpenAI(), db_path, cache, locations=LOCATIONS[:2])
+
+    client = FakeOpenAI()
+    results = generate(client, db_path, cache, locations=LOCATIONS + ['Antofagasta', 'Copiapó'])
+
+    assert client.calls == 1
+    assert sorted(result.location for result in results if result.ok) == sorted(LOCATIONS + ['Antofagasta', 'Copiapó'])
+
+
+def test_force_skips_the_cache_in_bulk_mode(db_path):
+    cache = ResponseCache(db_path)
+    generate(FakeOpenAI(), db_path, cache)
+
+    client = FakeOpenAI()
+    generate(client, db_path, cache, force=True)
+
+    assert client.calls == 1
+
+
+class IncompleteOpenAI(FakeOpenAI):
+    """Responde sin ninguno de los campos pedidos"""
+
+    def __init__(self, text=''):
+        super().__init__()
+        self.chat.completions._text = lambda prompt: text
+
+
+def test_incomplete_responses_are_not_cached(db_path):
+    cache = ResponseCache(db_path)
+    for client in (IncompleteOpenAI(''), IncompleteOpenAI('Lo siento, no puedo ayudar con eso.')):
+        generation.request_content(client, 'Calama', cache=cache)
+        list(generation.ContentStream(client, 'Calama', cache=cache))
+    assert len(cache) == 0
+
+    client = FakeOpenAI()
+    generation.request_content(client, 'Calama', cache=cache)
+    generation.request_content(client, 'Calama', cache=cache)
+    assert client.calls == 1 and len(cache) == 1
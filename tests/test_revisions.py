@@ -0,0 +1,93 @@
+import sqlite3
+
+from destinos import db, revisions, transfer
+
+EDIT_FIELD = 'DESCRIP_QUE_HACER_EN'
+
+
+def import_rows(db_path, count, text='Importado', batch_size=transfer.DEFAULT_BATCH_SIZE):
+    rows = [['LOCATION', EDIT_FIELD]] + [[f"DESTINO {i:03d}", f"{text} {i}"] for i in range(count)]
+    return transfer.import_rows(rows, db_path, batch_size)
+
+
+def test_import_is_one_operation(db_path):
+    import_rows(db_path, 300, batch_size=40)
+
+    changes = revisions.recent_changes(db_path)
+
+    assert len(changes) == 1
+    assert changes[0].revisions == 300
+
+
+def test_separate_saves_are_separate_operations(db_path):
+    for i in range(5):
+        db.save_destination(f"DESTINO {i}", {EDIT_FIELD: 'Texto'}, db_path)
+
+    changes = revisions.recent_changes(db_path)
+
+    assert [change.locations for change in changes] == [[f"DESTINO {i}"] for i in reversed(range(5))]
+
+
+def test_undo_reverts_a_whole_import(db_path):
+    import_rows(db_path, 50, text='Original')
+    import_rows(db_path, 50, text='Reemplazado')
+    db.save_destination('OTRO', {EDIT_FIELD: 'Texto'}, db_path)
+
+    imported = revisions.recent_changes(db_path)[1]
+    undone = revisions.undo(imported.op_id, db_path)
+
+    assert len(undone) == 50
+    assert db.load_destination('DESTINO 007', db_path)[EDIT_FIELD] == 'Original 7'
+    assert db.load_destination('OTRO', db_path)[EDIT_FIELD] == 'Texto'
+
+
+def test_undo_restores_the_state_before_the_operation(db_path):
+    db.save_destination('DESTINO 0', {EDIT_FIELD: 'Antes'}, db_path)
+    # Dos cambios al mismo destino en una transacción
+    with db.transaction(db_path) as conn:
+        conn.execute(db.upsert_sql([EDIT_FIELD]), ['DESTINO 0', 'Primero'])
+        conn.execute(db.upsert_sql([EDIT_FIELD]), ['DESTINO 0', 'Segundo'])
+
+    revisions.undo(revisions.recent_changes(db_path)[0].op_id, db_path)
+
+    assert db.load_destination('DESTINO 0', db_path)[EDIT_FIELD] == 'Antes'
+
+
+def test_history_without_operations_is_numbered_by_time(tmp_path):
+    path = str(tmp_path / 'antigua.db')
+    try:
+        db.init_db(path)
+        db.save_destination('DESTINO 0', {EDIT_FIELD: 'Uno'}, path)
+        db.save_destination('DESTINO 1', {EDIT_FIELD: 'Dos'}, path)
+    finally:
+        db.close_connection(path)
+    # Una base creada antes de op_id: las dos revisiones con la misma hora fueron una operación
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute('UPDATE revisions SET created_at = 1000.5')
+        conn.execute('DROP INDEX idx_revisions_op')
+        conn.execute('ALTER TABLE revisions DROP COLUMN op_id')
+    conn.close()
+    db._initialized.discard((path, 'destinos'))
+    try:
+        db.init_db(path)
+        changes = revisions.recent_changes(path)
+    finally:
+        db.close_connection(path)
+
+    assert [(change.revisions, change.locations) for change in changes] == [(2, ['DESTINO 0', 'DESTINO 1'])]
+
+
+def test_checkpoint_keeps_long_chains_as_edits(db_path):
+    for i in range(6):
+        db.save_destination('CALAMA', {EDIT_FIELD: f"Texto {i}"}, db_path)
+
+    assert revisions.checkpoint(db_path, max_chain=3).snapshots == 1
+
+    kinds = [revision.kind for revision in revisions.history('CALAMA', db_path)]
+    assert kinds == [revisions.REBASE] + [revisions.DELTA] * 4 + [revisions.SNAPSHOT]
+    newest = revisions.history('CALAMA', db_path)[0]
+    assert newest.fields == [EDIT_FIELD]
+    assert revisions.content_at('CALAMA', newest.id, db_path)[EDIT_FIELD] == 'Texto 5'
+    assert revisions.undo(revisions.recent_changes(db_path)[0].op_id, db_path) == ['CALAMA']
+    assert db.load_destination('CALAMA', db_path)[EDIT_FIELD] == 'Texto 4'
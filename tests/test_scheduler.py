@@ -0,0 +1,126 @@
+import time
+
+import pytest
+
+from destinos.fakes import FakeAPIError, FakeOpenAI
+from destinos.scheduler import RateLimiter, RetryPolicy, ScheduledClient, TokenBucket
+
+FAST = RetryPolicy(max_retries=5, base_delay=0.001, max_delay=0.01)
+
+
+def ask(client, max_tokens=100, **kwargs):
+    return client.chat.completions.create(
+        model='gpt-4', messages=[{'role': 'user', 'content': 'Contenido atractivo para CALAMA que será publicado'}],
+        max_tokens=max_tokens, **kwargs)
+
+
+class FailingOnce:
+    """Cliente que falla la primera llamada con ``error`` y luego delega en FakeOpenAI"""
+
+    def __init__(self, error):
+        self.error = error
+        self.fake = FakeOpenAI()
+        self.chat = self
+        self.completions = self
+
+    def create(self, **kwargs):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        return self.fake.chat.completions.create(**kwargs)
+
+
+def test_retries_injected_429s_until_success():
+    fake = FakeOpenAI(fail_first=3)
+    client = ScheduledClient(fake, policy=FAST)
+
+    response = ask(client)
+
+    assert 'CALAMA' in response.choices[0].message.content
+    assert fake.errors == 3
+    assert client.retries == 3
+
+
+def test_gives_up_after_max_retries():
+    fake = FakeOpenAI(fail_first=10)
+    client = ScheduledClient(fake, policy=RetryPolicy(max_retries=2, base_delay=0.001, max_delay=0.01))
+
+    with pytest.raises(FakeAPIError):
+        ask(client)
+    assert fake.errors == 3
+    assert client.retries == 2
+
+
+def test_permanent_errors_are_not_retried():
+    fake = FakeOpenAI(fail_first=1, error_status=400)
+    client = ScheduledClient(fake, policy=FAST)
+
+    with pytest.raises(FakeAPIError):
+        ask(client)
+    assert client.retries == 0
+
+
+def test_retry_after_header_sets_the_delay():
+    policy = RetryPolicy(base_delay=5.0, max_delay=1.0)
+    assert policy.delay(0, FakeAPIError(429, retry_after=0.05)) == 0.05
+    assert policy.delay(0, FakeAPIError(429, retry_after=30)) == 1.0
+
+    client = ScheduledClient(FailingOnce(FakeAPIError(429, retry_after=0.1)), policy=policy)
+    start = time.perf_counter()
+    ask(client)
+    assert 0.1 <= time.perf_counter() - start < 0.5
+    assert client.retries == 1
+
+
+def test_token_bucket_refills_over_time():
+    now = [0.0]
+    bucket = TokenBucket(60, clock=lambda: now[0])  # 1 unidad por segundo
+
+    bucket.consume(60)
+    assert bucket.wait_time(10) == pytest.approx(10)
+    now[0] += 4
+    assert bucket.wait_time(10) == pytest.approx(6)
+    # El uso real fue menor que lo estimado: se devuelve la diferencia
+    bucket.adjust(-6)
+    assert bucket.wait_time(10) == 0
+
+
+def test_token_budget_throttles_requests():
+    limiter = RateLimiter(requests_per_minute=10_000, tokens_per_minute=60_000)  # 1000 tokens por segundo
+    limiter.acquire(60_000)
+
+    start = time.perf_counter()
+    limiter.acquire(100)
+    assert 0.08 <= time.perf_counter() - start < 0.5
+
+
+def test_actual_usage_is_returned_to_the_budget():
+    fake = FakeOpenAI()
+    client = ScheduledClient(fake, tokens_per_minute=600_000, policy=FAST)
+
+    # Se reserva el presupuesto completo, pero la respuesta usa ~500 tokens
+    ask(client, max_tokens=600_000)
+    start = time.perf_counter()
+    ask(client, max_tokens=600_000)
+    assert time.perf_counter() - start < 0.5
+    assert fake.calls == 2
+
+
+def test_timeout_bounds_retries_and_backoff():
+    fake = FakeOpenAI(fail_first=100)
+    client = ScheduledClient(fake, policy=RetryPolicy(max_retries=5, base_delay=1.0, max_delay=60.0))
+
+    start = time.perf_counter()
+    with pytest.raises(FakeAPIError):
+        ask(client, timeout=0.2)
+    assert time.perf_counter() - start < 0.3
+
+
+def test_timeout_bounds_the_wait_for_budget():
+    client = ScheduledClient(FakeOpenAI(), tokens_per_minute=60_000, policy=FAST)
+    client.limiter.acquire(60_000)
+
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        ask(client, max_tokens=30_000, timeout=0.1)
+    assert time.perf_counter() - start < 0.1
@@ -0,0 +1,30 @@
+import pytest
+
+from destinos import db
+from destinos.search import fts_query, search
+
+EDIT_FIELD = 'DESCRIP_QUE_HACER_EN'
+
+
+def test_last_word_matches_prefixes():
+    assert fts_query('cerro cristo') == '"cerro" "cristo" *'
+    assert fts_query('"Cerro San Cristóbal"') == '"Cerro San Cristóbal"'
+
+
+@pytest.mark.parametrize('query', ['"Cerro San', 'Cerro"San', 'Cerro San"', '"Cerro" "San'])
+def test_stray_quotes_do_not_break_the_query(db_path, query):
+    db.save_destination('SANTIAGO', {EDIT_FIELD: 'Subir al Cerro San Cristóbal'}, db_path)
+
+    assert [hit.location for hit in search(query, db_path=db_path)] == ['SANTIAGO']
+
+
+@pytest.mark.parametrize('query', ['"', '""', '" "'])
+def test_only_quotes_is_an_empty_query(query):
+    assert fts_query(query) == ''
+
+
+def test_unclosed_quote_searches_the_phrase(db_path):
+    db.save_destination('SANTIAGO', {EDIT_FIELD: 'Subir al Cerro San Cristóbal'}, db_path)
+    db.save_destination('VALPARAISO', {EDIT_FIELD: 'Cerro Alegre y el paseo San Juan'}, db_path)
+
+    assert [hit.location for hit in search('"Cerro San', db_path=db_path)] == ['SANTIAGO']
@@ -0,0 +1,176 @@
+import json
+
+import pytest
+
+from destinos import db
+from destinos.fakes import FakeSheetsService
+from destinos.fields import CONTENT_FIELDS
+from destinos.sheets_meta import SheetMetadata
+from destinos.sheets_sync import SheetsSync
+
+EDIT_FIELD = 'DESCRIP_QUE_HACER_EN'
+
+
+def make_sync(service, db_path):
+    return SheetsSync(service, 'test', 'Destinos', db_path=db_path)
+
+
+def seed(db_path, count=5):
+    for i in range(count):
+        db.save_destination(f"DESTINO {i}", {EDIT_FIELD: f"Texto {i}"}, db_path)
+
+
+def test_first_push_writes_header_and_every_row(db_path):
+    seed(db_path)
+    service = FakeSheetsService()
+    result = make_sync(service, db_path).push(db.load_records(db_path))
+
+    assert result.rows == 5
+    assert service.cells_written == 6 * len(CONTENT_FIELDS)
+    assert service.sheets['Destinos'][0] == CONTENT_FIELDS
+
+
+def test_one_row_edit_writes_one_row_of_cells(db_path):
+    seed(db_path)
+    service = FakeSheetsService()
+    sync = make_sync(service, db_path)
+    sync.push(db.load_records(db_path))
+    service.reset_counters()
+
+    db.save_destination('DESTINO 2', {EDIT_FIELD: 'Texto editado'}, db_path)
+    result = sync.push(db.load_records(db_path))
+
+    assert result.rows == 1
+    assert service.cells_written == len(CONTENT_FIELDS)
+    assert service.calls == {'values.batchUpdate': 1}
+    row = service.sheets['Destinos'][3]
+    assert row[0] == 'DESTINO 2'
+    assert row[CONTENT_FIELDS.index(EDIT_FIELD)] == 'Texto editado'
+
+
+def test_second_sync_without_changes_writes_nothing(db_path):
+    seed(db_path)
+    service = FakeSheetsService()
+    sync = make_sync(service, db_path)
+    sync.push(db.load_records(db_path))
+    service.reset_counters()
+
+    result = sync.push(db.load_records(db_path))
+
+    assert result.rows == 0
+    assert service.cells_written == 0
+    assert service.requests == 0
+
+
+def test_sync_state_survives_restart(db_path):
+    seed(db_path)
+    service = FakeSheetsService()
+    make_sync(service, db_path).push(db.load_records(db_path))
+    service.reset_counters()
+
+    # Una instancia nueva (reinicio de la aplicación) solo relee la columna LOCATION
+    result = make_sync(service, db_path).push(db.load_records(db_path))
+
+    assert result.rows == 0
+    assert service.cells_written == 0
+    assert service.calls == {'values.get': 1}
+
+
+def test_push_splits_large_updates_into_bounded_requests(db_path):
+    seed(db_path, count=20)
+    service = FakeSheetsService()
+    records = db.load_records(db_path)
+    row_bytes = len(json.dumps(make_sync(service, db_path).to_values(records[0])))
+
+    result = make_sync(service, db_path).push(records, max_bytes=row_bytes * 6)
+
+    assert result.rows == 20
+    assert service.calls['values.batchUpdate'] > 1
+    assert [row[0] for row in service.sheets['Destinos'][1:]] == [record['LOCATION'] for record in records]
+
+
+class FailingSheetsService(FakeSheetsService):
+    """Falla solo el pedido número ``fail_at`` (1-based)"""
+
+    def __init__(self, fail_at):
+        super().__init__()
+        self.fail_at = fail_at
+
+    def before_request(self):
+        super().before_request()
+        if self.requests == self.fail_at:
+            raise RuntimeError("Sheets no disponible")
+
+
+def test_failed_request_keeps_rows_already_sent(db_path):
+    seed(db_path, count=20)
+    # Pedido 1: leer la columna LOCATION; 2: primer batchUpdate; 3: el segundo falla
+    service = FailingSheetsService(fail_at=3)
+    sync = make_sync(service, db_path)
+    records = db.load_records(db_path)
+    # El primer pedido lleva el encabezado y algunas filas
+    max_bytes = len(json.dumps(sync.columns)) + len(json.dumps(sync.to_values(records[0]))) * 6
+
+    with pytest.raises(RuntimeError):
+        sync.push(records, max_bytes=max_bytes)
+    sent = len(service.sheets['Destinos']) - 1
+    assert 0 < sent < 20
+
+    result = sync.push(records, max_bytes=max_bytes)
+    assert result.rows == 20 - sent
+    assert [row[0] for row in service.sheets['Destinos'][1:]] == [record['LOCATION'] for record in records]
+
+
+def test_pull_brings_rows_edited_in_the_sheet(db_path):
+    seed(db_path)
+    service = FakeSheetsService()
+    sync = make_sync(service, db_path)
+    sync.push(db.load_records(db_path))
+
+    service.sheets['Destinos'][2][CONTENT_FIELDS.index(EDIT_FIELD)] = 'Editado en la hoja'
+    result = sync.pull()
+
+    assert result.locations == ['DESTINO 1']
+    assert result.conflicts == []
+    assert db.load_destination('DESTINO 1', db_path)[EDIT_FIELD] == 'Editado en la hoja'
+
+
+def test_pull_keeps_columns_missing_from_the_sheet(db_path):
+    db.save_destination('DESTINO 0', {EDIT_FIELD: 'Texto', 'NAV_BAR': 'Menú local'}, db_path)
+    service = FakeSheetsService()
+    sync = make_sync(service, db_path)
+    sync.push(db.load_records(db_path))
+
+    # Alguien borró columnas de la hoja y editó otra
+    service.sheets['Destinos'] = [['LOCATION', EDIT_FIELD], ['DESTINO 0', 'Editado en la hoja']]
+    result = sync.pull()
+
+    assert result.locations == ['DESTINO 0']
+    record = db.load_destination('DESTINO 0', db_path)
+    assert record[EDIT_FIELD] == 'Editado en la hoja'
+    assert record['NAV_BAR'] == 'Menú local'
+
+
+def test_pull_without_sync_state_keeps_local_edits(db_path):
+    db.save_destination('DESTINO 0', {EDIT_FIELD: 'Versión local'}, db_path)
+    service = FakeSheetsService({'Destinos': [['LOCATION', EDIT_FIELD],
+                                              ['DESTINO 0', 'Versión de la hoja'],
+                                              ['DESTINO 9', 'Solo en la hoja']]})
+
+    result = make_sync(service, db_path).pull()
+
+    assert result.conflicts == ['DESTINO 0']
+    assert result.locations == ['DESTINO 9']
+    assert db.load_destination('DESTINO 0', db_path)[EDIT_FIELD] == 'Versión local'
+
+
+def test_created_spreadsheet_is_reused_after_restart(db_path):
+    service = FakeSheetsService(sheets={})
+    info = SheetMetadata(service, None, 'Destinos', db_path=db_path).ensure()
+    assert info.created and info.spreadsheet_id == 'fake-spreadsheet'
+
+    # Otro proceso con el mismo ID configurado (ninguno) usa la hoja ya creada
+    metadata = SheetMetadata(service, None, 'Destinos', db_path=db_path)
+    assert metadata.spreadsheet_id == 'fake-spreadsheet'
+    assert not metadata.ensure().created
+    assert service.calls['create'] == 1